@@ -1,29 +1,63 @@
+import argparse
 import cv2
 import mediapipe as mp
 import numpy as np
-import time
 from playsound import playsound
 import os
-
-# Initialize MediaPipe Pose and webcam
+import sys
+import time
+# src/model's modules import each other by flat name (from features import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+from adaptive_pose import AdaptivePose
+from alerts import AlertWorker
+from calibration import PostureCalibration
+from recording import LandmarkRecorder, LandmarkRecording, LandmarkReplay
+
+parser = argparse.ArgumentParser(description="Calibrated posture corrector using shoulder and neck angles")
+parser.add_argument("--adaptive", action="store_true", help="skip pose detection while the user is still")
+parser.add_argument("--pose-scale", type=float, default=1.0, help="downscale factor for pose detection")
+parser.add_argument("--motion-threshold", type=float, default=3.0, help="mean gray-level change that counts as motion")
+parser.add_argument("--max-skip", type=int, default=8, help="most frames to hold landmarks for while still")
+parser.add_argument("--calibration-frames", type=int, default=30, help="frames averaged into the posture baseline")
+parser.add_argument("--alert-cooldown", type=float, default=5.0, help="minimum seconds between alerts")
+parser.add_argument("--record", help="append each frame's landmarks to this recording file")
+parser.add_argument("--replay", help="run a session from a recording file instead of the webcam")
+parser.add_argument("--replay-session", default="-1", help="session id or index in the recording (default: last)")
+parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace instead of maximum speed")
+parser.add_argument("--replay-speed", type=float, default=1.0, help="playback speed with --realtime")
+parser.add_argument("--headless", action="store_true", help="do not open a window (for replays and benchmarks)")
+args = parser.parse_args()
+
+# Initialize MediaPipe Pose and webcam, or a recorded session that already carries its landmarks
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-cap = cv2.VideoCapture(0)
-
-# Calibration variables
-calibration_frames = 0
-calibration_shoulder_angles = []
-calibration_neck_angles = []
-is_calibrated = False
-shoulder_threshold = 0
-neck_threshold = 0
-
-# Alert system variables
-last_alert_time = 0
-alert_cooldown = 5  # seconds
+replay = None
+if args.replay:
+    session = int(args.replay_session) if args.replay_session.lstrip("-").isdigit() else args.replay_session
+    cap = replay = LandmarkReplay(LandmarkRecording(args.replay).session(session), realtime=args.realtime,
+                                  speed=args.replay_speed)
+else:
+    pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if args.adaptive or args.pose_scale != 1.0:
+        pose = AdaptivePose(pose, scale=args.pose_scale, motion_threshold=args.motion_threshold,
+                            max_skip=args.max_skip if args.adaptive else 0)
+    cap = cv2.VideoCapture(0)
+recorder = LandmarkRecorder(args.record) if args.record else None
+
+# Shoulder/neck baseline for this camera; press 'c' to recalibrate
+calibration = PostureCalibration(frames=args.calibration_frames)
+
+# Alerts play on a background thread so the capture loop never waits for the sound
 sound_file = 'alert.wav'  # Make sure this file exists in your directory
 
+def play_alert(message):
+    print(message)
+    if os.path.exists(sound_file):
+        playsound(sound_file)
+
+# Replays measure the cooldown in recorded time, so alerts come out the same at any speed
+alerts = AlertWorker(play_alert, cooldown=args.alert_cooldown, clock=replay.clock if replay else time.monotonic)
+
 def calculate_angle(a, b, c):
     """Calculates the angle at point b formed by points a-b-c"""
     a = np.array(a)
@@ -49,12 +83,19 @@ def draw_angle(frame, a, b, c, angle, color):
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2, cv2.LINE_AA)
 
 while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        continue
-
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_frame)
+    if replay is not None:
+        ret, frame, results = replay.read()
+        if not ret:
+            break
+    else:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = pose.process(rgb_frame)
+    if recorder is not None:
+        recorder.record(results.pose_landmarks, frame.shape[1], frame.shape[0])
 
     if results.pose_landmarks:
         landmarks = results.pose_landmarks.landmark
@@ -72,17 +113,13 @@ while cap.isOpened():
         neck_angle = calculate_angle(left_ear, left_shoulder, (left_shoulder[0], 0))
 
         # Calibration phase
-        if not is_calibrated and calibration_frames < 30:
-            calibration_shoulder_angles.append(shoulder_angle)
-            calibration_neck_angles.append(neck_angle)
-            calibration_frames += 1
-            cv2.putText(frame, f"Calibrating... {calibration_frames}/30", (10, 30), 
+        if calibration.update(shoulder_angle, neck_angle):
+            print(f"Calibration complete. Shoulder threshold: {calibration.shoulder_threshold:.1f} "
+                  f"(std {calibration.shoulder.std:.1f}), Neck threshold: {calibration.neck_threshold:.1f} "
+                  f"(std {calibration.neck.std:.1f})")
+        elif not calibration.calibrated:
+            cv2.putText(frame, f"Calibrating... {calibration.count}/{calibration.frames}", (10, 30), 
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2, cv2.LINE_AA)
-        elif not is_calibrated:
-            shoulder_threshold = np.mean(calibration_shoulder_angles) - 10
-            neck_threshold = np.mean(calibration_neck_angles) - 10
-            is_calibrated = True
-            print(f"Calibration complete. Shoulder threshold: {shoulder_threshold:.1f}, Neck threshold: {neck_threshold:.1f}")
 
         # Visualization
         mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
@@ -91,29 +128,36 @@ while cap.isOpened():
         draw_angle(frame, left_ear, left_shoulder, (left_shoulder[0], 0), neck_angle, (0, 255, 0))
 
         # Posture feedback
-        if is_calibrated:
-            current_time = time.time()
-            if shoulder_angle < shoulder_threshold or neck_angle < neck_threshold:
+        if calibration.calibrated:
+            if calibration.is_poor(shoulder_angle, neck_angle):
                 status = "Poor Posture"
                 color = (0, 0, 255)
-                if current_time - last_alert_time > alert_cooldown:
-                    print("Poor posture detected! Please sit up straight.")
-                    if os.path.exists(sound_file):
-                        playsound(sound_file)
-                    last_alert_time = current_time
+                alerts.trigger("Poor posture detected! Please sit up straight.")
             else:
                 status = "Good Posture"
                 color = (0, 255, 0)
 
             cv2.putText(frame, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2, cv2.LINE_AA)
-            cv2.putText(frame, f"Shoulder Angle: {shoulder_angle:.1f}/{shoulder_threshold:.1f}", (10, 60), 
+            cv2.putText(frame, f"Shoulder Angle: {shoulder_angle:.1f}/{calibration.shoulder_threshold:.1f}", (10, 60), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
-            cv2.putText(frame, f"Neck Angle: {neck_angle:.1f}/{neck_threshold:.1f}", (10, 90), 
+            cv2.putText(frame, f"Neck Angle: {neck_angle:.1f}/{calibration.neck_threshold:.1f}", (10, 90), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
 
+    if args.headless:
+        continue
     cv2.imshow('Posture Corrector', frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    key = cv2.waitKey(1) & 0xFF
+    if key == ord('q'):
         break
+    if key == ord('c'):
+        calibration.reset()
 
+alerts.close(timeout=1.0)
 cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+if not args.headless:
+    cv2.destroyAllWindows()
+if recorder is not None:
+    recorder.close()
+    print(f"Recorded {recorder.count} frames to {args.record} (session {recorder.session_id})")
+if replay is not None:
+    print(f"Replayed {replay.position} frames; alerts: {alerts.stats}")
\ No newline at end of file
@@ -1,9 +1,25 @@
+import argparse
+import time
 import tensorflow as tf
-import tensorflowjs as tfjs
 import numpy as np
+import pandas as pd
 import os
+import sys
+# src/model's modules import each other by flat name (from features import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+from features import extract_features
+from inference import load_posture_model
 
-model_path = 'src/model/posture_model.h5'
+FORMATS = ['tfjs', 'npz', 'tflite-fp16', 'tflite-int8', 'onnx']
+
+parser = argparse.ArgumentParser(description="Convert the Keras posture model for TensorFlow.js and lightweight runtimes.")
+parser.add_argument('--model', default='src/model/posture_model.h5', help="Keras .h5 model to convert")
+parser.add_argument('--output-dir', default='public/assets', help="where model.json and weights are written")
+parser.add_argument('--formats', nargs='+', default=FORMATS, choices=FORMATS, help="formats to export")
+parser.add_argument('--data', default='src/posture_data.csv', help="rows used for int8 calibration and parity")
+args = parser.parse_args()
+
+model_path = args.model
 
 # Verify model exists
 if not os.path.exists(model_path):
@@ -24,19 +40,21 @@ except ValueError as e:
 print("\nOriginal Model Summary:")
 model.summary()
 
-# Create a new model with explicit input layer
+# Get the dense layers from the original model
+original_dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+
+# Create a new model with explicit input layer, mirroring the original layer widths
 inputs = tf.keras.Input(shape=(7,), name='input_1')
-x = tf.keras.layers.Dense(16, activation='relu', name='dense_1')(inputs)
-x = tf.keras.layers.Dense(16, activation='relu', name='dense_2')(x)
-outputs = tf.keras.layers.Dense(1, activation='sigmoid', name='dense_3')(x)
+x = inputs
+for i, layer in enumerate(original_dense_layers, 1):
+    x = tf.keras.layers.Dense(layer.units, activation=layer.get_config()['activation'], name=f'dense_{i}')(x)
+outputs = x
 
 new_model = tf.keras.Model(inputs=inputs, outputs=outputs)
 
 print("\nNew Model Summary:")
 new_model.summary()
 
-# Get the dense layers from both models
-original_dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
 new_dense_layers = [layer for layer in new_model.layers if isinstance(layer, tf.keras.layers.Dense)]
 
 # Copy weights from original dense layers to new dense layers
@@ -50,24 +68,128 @@ new_model.compile(
     loss='mean_squared_error'
 )
 
-# Convert and save the model
-output_dir = 'public/assets'
-os.makedirs(output_dir, exist_ok=True)
-
-try:
-    tfjs.converters.save_keras_model(new_model, output_dir)
-    print(f"\nModel converted and saved to {output_dir}/")
-except Exception as e:
-    print(f"Error during conversion: {e}")
-    raise e
-
-# Verify the converted files exist
-expected_files = {'model.json', 'group1-shard1of1.bin'}
-actual_files = set(os.listdir(output_dir))
-
-if expected_files.issubset(actual_files):
-    print("Conversion successful! Files created:")
-    for file in actual_files:
-        print(f"- {file}")
-else:
-    print("Warning: Some files are missing after conversion!")
+if 'tfjs' in args.formats:
+    import tensorflowjs as tfjs
+
+    # Convert and save the model
+    output_dir = args.output_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        tfjs.converters.save_keras_model(new_model, output_dir)
+        print(f"\nModel converted and saved to {output_dir}/")
+    except Exception as e:
+        print(f"Error during conversion: {e}")
+        raise e
+
+    # Verify the converted files exist
+    expected_files = {'model.json', 'group1-shard1of1.bin'}
+    actual_files = set(os.listdir(output_dir))
+
+    if expected_files.issubset(actual_files):
+        print("Conversion successful! Files created:")
+        for file in actual_files:
+            print(f"- {file}")
+    else:
+        print("Warning: Some files are missing after conversion!")
+
+# Lightweight exports are written next to the source model, named like inference.BACKEND_PATHS
+base_path = os.path.splitext(model_path)[0]
+export_paths = {
+    'npz': base_path + '.npz',
+    'tflite-fp16': base_path + '_fp16.tflite',
+    'tflite-int8': base_path + '_int8.tflite',
+    'onnx': base_path + '.onnx',
+}
+
+# Real feature rows for int8 calibration and the parity check
+features, valid = extract_features(pd.read_csv(args.data))
+features = features[valid].astype(np.float32)
+
+weights = [(layer.get_weights()[0].astype(np.float32), layer.get_weights()[1].astype(np.float32),
+            layer.get_config()['activation']) for layer in new_dense_layers]
+
+if 'npz' in args.formats:
+    bundle = {'activations': np.array([activation for _, _, activation in weights])}
+    for i, (kernel, bias, _) in enumerate(weights):
+        bundle[f'kernel_{i}'], bundle[f'bias_{i}'] = kernel, bias
+    np.savez(export_paths['npz'], **bundle)
+    print(f"\nSaved NumPy weight bundle to {export_paths['npz']}")
+
+
+def representative_dataset():
+    for row in features[:500]:
+        yield [row[np.newaxis, :]]
+
+
+for name, quantization in [('tflite-fp16', tf.float16), ('tflite-int8', tf.int8)]:
+    if name not in args.formats:
+        continue
+    converter = tf.lite.TFLiteConverter.from_keras_model(new_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == tf.float16:
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        # int8 weights and activations, float32 input/output so callers need no changes
+        converter.representative_dataset = representative_dataset
+    with open(export_paths[name], 'wb') as f:
+        f.write(converter.convert())
+    print(f"Saved {name} model to {export_paths[name]}")
+
+if 'onnx' in args.formats:
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    # The MLP maps directly onto MatMul/Add/activation nodes, no graph converter needed
+    onnx_ops = {'relu': 'Relu', 'sigmoid': 'Sigmoid'}
+    nodes, initializers, current = [], [], 'input'
+    for i, (kernel, bias, activation) in enumerate(weights):
+        initializers += [numpy_helper.from_array(kernel, f'kernel_{i}'), numpy_helper.from_array(bias, f'bias_{i}')]
+        nodes += [helper.make_node('MatMul', [current, f'kernel_{i}'], [f'matmul_{i}']),
+                  helper.make_node('Add', [f'matmul_{i}', f'bias_{i}'], [f'dense_{i}'])]
+        current = f'dense_{i}'
+        if activation != 'linear':
+            nodes.append(helper.make_node(onnx_ops[activation], [current], [f'{activation}_{i}']))
+            current = f'{activation}_{i}'
+    nodes.append(helper.make_node('Identity', [current], ['score']))
+    graph = helper.make_graph(nodes, 'posture_model',
+                              [helper.make_tensor_value_info('input', TensorProto.FLOAT, ['batch', 7])],
+                              [helper.make_tensor_value_info('score', TensorProto.FLOAT, ['batch', 1])],
+                              initializers)
+    # IR version 8 keeps the file loadable by older onnxruntime releases
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)], ir_version=8)
+    onnx.checker.check_model(onnx_model)
+    onnx.save(onnx_model, export_paths['onnx'])
+    print(f"Saved ONNX model to {export_paths['onnx']}")
+
+
+def median_latency(predict, x, runs=200):
+    predict(x)
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(x)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies))
+
+
+# Parity and speed of every runtime against the Keras float32 reference
+reference = new_model.predict(features, verbose=0)
+batch = np.resize(features, (1024, features.shape[1]))
+runtimes = [('keras', model_path, lambda x: new_model.predict(x, verbose=0))]
+runtimes += [('numpy', model_path, load_posture_model(model_path, 'numpy').predict)]
+for name in ['npz', 'tflite-fp16', 'tflite-int8', 'onnx']:
+    if os.path.exists(export_paths[name]) and name in args.formats:
+        runtimes.append((name, export_paths[name], load_posture_model(export_paths[name], name).predict))
+
+print(f"\nParity on {len(features)} rows of {args.data}, latency is the median of 200 calls (20 for keras):")
+print(f"{'format':12s} {'size':>9s} {'max diff':>10s} {'score diffs':>11s} {'1 row':>10s} {'1024 rows':>10s}")
+for name, path, predict in runtimes:
+    predictions = predict(features)
+    max_diff = float(np.max(np.abs(predictions - reference)))
+    mismatches = int(np.sum((predictions * 100).astype(int) != (reference * 100).astype(int)))
+    runs = 20 if name == 'keras' else 200
+    single = median_latency(predict, features[:1], runs)
+    batched = median_latency(predict, batch, runs)
+    print(f"{name:12s} {os.path.getsize(path):8d}B {max_diff:10.2e} {mismatches:11d} "
+          f"{single * 1e6:8.1f}us {batched * 1e6:8.1f}us")
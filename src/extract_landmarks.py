@@ -0,0 +1,171 @@
+"""Builds posture_data.csv rows from a directory of labelled videos.
+
+Videos are split into segments that a process pool runs MediaPipe Pose on,
+one segment per task, each with its own Pose graph. Rows are appended to
+the output CSV as segments finish, and every finished segment is recorded
+in a "<output>.progress" file together with the CSV size at that point, so
+an interrupted run resumes where it stopped without duplicating rows.
+
+Labels come from --labels (a CSV with "video" and "label" columns, video
+paths relative to the input directory), or else from the name of each
+video's parent directory (e.g. videos/100/clip.mp4 -> label 100).
+
+Usage: python src/extract_landmarks.py VIDEO_DIR OUTPUT_CSV [--workers N]
+"""
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import time
+
+import cv2
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+
+# MediaPipe Pose face landmarks 0-10 plus the shoulders, in posture_data.csv order
+LANDMARKS = [
+    ("nose", 0),
+    ("left_eye_inner", 1), ("left_eye", 2), ("left_eye_outer", 3),
+    ("right_eye_inner", 4), ("right_eye", 5), ("right_eye_outer", 6),
+    ("left_ear", 7), ("right_ear", 8),
+    ("mouth_left", 9), ("mouth_right", 10),
+    ("left_shoulder", 11), ("right_shoulder", 12),
+]
+
+HEADER = ["label", "videoWidth", "videoHeight"] + [f"{name}_{axis}" for name, _ in LANDMARKS for axis in "xy"]
+
+_mp_pose = None
+
+
+def init_worker():
+    # Import MediaPipe once per worker process
+    global _mp_pose
+    import mediapipe
+    _mp_pose = mediapipe.solutions.pose
+
+
+def new_pose():
+    # A fresh graph per segment: tracking state from one video must not seed
+    # the first frames of another video's segment
+    return _mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+
+def process_segment(task):
+    """Runs pose detection over frames [start, end) of one video, every `stride` frames."""
+    segment_id, path, label, start, end, stride = task
+    cap = cv2.VideoCapture(path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    rows, frames = [], 0
+    with new_pose() as pose:
+        for index in range(start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if (index - start) % stride:
+                continue
+            frames += 1
+            h, w = frame.shape[:2]
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if not results.pose_landmarks:
+                continue
+            landmarks = results.pose_landmarks.landmark
+            row = [label, w, h]
+            for _, i in LANDMARKS:
+                row += [f"{landmarks[i].x * w:.2f}", f"{landmarks[i].y * h:.2f}"]
+            rows.append(row)
+    cap.release()
+    return segment_id, frames, rows
+
+
+def find_videos(video_dir, labels_path):
+    if labels_path:
+        with open(labels_path, newline="") as f:
+            return [(os.path.join(video_dir, r["video"]), r["label"]) for r in csv.DictReader(f)]
+
+    videos = []
+    for root, _, files in os.walk(video_dir):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                videos.append((os.path.join(root, name), os.path.basename(root)))
+    return sorted(videos)
+
+
+def plan_segments(videos, segment_frames, stride):
+    tasks = []
+    for path, label in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            print(f"Skipping unreadable video: {path}")
+            continue
+        for start in range(0, total, segment_frames):
+            end = min(start + segment_frames, total)
+            tasks.append((f"{path}:{start}", path, label, start, end, stride))
+    return tasks
+
+
+def load_progress(output, progress_path):
+    """Returns finished segment ids and truncates the CSV to the last recorded size."""
+    done, size = set(), None
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            for line in f:
+                segment_id, _, offset = line.rstrip("\n").rpartition("\t")
+                if offset:
+                    size = int(offset)
+                if segment_id:
+                    done.add(segment_id)
+    # Rows written after the last recorded segment belong to an unfinished one
+    if size is not None and os.path.exists(output):
+        with open(output, "r+b") as f:
+            f.truncate(size)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video_dir")
+    parser.add_argument("output")
+    parser.add_argument("--labels", help='CSV with "video" and "label" columns')
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--segment-frames", type=int, default=300, help="frames per worker task")
+    parser.add_argument("--stride", type=int, default=1, help="keep every Nth frame")
+    args = parser.parse_args()
+
+    progress_path = args.output + ".progress"
+    done = load_progress(args.output, progress_path)
+    tasks = [t for t in plan_segments(find_videos(args.video_dir, args.labels), args.segment_frames, args.stride)
+             if t[0] not in done]
+    print(f"{len(tasks)} segments to process ({len(done)} already done), {args.workers} workers")
+
+    new_file = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+    started, frames_total, rows_total = time.perf_counter(), 0, 0
+    with open(args.output, "a", newline="") as out, open(progress_path, "a") as progress, \
+            mp.get_context("spawn").Pool(args.workers, initializer=init_worker) as pool:
+        writer = csv.writer(out, lineterminator="\n")
+        if new_file:
+            writer.writerow(HEADER)
+        if not done:
+            # Baseline size: rows already in an existing CSV are kept on resume
+            out.flush()
+            progress.write(f"\t{out.tell()}\n")
+            progress.flush()
+
+        for finished, (segment_id, frames, rows) in enumerate(pool.imap_unordered(process_segment, tasks), 1):
+            writer.writerows(rows)
+            out.flush()
+            os.fsync(out.fileno())
+            progress.write(f"{segment_id}\t{out.tell()}\n")
+            progress.flush()
+
+            frames_total += frames
+            rows_total += len(rows)
+            elapsed = time.perf_counter() - started
+            eta = elapsed / finished * (len(tasks) - finished)
+            print(f"[{finished}/{len(tasks)}] {frames_total} frames, {rows_total} rows, "
+                  f"{frames_total / elapsed:.1f} frames/s, ETA {eta:.0f}s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
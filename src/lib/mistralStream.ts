@@ -0,0 +1,39 @@
+// Reads the Server-Sent Events sent by /query_mistral_stream, calling onText
+// for every token chunk until the server sends "done". Throws on "error".
+export async function readMistralStream(
+  body: ReadableStream<Uint8Array>,
+  onText: (text: string) => void
+): Promise<void> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+
+        const payload = data ? JSON.parse(data) : {};
+        if (event === 'done') return;
+        if (event === 'error') throw new Error(payload.error || 'Stream error');
+        if (payload.text) onText(payload.text);
+      }
+    }
+  } finally {
+    reader.cancel().catch(() => undefined);
+  }
+}
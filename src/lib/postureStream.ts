@@ -0,0 +1,119 @@
+export type PostureResult = {
+  posture_score: number;
+  posture_label: string;
+  posture_issues: string[];
+};
+
+type Pending = {
+  resolve: (result: PostureResult | null) => void;
+};
+
+// Keypoint order expected by the server: nose, left/right shoulder, left/right ear
+export type StreamKeypoints = [
+  number, number, number, number, number,
+  number, number, number, number, number
+];
+
+type StreamConfig = {
+  type: 'config';
+  videoWidth: number;
+  videoHeight: number;
+  session_id?: string;
+  user_id?: string;
+};
+
+// Long-lived WebSocket session to /stream_posture: the video size is sent at connect
+// time and again only when it changes; every frame carries only its 10 keypoint coordinates.
+export class PostureStream {
+  private socket: WebSocket | null = null;
+  private ready = false;
+  private seq = 0;
+  private pending = new Map<number, Pending>();
+  private config: StreamConfig | null = null;
+
+  constructor(private url = 'ws://127.0.0.1:5000/stream_posture') {}
+
+  get isReady() {
+    return this.ready;
+  }
+
+  // With a sessionId, the server adds every scored frame to that session's aggregates;
+  // with a userId, the stored measurements also count towards that user's analytics
+  connect(
+    videoWidth: number,
+    videoHeight: number,
+    sessionId?: string | null,
+    userId?: string | null
+  ): Promise<void> {
+    this.close();
+    this.config = {
+      type: 'config',
+      videoWidth,
+      videoHeight,
+      session_id: sessionId ?? undefined,
+      user_id: userId ?? undefined,
+    };
+
+    return new Promise((resolve, reject) => {
+      const socket = new WebSocket(this.url);
+      this.socket = socket;
+
+      socket.onopen = () => {
+        socket.send(JSON.stringify(this.config));
+      };
+
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'ready') {
+          this.ready = true;
+          resolve();
+          return;
+        }
+
+        const pending = this.pending.get(message.seq);
+        if (!pending) {
+          if (message.type === 'error') console.error('Posture stream error:', message.error);
+          return;
+        }
+        this.pending.delete(message.seq);
+        pending.resolve(message.type === 'result' ? message : null);
+      };
+
+      socket.onerror = () => reject(new Error('Posture stream connection failed'));
+      socket.onclose = () => {
+        if (this.socket === socket) this.close();
+      };
+    });
+  }
+
+  // Resends the config with the same session and user ids; frames sent after it use the new size
+  resize(videoWidth: number, videoHeight: number) {
+    if (!this.config) return;
+    if (this.config.videoWidth === videoWidth && this.config.videoHeight === videoHeight) return;
+    this.config = { ...this.config, videoWidth, videoHeight };
+    if (this.socket?.readyState === WebSocket.OPEN) {
+      this.socket.send(JSON.stringify(this.config));
+    }
+  }
+
+  score(keypoints: StreamKeypoints): Promise<PostureResult | null> {
+    if (!this.socket || !this.ready) return Promise.resolve(null);
+
+    const seq = this.seq++;
+    return new Promise((resolve) => {
+      this.pending.set(seq, { resolve });
+      this.socket!.send(JSON.stringify({ type: 'frame', seq, keypoints }));
+    });
+  }
+
+  close() {
+    this.ready = false;
+    this.pending.forEach(({ resolve }) => resolve(null));
+    this.pending.clear();
+    if (this.socket) {
+      const socket = this.socket;
+      this.socket = null;
+      socket.close();
+    }
+  }
+}
@@ -0,0 +1,44 @@
+import type { PostureResult } from "@/lib/postureStream";
+
+// Packed /predict_posture payloads (src/model/wire.py): every frame is 12 little-endian
+// float32 values, videoWidth, videoHeight and then the 10 keypoint coordinates
+// (nose, left/right shoulder, left/right ear); every result is 4 bytes.
+export const WIRE_CONTENT_TYPE = 'application/octet-stream';
+const FRAME_VALUES = 12;
+const RESULT_SIZE = 4;
+const GOOD_POSTURE_FLAG = 1;
+
+// Bit order of the issues byte, same as POSTURE_ISSUES in features.py
+const POSTURE_ISSUES = ["Head Tilt Detected", "Shoulders Uneven", "Head Too Low", "Head Too Far Forward"];
+
+export type WireFrame = { videoWidth: number; videoHeight: number; keypoints: number[] };
+
+export function encodeFrames(frames: WireFrame[]): ArrayBuffer {
+  const buffer = new ArrayBuffer(frames.length * FRAME_VALUES * 4);
+  const view = new DataView(buffer);
+  frames.forEach((frame, i) => {
+    const values = [frame.videoWidth, frame.videoHeight, ...frame.keypoints];
+    values.forEach((value, j) => view.setFloat32((i * FRAME_VALUES + j) * 4, value, true));
+  });
+  return buffer;
+}
+
+// One entry per frame; null where the server found the frame invalid
+export function decodeResults(buffer: ArrayBuffer): (PostureResult | null)[] {
+  const view = new DataView(buffer);
+  const results: (PostureResult | null)[] = [];
+  for (let offset = 0; offset + RESULT_SIZE <= buffer.byteLength; offset += RESULT_SIZE) {
+    const score = view.getInt16(offset, true);
+    if (score < 0) {
+      results.push(null);
+      continue;
+    }
+    const issues = view.getUint8(offset + 2);
+    results.push({
+      posture_score: score,
+      posture_label: view.getUint8(offset + 3) & GOOD_POSTURE_FLAG ? 'Good Posture' : 'Bad Posture',
+      posture_issues: POSTURE_ISSUES.filter((_, bit) => issues & (1 << bit)),
+    });
+  }
+  return results;
+}
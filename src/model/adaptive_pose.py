@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+
+class AdaptivePose:
+    """Wraps a MediaPipe Pose object to run it less often on a seated user.
+
+    Frames are downscaled to `scale` before detection (landmarks are
+    normalized, so they still fit the full frame). A cheap motion check on a
+    small grayscale thumbnail decides whether to run detection: while the
+    scene is still, the interval between detections doubles up to
+    `max_skip` frames and the last landmarks are held in between; as soon
+    as the mean pixel difference exceeds `motion_threshold`, detection runs
+    again on every frame.
+    """
+
+    def __init__(self, pose, scale=1.0, motion_threshold=3.0, max_skip=8, thumbnail_size=(64, 48)):
+        self.pose = pose
+        self.scale = scale
+        self.motion_threshold = motion_threshold
+        self.max_skip = max_skip
+        self.thumbnail_size = thumbnail_size
+        self.skip_interval = 0
+        self.frames_since_inference = 0
+        self.last_thumbnail = None
+        self.last_results = None
+        self.inferred = False
+        self.stats = {"frames": 0, "inferences": 0}
+
+    def motion(self, image):
+        thumbnail = cv2.cvtColor(cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_RGB2GRAY).astype(np.int16)
+        if self.last_thumbnail is None:
+            return float("inf"), thumbnail
+        return float(np.mean(np.abs(thumbnail - self.last_thumbnail))), thumbnail
+
+    def process(self, image):
+        # Same call shape as mp.solutions.pose.Pose.process on an RGB frame
+        self.stats["frames"] += 1
+        motion, thumbnail = self.motion(image)
+        still = self.last_results is not None and motion <= self.motion_threshold
+
+        # Hold the last landmarks while the scene is still and the interval has not elapsed
+        if still and self.frames_since_inference < self.skip_interval:
+            self.frames_since_inference += 1
+            self.inferred = False
+            return self.last_results
+
+        # Back off further while still, drop to every frame on motion
+        self.skip_interval = min(max(1, self.skip_interval * 2), self.max_skip) if still else 0
+
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        self.last_results = self.pose.process(image)
+        self.last_thumbnail = thumbnail
+        self.frames_since_inference = 0
+        self.inferred = True
+        self.stats["inferences"] += 1
+        return self.last_results
+
+    def inference_rate(self):
+        return self.stats["inferences"] / max(1, self.stats["frames"])
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class AlertWorker:
+    """Plays posture alerts on a background thread.
+
+    trigger() only records the alert and returns, so a capture loop never
+    waits for a sound to finish. An alert raised less than `cooldown`
+    seconds after the last accepted one is dropped. Alerts raised while a
+    sound is still playing are coalesced: at most one stays pending, and it
+    carries the latest message. `clock` supplies the time the cooldown is
+    measured in (e.g. recorded frame times when replaying a session).
+    """
+
+    def __init__(self, play, cooldown=5.0, clock=time.monotonic):
+        self.play = play
+        self.cooldown = cooldown
+        self.clock = clock
+        self._pending = None
+        self._last_accepted = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"triggered": 0, "played": 0, "suppressed": 0, "coalesced": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="alert-worker", daemon=True)
+        self._thread.start()
+
+    def trigger(self, message=None):
+        """Queues an alert; returns False if it fell within the cooldown."""
+        now = self.clock()
+        with self._cond:
+            self.stats["triggered"] += 1
+            if self._last_accepted is not None and now - self._last_accepted < self.cooldown:
+                self.stats["suppressed"] += 1
+                return False
+            self._last_accepted = now
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+            self._pending = (message,)
+            self._cond.notify()
+            return True
+
+    def close(self, timeout=None):
+        # Lets a pending alert finish playing, then stops the thread
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                (message,), self._pending = self._pending, None
+            try:
+                self.play(message)
+                self.stats["played"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+                log.exception("Alert playback failed")
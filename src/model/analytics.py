@@ -0,0 +1,326 @@
+import sqlite3
+import threading
+from datetime import date
+
+import numpy as np
+
+from features import POSTURE_ISSUES
+from measurements import COLUMNS, ISSUE_COLUMNS, SQLiteMeasurementSink
+
+# Rollups keep a full score histogram, so percentiles of any range are exact for integer scores
+SCORE_BINS = 101
+PERCENTILES = (10, 25, 50, 75, 90)
+
+_USER, _SESSION, _SCORE, _CREATED = (COLUMNS.index(name) for name in
+                                      ("user_id", "session_id", "posture_score", "created_at"))
+_ISSUES = [COLUMNS.index(ISSUE_COLUMNS[name]) for name in POSTURE_ISSUES]
+
+
+def create_rollup_tables(db):
+    # frames counts posture_measurements rows (one per second of a session, see score_frames in app.py)
+    # kind is "day" / "week" (bucket = UTC date / Monday of the week) or "session" (bucket = session id)
+    db.execute("CREATE TABLE IF NOT EXISTS posture_rollups (kind TEXT, user_id TEXT, bucket TEXT, "
+               "frames INTEGER, score_sum REAL, score_sq_sum REAL, first_at REAL, last_at REAL, "
+               "histogram BLOB, issue_counts BLOB, PRIMARY KEY (kind, user_id, bucket))")
+
+
+class Rollup:
+    """Columnar aggregates of one rollup kind: one row per (user, bucket)."""
+
+    def __init__(self, users, buckets, frames, score_sum, score_sq_sum, first_at, last_at, histogram, issue_counts):
+        self.users = users
+        self.buckets = buckets
+        self.frames = frames
+        self.score_sum = score_sum
+        self.score_sq_sum = score_sq_sum
+        self.first_at = first_at
+        self.last_at = last_at
+        self.histogram = histogram
+        self.issue_counts = issue_counts
+
+    @classmethod
+    def aggregate(cls, users, buckets, scores, issues, times):
+        """Groups measurement columns by (user, bucket) with bincounts, no per-row Python."""
+        keys, inverse = np.unique(np.char.add(np.char.add(users, "\x1f"), buckets), return_inverse=True)
+        n = len(keys)
+        first = np.full(n, np.inf)
+        last = np.full(n, -np.inf)
+        np.minimum.at(first, inverse, times)
+        np.maximum.at(last, inverse, times)
+        scores = np.clip(scores, 0, SCORE_BINS - 1)
+        split = np.char.partition(keys, "\x1f")
+        return cls(
+            split[:, 0], split[:, 2],
+            np.bincount(inverse, minlength=n),
+            np.bincount(inverse, weights=scores, minlength=n),
+            np.bincount(inverse, weights=scores.astype(np.float64) ** 2, minlength=n),
+            first, last,
+            np.bincount(inverse * SCORE_BINS + scores, minlength=n * SCORE_BINS).reshape(n, SCORE_BINS),
+            np.stack([np.bincount(inverse, weights=issues[:, j], minlength=n).astype(np.int64)
+                      for j in range(len(POSTURE_ISSUES))], axis=1),
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        # posture_rollups rows as (user_id, bucket, frames, score_sum, score_sq_sum, first_at, last_at,
+        # histogram, issue_counts)
+        if not rows:
+            return cls(np.array([], dtype=str), np.array([], dtype=str), np.zeros(0, np.int64), np.zeros(0),
+                       np.zeros(0), np.zeros(0), np.zeros(0), np.zeros((0, SCORE_BINS), np.int64),
+                       np.zeros((0, len(POSTURE_ISSUES)), np.int64))
+        users, buckets, frames, score_sum, score_sq_sum, first_at, last_at, histograms, issues = zip(*rows)
+        return cls(np.array(users), np.array(buckets), np.array(frames, dtype=np.int64), np.array(score_sum),
+                   np.array(score_sq_sum), np.array(first_at), np.array(last_at),
+                   np.frombuffer(b"".join(histograms), dtype=np.int64).reshape(-1, SCORE_BINS),
+                   np.frombuffer(b"".join(issues), dtype=np.int64).reshape(-1, len(POSTURE_ISSUES)))
+
+    def total(self):
+        # One row summing every row
+        return Rollup(self.users[:1], self.buckets[:1], self.frames.sum(keepdims=True),
+                      self.score_sum.sum(keepdims=True), self.score_sq_sum.sum(keepdims=True),
+                      self.first_at.min(initial=np.inf, keepdims=True),
+                      self.last_at.max(initial=-np.inf, keepdims=True),
+                      self.histogram.sum(axis=0, keepdims=True), self.issue_counts.sum(axis=0, keepdims=True))
+
+    def select(self, index):
+        return Rollup(self.users[index], self.buckets[index], self.frames[index], self.score_sum[index],
+                      self.score_sq_sum[index], self.first_at[index], self.last_at[index], self.histogram[index],
+                      self.issue_counts[index])
+
+    def rows(self, kind):
+        return [(kind, user, bucket, int(frames), float(score_sum), float(score_sq_sum), float(first), float(last),
+                 histogram.astype(np.int64).tobytes(), issues.astype(np.int64).tobytes())
+                for user, bucket, frames, score_sum, score_sq_sum, first, last, histogram, issues
+                in zip(self.users.tolist(), self.buckets.tolist(), self.frames, self.score_sum, self.score_sq_sum,
+                       self.first_at, self.last_at, self.histogram, self.issue_counts)]
+
+
+def measurement_columns(rows):
+    """posture_measurements rows (COLUMNS order) -> user, session, score, issue and timestamp columns."""
+    users = np.array(["" if row[_USER] is None else str(row[_USER]) for row in rows])
+    sessions = np.array([str(row[_SESSION]) for row in rows])
+    scores = np.array([row[_SCORE] for row in rows], dtype=np.int64)
+    issues = np.array([[row[i] for i in _ISSUES] for row in rows], dtype=np.int64).reshape(len(rows), -1)
+    # created_at is an ISO timestamp in UTC; second precision is plenty for rollups
+    stamps = np.array([row[_CREATED][:19] for row in rows], dtype="datetime64[s]")
+    return users, sessions, scores, issues, stamps
+
+
+def apply_rollups(db, rows):
+    """Adds measurement rows to the day, week and session rollups.
+
+    Runs in the caller's transaction, so the rollups commit together with
+    the raw rows; only the (user, bucket) rows touched by this batch are
+    read back and rewritten.
+    """
+    if not rows:
+        return
+    users, sessions, scores, issues, stamps = measurement_columns(rows)
+    days = stamps.astype("datetime64[D]")
+    # 1970-01-01 was a Thursday, so (days + 3) % 7 is the weekday counted from Monday
+    weeks = days - (days.astype(np.int64) + 3) % 7
+    times = stamps.astype(np.int64).astype(np.float64)
+    for kind, buckets in (("day", days.astype(str)), ("week", weeks.astype(str)), ("session", sessions)):
+        batch = Rollup.aggregate(users, buckets, scores, issues, times)
+        merged = _merge(batch, _read(db, kind, batch.users, batch.buckets))
+        db.executemany("INSERT OR REPLACE INTO posture_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       merged.rows(kind))
+
+
+def rebuild_rollups(db, chunksize=100_000):
+    """Recomputes every rollup from posture_measurements, chunk by chunk, in one transaction."""
+    columns = ", ".join(COLUMNS)
+    with db:
+        db.execute("DELETE FROM posture_rollups")
+        cursor = db.execute(f"SELECT {columns} FROM posture_measurements ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            apply_rollups(db, rows)
+
+
+def _read(db, kind, users, buckets):
+    wanted = list(zip(users.tolist(), buckets.tolist()))
+    rows = []
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(wanted), 400):
+        chunk = wanted[start:start + 400]
+        where = " OR ".join(["(user_id = ? AND bucket = ?)"] * len(chunk))
+        rows += db.execute("SELECT user_id, bucket, frames, score_sum, score_sq_sum, first_at, last_at, histogram, "
+                           f"issue_counts FROM posture_rollups WHERE kind = ? AND ({where})",
+                           [kind] + [value for pair in chunk for value in pair]).fetchall()
+    return Rollup.from_rows(rows)
+
+
+def _merge(batch, existing):
+    if not len(existing.frames):
+        return batch
+    index = {key: i for i, key in enumerate(zip(existing.users.tolist(), existing.buckets.tolist()))}
+    for i, key in enumerate(zip(batch.users.tolist(), batch.buckets.tolist())):
+        j = index.get(key)
+        if j is None:
+            continue
+        batch.frames[i] += existing.frames[j]
+        batch.score_sum[i] += existing.score_sum[j]
+        batch.score_sq_sum[i] += existing.score_sq_sum[j]
+        batch.first_at[i] = min(batch.first_at[i], existing.first_at[j])
+        batch.last_at[i] = max(batch.last_at[i], existing.last_at[j])
+        batch.histogram[i] += existing.histogram[j]
+        batch.issue_counts[i] += existing.issue_counts[j]
+    return batch
+
+
+class RollupMeasurementSink(SQLiteMeasurementSink):
+    """SQLiteMeasurementSink that keeps posture_rollups up to date in the same transaction."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        with self.lock, self.db:
+            create_rollup_tables(self.db)
+            empty = self.db.execute("SELECT NOT EXISTS (SELECT 1 FROM posture_rollups)").fetchone()[0]
+            has_rows = self.db.execute("SELECT EXISTS (SELECT 1 FROM posture_measurements)").fetchone()[0]
+        if empty and has_rows:
+            # A store written before rollups existed
+            with self.lock:
+                rebuild_rollups(self.db)
+
+    def write_many(self, rows):
+        with self.lock, self.db:
+            self.db.executemany(self.insert_sql, rows)
+            apply_rollups(self.db, rows)
+
+
+def describe(rollup):
+    """Score stats, nearest-rank percentiles and issue rates for every row of a rollup."""
+    frames = rollup.frames
+    safe = np.maximum(frames, 1)
+    means = rollup.score_sum / safe
+    stds = np.sqrt(np.maximum(rollup.score_sq_sum / safe - means ** 2, 0.0))
+    present = rollup.histogram > 0
+    minimums = present.argmax(axis=1)
+    maximums = SCORE_BINS - 1 - present[:, ::-1].argmax(axis=1)
+    cumulative = np.cumsum(rollup.histogram, axis=1)
+    ranks = {p: (cumulative >= np.ceil(p / 100 * frames)[:, None]).argmax(axis=1) for p in PERCENTILES}
+    rates = rollup.issue_counts / safe[:, None]
+
+    described = []
+    for i, count in enumerate(frames.tolist()):
+        if not count:
+            described.append({"measurements": 0, "average_score": None, "score_std": None, "min_score": None,
+                              "max_score": None, **{f"p{p}": None for p in PERCENTILES},
+                              "issue_rates": dict.fromkeys(POSTURE_ISSUES, 0.0)})
+            continue
+        described.append({
+            "measurements": count,
+            "average_score": float(means[i]),
+            "score_std": float(stds[i]),
+            "min_score": int(minimums[i]),
+            "max_score": int(maximums[i]),
+            **{f"p{p}": int(ranks[p][i]) for p in PERCENTILES},
+            "issue_rates": dict(zip(POSTURE_ISSUES, rates[i].tolist())),
+        })
+    return described
+
+
+def trend(x, y, weights):
+    # Weighted least-squares slope of y per unit of x, None with fewer than two points
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    return float(np.polyfit(x, y, 1, w=np.sqrt(weights))[0])
+
+
+class PostureAnalytics:
+    """Range queries over posture_rollups for the analytics endpoint.
+
+    Every query reads at most one row per day, week or session in the
+    range, never the raw measurements, so its cost doesn't grow with the
+    number of stored measurements. Days and weeks are UTC.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.db:
+            create_rollup_tables(self.db)
+        self.lock = threading.Lock()
+
+    def rollup(self, user_id, kind, start=None, end=None):
+        """Rollup rows of one kind for a user; start/end are ISO dates, inclusive."""
+        query = ("SELECT user_id, bucket, frames, score_sum, score_sq_sum, first_at, last_at, histogram, "
+                 "issue_counts FROM posture_rollups WHERE kind = ? AND user_id = ?")
+        params = [kind, user_id]
+        if kind == "session":
+            # Sessions are selected by when they started
+            if start:
+                query += " AND first_at >= ?"
+                params.append(_epoch(start))
+            if end:
+                query += " AND first_at < ?"
+                params.append(_epoch(end) + 86400)
+            query += " ORDER BY first_at"
+        else:
+            if start:
+                query += " AND bucket >= ?"
+                params.append(_week_start(start) if kind == "week" else start)
+            if end:
+                query += " AND bucket <= ?"
+                params.append(end)
+            query += " ORDER BY bucket"
+        with self.lock:
+            return Rollup.from_rows(self.db.execute(query, params).fetchall())
+
+    def report(self, user_id, granularity="day", start=None, end=None, sessions=20):
+        """Overall stats, per-bucket series with trends, and the latest sessions compared."""
+        if granularity not in ("day", "week"):
+            raise ValueError("granularity must be 'day' or 'week'")
+        series = self.rollup(user_id, granularity, start, end)
+        session_rollup = self.rollup(user_id, "session", start, end)
+
+        overall = describe(series.total())[0]
+        buckets = [dict(stats, start=start) for start, stats in zip(series.buckets.tolist(), describe(series))]
+
+        # Trends are per week whatever the granularity, weighted by frames per bucket
+        x = series.buckets.astype("datetime64[D]").astype(np.int64) / 7 if len(series.buckets) else np.zeros(0)
+        means = series.score_sum / np.maximum(series.frames, 1)
+        rates = series.issue_counts / np.maximum(series.frames, 1)[:, None]
+        trends = {"average_score_per_week": trend(x, means, series.frames),
+                  "issue_rates_per_week": {name: trend(x, rates[:, j], series.frames)
+                                           for j, name in enumerate(POSTURE_ISSUES)}}
+
+        # The latest sessions, newest first, each compared with the one before it and the range
+        latest = session_rollup.select(slice(max(len(session_rollup.frames) - sessions - 1, 0), None))
+        session_means = latest.score_sum / np.maximum(latest.frames, 1)
+        compared = []
+        for i, stats in enumerate(describe(latest)):
+            stats.update(session_id=str(latest.buckets[i]), started_at=float(latest.first_at[i]),
+                         last_at=float(latest.last_at[i]),
+                         duration_seconds=float(latest.last_at[i] - latest.first_at[i]),
+                         vs_previous=float(session_means[i] - session_means[i - 1]) if i else None,
+                         vs_range_average=(float(session_means[i] - overall["average_score"])
+                                           if overall["average_score"] is not None else None))
+            compared.append(stats)
+        if len(compared) > sessions:
+            compared = compared[1:]
+
+        return {
+            "user_id": user_id,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "overall": overall,
+            "trends": trends,
+            "buckets": buckets,
+            "sessions": compared[::-1],
+        }
+
+    def close(self):
+        self.db.close()
+
+
+def _epoch(day):
+    return float(np.datetime64(date.fromisoformat(day), "s").astype(np.int64))
+
+
+def _week_start(day):
+    days = np.datetime64(date.fromisoformat(day), "D")
+    return str(days - (days.astype(np.int64) + 3) % 7)
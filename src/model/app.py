@@ -1,171 +1,568 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import tensorflow as tf
+from flask_sock import Sock
 import numpy as np
-import pandas as pd
-import boto3
+import atexit
 import json
+import os
+import queue
+import threading
+import time
+from datetime import date
+from functools import wraps
+from analytics import PostureAnalytics, RollupMeasurementSink
+from batcher import MicroBatcher
+from bedrock_cache import BedrockResponseCache
+from fake_bedrock import FakeBedrockClient
+from features import detect_issues, extract_features, issue_names, to_keypoint_array
+from inference import preload_posture_model
+from measurements import WriteBehindBuffer, measurement_row
+from metrics import MetricsRegistry
+from prediction_cache import PredictionCache
+from sessions import SessionStore
+import wire
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")  # Change to your AWS region
+sock = Sock(app)
 
-# Define a route to query Llama 3 through AWS Bedrock
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")  # Change to your AWS region
+# Per-stage latency histograms and request counters, served at /metrics
+metrics = MetricsRegistry()
+STAGE_METRIC = "api_stage_seconds"
+
+def stage(name):
+    return metrics.time(STAGE_METRIC, "Latency of each request-handling stage", stage=name)
+
+def endpoint_metrics(endpoint):
+    # (requests, errors, latency) series shared by the HTTP views and the WebSocket stream
+    return (metrics.counter("api_requests_total", "Requests handled", endpoint=endpoint),
+            metrics.counter("api_request_errors_total", "Requests answered with an error", endpoint=endpoint),
+            metrics.histogram("api_request_seconds", "Total request latency", endpoint=endpoint))
+
+def instrumented(endpoint):
+    # Counts requests and errors and times the whole view for one endpoint
+    requests_total, errors_total, latency = endpoint_metrics(endpoint)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            requests_total.inc()
+            try:
+                rv = view(*args, **kwargs)
+            except Exception:
+                errors_total.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+            status = rv[1] if isinstance(rv, tuple) else getattr(rv, "status_code", 200)
+            if status >= 400:
+                errors_total.inc()
+            return rv
+        return wrapper
+    return decorator
+
+# BEDROCK_FAKE=1 swaps in an offline client for local development. The real
+# client (and boto3 itself) is only created on the first Bedrock request.
+bedrock_client = FakeBedrockClient() if os.environ.get("BEDROCK_FAKE") == "1" else None
+bedrock_client_lock = threading.Lock()
+
+def get_bedrock_client():
+    global bedrock_client
+    if bedrock_client is None:
+        with bedrock_client_lock:
+            if bedrock_client is None:
+                import boto3
+                bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")  # Change to your AWS region
+    return bedrock_client
+
+MISTRAL_MODEL_ID = "mistral.mistral-large-2402-v1:0"
+
+# Cache of Mistral responses keyed on the prompt and generation parameters
+mistral_cache = BedrockResponseCache(
+    maxsize=int(os.environ.get("MISTRAL_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("MISTRAL_CACHE_TTL", 3600)),
+    disk_path=os.environ.get("MISTRAL_CACHE_PATH")
+)
+
+def mistral_payload(prompt_text):
+    return {
+        "prompt": f"<s>[INST] {prompt_text} [/INST]",
+        "max_tokens": 200,
+        "temperature": 0.5,
+        "top_p": 0.9,
+        "top_k": 50
+    }
 
 # Define a route to query Mistral through AWS Bedrock
 @app.route('/query_mistral', methods=['POST'])
+@instrumented("query_mistral")
 def query_mistral():
     try:
-        body = request.json
+        with stage("parse_json"):
+            body = request.json
         prompt_text = body.get("prompt", "Hello, Mistral!")
-        
-        payload = {
-            "prompt": f"<s>[INST] {prompt_text} [/INST]",
-            "max_tokens": 200,
-            "temperature": 0.5,
-            "top_p": 0.9,
-            "top_k": 50
-        }
-        
-        response = bedrock_client.invoke_model(
-            modelId="mistral.mistral-large-2402-v1:0",
+        payload = mistral_payload(prompt_text)
+
+        with stage("bedrock"):
+            response_body = mistral_cache.invoke(get_bedrock_client(), MISTRAL_MODEL_ID, payload)
+        return jsonify(response_body)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Streaming generations in flight are bounded; each has a wall-clock budget
+MISTRAL_STREAM_SLOTS = threading.BoundedSemaphore(int(os.environ.get("MISTRAL_STREAM_CONCURRENCY", 4)))
+MISTRAL_STREAM_QUEUE_TIMEOUT = float(os.environ.get("MISTRAL_STREAM_QUEUE_TIMEOUT", 5))
+MISTRAL_STREAM_TIMEOUT = float(os.environ.get("MISTRAL_STREAM_TIMEOUT", 60))
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def read_stream_events(stream, events):
+    # Runs on its own thread so the SSE generator can wait on the queue with a deadline;
+    # None marks the end of the stream, an exception a failed read
+    try:
+        for event in stream:
+            events.put(event)
+        events.put(None)
+    except Exception as e:
+        events.put(e)
+
+def replay_completion(response_body):
+    # A cached completion goes out as the same events a live stream would send
+    for output in response_body.get("outputs", []):
+        if output.get("text"):
+            yield sse_event({"text": output["text"]})
+    yield sse_event({}, "done")
+
+# Define a route that streams Mistral tokens as Server-Sent Events
+@app.route('/query_mistral_stream', methods=['POST'])
+@instrumented("query_mistral_stream")
+def query_mistral_stream():
+    body = request.json or {}
+    payload = mistral_payload(body.get("prompt", "Hello, Mistral!"))
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    # Shares mistral_cache with /query_mistral: hits (and identical generations already
+    # in flight) are replayed; a miss makes this request the one that streams and caches it
+    try:
+        cached = mistral_cache.lookup(MISTRAL_MODEL_ID, payload)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if cached is not None:
+        return Response(replay_completion(cached), mimetype="text/event-stream", headers=sse_headers)
+
+    # Releases the requests waiting on this generation exactly once, with the text or the error
+    finished = threading.Event()
+
+    def finish(completion=None, error=None):
+        if finished.is_set():
+            return
+        finished.set()
+        if completion is not None:
+            mistral_cache.complete(MISTRAL_MODEL_ID, payload, completion)
+        else:
+            mistral_cache.fail(MISTRAL_MODEL_ID, payload, error)
+
+    if not MISTRAL_STREAM_SLOTS.acquire(timeout=MISTRAL_STREAM_QUEUE_TIMEOUT):
+        finish(error=RuntimeError("Too many concurrent generations"))
+        return jsonify({"error": "Too many concurrent generations"}), 503
+
+    try:
+        response = get_bedrock_client().invoke_model_with_response_stream(
+            modelId=MISTRAL_MODEL_ID,
             contentType="application/json",
             accept="application/json",
             body=json.dumps(payload)
         )
-        
-        response_body = json.loads(response["body"].read().decode("utf-8"))
-        return jsonify(response_body)
     except Exception as e:
+        MISTRAL_STREAM_SLOTS.release()
+        finish(error=e)
         return jsonify({"error": str(e)}), 500
 
-# Load the trained model
-model = tf.keras.models.load_model("src/model/posture_model.h5")
+    stream = response["body"]
+    events = queue.Queue()
+    threading.Thread(target=read_stream_events, args=(stream, events), daemon=True).start()
 
-# Normalize coordinate values and helper functions
-def safe_float(val):
-    try:
-        return float(val)
-    except ValueError:
-        return None
+    def generate():
+        # The deadline holds even if the upstream stalls without sending anything
+        deadline = time.monotonic() + MISTRAL_STREAM_TIMEOUT
+        texts, stop_reason = [], None
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    finish(error=TimeoutError("Generation timed out"))
+                    yield sse_event({"error": "Generation timed out"}, "error")
+                    return
+                if event is None:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                if "chunk" not in event:
+                    error = str(next(iter(event.values()), "Stream error"))
+                    finish(error=RuntimeError(error))
+                    yield sse_event({"error": error}, "error")
+                    return
+                chunk = json.loads(event["chunk"]["bytes"])
+                for output in chunk.get("outputs", []):
+                    stop_reason = output.get("stop_reason") or stop_reason
+                    if output.get("text"):
+                        texts.append(output["text"])
+                        yield sse_event({"text": output["text"]})
+            # Cached in the shape invoke_model returns, so either endpoint can serve it
+            finish({"outputs": [{"text": "".join(texts), "stop_reason": stop_reason}]})
+            yield sse_event({}, "done")
+        except Exception as e:
+            finish(error=e)
+            yield sse_event({"error": str(e)}, "error")
 
-def norm_x(col, vw):
-    v = safe_float(col)
-    return v / vw if v is not None else None
-
-def norm_y(col, vh):
-    v = safe_float(col)
-    return v / vh if v is not None else None
-
-def distance2D(x1, y1, x2, y2):
-    return np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
-def angleABC(Ax, Ay, Bx, By, Cx, Cy):
-    ABx, ABy = Ax - Bx, Ay - By
-    CBx, CBy = Cx - Bx, Cy - By
-    dot = ABx * CBx + ABy * CBy
-    magAB, magCB = np.sqrt(ABx**2 + ABy**2), np.sqrt(CBx**2 + CBy**2)
-    if magAB == 0 or magCB == 0:
-        return 180.0
-    cosTheta = np.clip(dot / (magAB * magCB), -1, 1)
-    return np.degrees(np.arccos(cosTheta))
-
-# Feature extraction function
-def extract_features(data):
-    vw, vh = safe_float(data["videoWidth"]), safe_float(data["videoHeight"])
-    if vw is None or vh is None:
-        return None
-    
-    # Normalize coordinates
-    noseX, noseY = norm_x(data["nose_x"], vw), norm_y(data["nose_y"], vh)
-    lshoX, lshoY = norm_x(data["left_shoulder_x"], vw), norm_y(data["left_shoulder_y"], vh)
-    rshoX, rshoY = norm_x(data["right_shoulder_x"], vw), norm_y(data["right_shoulder_y"], vh)
-    learX, learY = norm_x(data["left_ear_x"], vw), norm_y(data["left_ear_y"], vh)
-    rearX, rearY = norm_x(data["right_ear_x"], vw), norm_y(data["right_ear_y"], vh)
-
-    if None in [noseX, noseY, lshoX, lshoY, rshoX, rshoY, learX, learY, rearX, rearY]:
-        return None
+    # Runs when the response finishes or the client disconnects: cancel the
+    # upstream stream, free the worker slot and release anyone waiting on it
+    def cleanup():
+        stream.close()
+        MISTRAL_STREAM_SLOTS.release()
+        finish(error=RuntimeError("Generation was cancelled"))
+
+    sse = Response(generate(), mimetype="text/event-stream", headers=sse_headers)
+    sse.call_on_close(cleanup)
+    return sse
+
+# Hit/miss counters of the Mistral response cache
+@app.route('/query_mistral/stats', methods=['GET'])
+def query_mistral_stats():
+    return jsonify(mistral_cache.snapshot())
+
+# Load the trained model: "keras", "numpy" (h5 weights without TensorFlow), or one of the
+# convert_model.py exports "npz", "onnx", "tflite-fp16", "tflite-int8"
+MODEL_BACKEND = os.environ.get("POSTURE_MODEL_BACKEND", "keras")
+MODEL_PATH = os.environ.get("POSTURE_MODEL_PATH")  # defaults to the backend's file in src/model
+# Warmed here so the first request doesn't pay for graph tracing; under serve.py the
+# parent process has already loaded it and every worker shares that copy
+model = preload_posture_model(MODEL_PATH, MODEL_BACKEND)
 
-    mshoX, mshoY = (lshoX + rshoX) / 2, (lshoY + rshoY) / 2
-    dist_nose_shoulders = distance2D(noseX, noseY, mshoX, mshoY)
-    shoulder_width = distance2D(lshoX, lshoY, rshoX, rshoY)
-    ratio_noseShoulders = dist_nose_shoulders / shoulder_width if shoulder_width > 0 else 0
-    neck_tilt_angle = angleABC(learX, learY, noseX, noseY, rearX, rearY)
-    dist_leftEar_nose = distance2D(learX, learY, noseX, noseY)
-    dist_rightEar_nose = distance2D(rearX, rearY, noseX, noseY)
-    angle_leftShoulder = angleABC(learX, learY, lshoX, lshoY, noseX, noseY)
-    angle_rightShoulder = angleABC(rearX, rearY, rshoX, rshoY, noseX, noseY)
-
-    return [
-        dist_nose_shoulders,
-        ratio_noseShoulders,
-        neck_tilt_angle,
-        dist_leftEar_nose,
-        dist_rightEar_nose,
-        angle_leftShoulder,
-        angle_rightShoulder
-    ]
+# Running per-session aggregates; SESSION_STORE_PATH persists them to a SQLite file, which
+# pre-forked workers (serve.py) share so they also sample measurements together
+sessions = SessionStore(
+    bucket_seconds=int(os.environ.get("SESSION_BUCKET_SECONDS", 60)),
+    disk_path=os.environ.get("SESSION_STORE_PATH")
+)
+atexit.register(sessions.flush)
+
+# MEASUREMENT_STORE_PATH turns on server-side persistence of session measurements
+# (one scored frame per second per session), written in bulk from a background thread
+# together with the day/week/session rollups that /users/<user_id>/analytics reads.
+# This is a local analytics copy: Analysis.tsx still stores every measurement in Supabase.
+measurement_buffer = None
+analytics = None
+if os.environ.get("MEASUREMENT_STORE_PATH"):
+    measurement_buffer = WriteBehindBuffer(
+        RollupMeasurementSink(os.environ["MEASUREMENT_STORE_PATH"]),
+        max_batch=int(os.environ.get("MEASUREMENT_BATCH_SIZE", 500)),
+        flush_interval=float(os.environ.get("MEASUREMENT_FLUSH_INTERVAL", 1.0)),
+        max_pending=int(os.environ.get("MEASUREMENT_MAX_PENDING", 50000))
+    )
+    atexit.register(measurement_buffer.close)
+    analytics = PostureAnalytics(os.environ["MEASUREMENT_STORE_PATH"])
+
+def score_keypoints(kp):
+    """Scores an (N, 12) keypoint array with one model call.
+
+    Returns a list with one result dict per frame, or None for frames whose
+    keypoints were missing or invalid.
+    """
+    with stage("features"):
+        features, valid = extract_features(kp)
+    with stage("issues"):
+        issue_flags = detect_issues(kp[:, 2:])
+
+    scores = np.zeros(len(kp), dtype=int)
+    if valid.any():
+        with stage("model"):
+            preds = model.predict(features[valid], verbose=0)[:, 0]
+        scores[valid] = (preds * 100).astype(int)
+
+    results = []
+    for i in range(len(kp)):
+        if not valid[i]:
+            results.append(None)
+            continue
+        posture_score = int(scores[i])
+        results.append({
+            "posture_score": posture_score,
+            "posture_label": "Good Posture" if posture_score > 85 else "Bad Posture",
+            "posture_issues": issue_names(issue_flags[i])
+        })
+    return results
+
+# Concurrent requests are scored together: up to PREDICT_BATCH_SIZE rows, waiting at most
+# PREDICT_BATCH_WAIT_MS for the batch to fill (0 batches only what queued up meanwhile).
+# PREDICT_BATCHING=0 scores every request on its own thread.
+predict_batcher = None
+if os.environ.get("PREDICT_BATCHING", "1") == "1":
+    predict_batcher = MicroBatcher(
+        score_keypoints,
+        max_batch=int(os.environ.get("PREDICT_BATCH_SIZE", 64)),
+        max_wait=float(os.environ.get("PREDICT_BATCH_WAIT_MS", 0)) / 1000,
+        metrics=metrics
+    )
+
+# Frames whose normalized keypoints round to a bucket already scored in the same session
+# reuse that result. PREDICTION_CACHE_STEP is the bucket size as a fraction of the frame;
+# it trades accuracy for hits (bench_prediction_cache.py), so it's off unless set, and
+# 0.01 is a reasonable value for seated users. Entries live PREDICTION_CACHE_TTL seconds.
+prediction_cache = None
+if float(os.environ.get("PREDICTION_CACHE_STEP", 0)) > 0:
+    prediction_cache = PredictionCache(
+        step=float(os.environ["PREDICTION_CACHE_STEP"]),
+        maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+        ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 30))
+    )
+
+def score_frames(kp, session_id=None, user_id=None):
+    """score_keypoints through the prediction cache and the micro-batcher,
+    then session bookkeeping.
+
+    With a session_id, the results are also added to that session's
+    aggregates, and the frames that count as stored measurements (one per
+    second per session, as Analysis.tsx stored them) are queued for
+    persistence.
+    """
+    score = predict_batcher.submit if predict_batcher is not None else score_keypoints
+    if prediction_cache is not None:
+        with stage("prediction_cache"):
+            results = prediction_cache.score(kp, session_id, score)
+    else:
+        results = score(kp)
+
+    if session_id is not None:
+        now = time.time()
+        with stage("session"):
+            measured = sessions.record(str(session_id), results, now)
+        if measurement_buffer is not None:
+            with stage("enqueue_measurements"):
+                measurement_buffer.put_many([measurement_row(str(session_id), user_id, kp[i], result, now)
+                                             for i, result in enumerate(results) if measured[i]])
+    return results
+
+def predict_binary():
+    # Packed float32 frames in, packed result records out (see wire.py);
+    # session_id and user_id come from the query string
+    with stage("decode_binary"):
+        try:
+            kp = wire.decode_frames(request.get_data(cache=False))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    results = score_frames(kp, request.args.get("session_id"), request.args.get("user_id"))
+    with stage("encode_binary"):
+        body = wire.encode_results(results)
+    return Response(body, mimetype=wire.CONTENT_TYPE)
+
+# Define a POST route for batched posture prediction
+@app.route('/predict_posture_batch', methods=['POST'])
+@instrumented("predict_posture_batch")
+def predict_posture_batch():
+    if request.mimetype == wire.CONTENT_TYPE:
+        return predict_binary()
+
+    # Accept either {"frames": [...], "session_id": ...} or a bare list of frames
+    with stage("parse_json"):
+        data = request.json
+    frames = data.get("frames") if isinstance(data, dict) else data
+    session_id = data.get("session_id") if isinstance(data, dict) else None
+    user_id = data.get("user_id") if isinstance(data, dict) else None
+    if not isinstance(frames, list) or not all(isinstance(f, dict) for f in frames):
+        return jsonify({"error": "Invalid data"}), 400
+    if not frames:
+        return jsonify({"results": []})
+
+    with stage("to_array"):
+        kp = to_keypoint_array(frames)
+    results = score_frames(kp, session_id, user_id)
+    return jsonify({"results": [r if r is not None else {"error": "Invalid data"} for r in results]})
 
 # Define a POST route for posture prediction
 @app.route('/predict_posture', methods=['POST'])
+@instrumented("predict_posture")
 def predict_posture():
+    if request.mimetype == wire.CONTENT_TYPE:
+        return predict_binary()
+
     # Get JSON data from request
-    data = request.json
-    
-    # Extract features from the data
-    features = extract_features(data)
-    if features is None:
+    with stage("parse_json"):
+        data = request.json
+    if not isinstance(data, dict):
         return jsonify({"error": "Invalid data"}), 400
 
-    # Get original coordinates for issue detection
-    vw, vh = safe_float(data["videoWidth"]), safe_float(data["videoHeight"])
-    lsho_x = safe_float(data["left_shoulder_x"])
-    rsho_x = safe_float(data["right_shoulder_x"])
-    lsho_y = safe_float(data["left_shoulder_y"])
-    rsho_y = safe_float(data["right_shoulder_y"])
-    nose_x = safe_float(data["nose_x"])
-    nose_y = safe_float(data["nose_y"])
-    lear_y = safe_float(data["left_ear_y"])
-    rear_y = safe_float(data["right_ear_y"])
-
-    # Calculate measurements for issue detection
-    msho_x, msho_y = (lsho_x + rsho_x) / 2, (lsho_y + rsho_y) / 2
-    shoulder_width = distance2D(lsho_x, lsho_y, rsho_x, rsho_y)
-    head_height = distance2D(nose_x, nose_y, msho_x, msho_y)
-    ear_height_diff = abs(lear_y - rear_y)
-    shoulder_height_diff = abs(lsho_y - rsho_y)
-
-    # Define thresholds
-    head_too_low_thresh = shoulder_width * 0.6
-    head_too_far_thresh = shoulder_width * 1.2
-    ear_level_thresh = 15
-    shoulder_level_thresh = 20
-
-    # Detect posture issues
-    issues = []
-    if ear_height_diff > ear_level_thresh:
-        issues.append("Head Tilt Detected")
-    if shoulder_height_diff > shoulder_level_thresh:
-        issues.append("Shoulders Uneven")
-    if head_height < head_too_low_thresh:
-        issues.append("Head Too Low")
-    if head_height > head_too_far_thresh:
-        issues.append("Head Too Far Forward")
-
-    # Prepare input for model and predict
-    features = np.array([features])
-    pred = model.predict(features)[0][0]
-    posture_score = int(pred * 100)
-
-    # Return result with issues
-    result = {
-        "posture_score": posture_score,
-        "posture_label": "Good Posture" if posture_score > 85 else "Bad Posture",
-        "posture_issues": issues
-    }
+    # Features, model score and issues for the single frame
+    with stage("to_array"):
+        kp = to_keypoint_array(data)
+    result = score_frames(kp, data.get("session_id"), data.get("user_id"))[0]
+    if result is None:
+        return jsonify({"error": "Invalid data"}), 400
 
     return jsonify(result)
 
+# Aggregates of one session, without reading its stored measurements
+@app.route('/sessions/<session_id>/summary', methods=['GET'])
+@instrumented("session_summary")
+def session_summary(session_id):
+    summary = sessions.summary(session_id)
+    if summary is None:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify(summary)
+
+# Historical analytics from the rollups: overall and per-day/week score stats with
+# percentiles, weekly trends, and the latest sessions compared with each other.
+# Query args: granularity=day|week, start/end as inclusive YYYY-MM-DD (UTC), sessions=N
+@app.route('/users/<user_id>/analytics', methods=['GET'])
+@instrumented("user_analytics")
+def user_analytics(user_id):
+    if analytics is None:
+        return jsonify({"error": "Analytics need MEASUREMENT_STORE_PATH"}), 503
+    start, end = request.args.get("start"), request.args.get("end")
+    try:
+        for day in (start, end):
+            if day is not None:
+                date.fromisoformat(day)
+        limit = int(request.args.get("sessions", 20))
+        with stage("analytics"):
+            report = analytics.report(user_id, request.args.get("granularity", "day"), start, end, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(report)
+
+# Streaming session: per-connection state sent once instead of with every frame
+STREAM_MAX_BATCH = 64
+
+def stream_keypoints(values):
+    # The 10 pixel coordinates of a frame message, or None unless they are exactly 10 numbers
+    if not isinstance(values, list) or len(values) != 10:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return values
+
+class StreamSession:
+    def __init__(self):
+        self.video_size = None
+        self.session_id = None
+        self.user_id = None
+        self.requests_total, self.errors_total, self.latency = endpoint_metrics("stream_posture")
+
+    def handle(self, messages):
+        """Answers a list of decoded client messages, scoring all frames together."""
+        # Each message counts as one request; every message in a batch waits for the whole batch
+        start = time.perf_counter()
+        self.requests_total.inc(len(messages))
+        try:
+            replies = self.reply(messages)
+        except Exception:
+            self.errors_total.inc(len(messages))
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            for _ in messages:
+                self.latency.observe(elapsed)
+        self.errors_total.inc(sum(reply["type"] == "error" for reply in replies))
+        return replies
+
+    def reply(self, messages):
+        replies = [None] * len(messages)
+        frame_indices, keypoints = [], []
+        for i, message in enumerate(messages):
+            kind = message.get("type") if isinstance(message, dict) else None
+            seq = message.get("seq") if isinstance(message, dict) else None
+            if kind == "config":
+                replies[i] = self.configure(message)
+            elif kind != "frame":
+                replies[i] = {"type": "error", "seq": seq, "error": "Unknown message type"}
+            elif self.video_size is None:
+                replies[i] = {"type": "error", "seq": seq, "error": "Session not configured"}
+            elif stream_keypoints(message.get("keypoints")) is None:
+                replies[i] = {"type": "error", "seq": seq, "error": "Invalid data: keypoints must be 10 numbers"}
+            else:
+                frame_indices.append(i)
+                keypoints.append(message["keypoints"])
+
+        if frame_indices:
+            for i, result in zip(frame_indices, self.score(keypoints)):
+                seq = messages[i].get("seq")
+                if result is None:
+                    replies[i] = {"type": "error", "seq": seq, "error": "Invalid data"}
+                else:
+                    replies[i] = {"type": "result", "seq": seq, **result}
+        return replies
+
+    def configure(self, message):
+        try:
+            vw, vh = float(message["videoWidth"]), float(message["videoHeight"])
+        except (KeyError, TypeError, ValueError):
+            return {"type": "error", "error": "videoWidth and videoHeight are required"}
+        if not (vw > 0 and vh > 0):
+            return {"type": "error", "error": "videoWidth and videoHeight must be positive"}
+        self.video_size = (vw, vh)
+        self.session_id = message.get("session_id")
+        self.user_id = message.get("user_id")
+        return {"type": "ready"}
+
+    def score(self, keypoints):
+        # Frames carry only the 10 pixel coordinates, in features.KEYPOINT_KEYS order
+        kp = np.empty((len(keypoints), 12))
+        kp[:, 0], kp[:, 1] = self.video_size
+        kp[:, 2:] = keypoints
+        return score_frames(kp, self.session_id, self.user_id)
+
+# Define a WebSocket route for streaming posture prediction
+@sock.route('/stream_posture')
+def stream_posture(ws):
+    session = StreamSession()
+    while True:
+        raw = [ws.receive()]
+        # Drain frames that are already queued so they share one model call
+        while len(raw) < STREAM_MAX_BATCH:
+            message = ws.receive(timeout=0)
+            if message is None:
+                break
+            raw.append(message)
+
+        messages = []
+        for text in raw:
+            try:
+                messages.append(json.loads(text))
+            except (TypeError, ValueError):
+                messages.append(None)
+        for reply in session.handle(messages):
+            ws.send(json.dumps(reply))
+
+# Stats that describe current state rather than a running total
+STATE_STATS = ("size", "pending")
+
+def export_stats(name, help_text, snapshot):
+    # Running totals become <name>_total counters so rate() and increase() work on them
+    for stat, value in snapshot.items():
+        if stat in STATE_STATS:
+            metrics.gauge(name, f"{help_text} state", stat=stat).set(value)
+        else:
+            metrics.counter(f"{name}_total", f"{help_text} totals", stat=stat).set_total(value)
+
+# Prometheus text-format metrics
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    export_stats("mistral_cache", "Mistral response cache", mistral_cache.snapshot())
+    if prediction_cache is not None:
+        export_stats("prediction_cache", "Quantized keypoint prediction cache", prediction_cache.snapshot())
+    if measurement_buffer is not None:
+        export_stats("measurement_buffer", "Write-behind measurement buffer", measurement_buffer.snapshot())
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Readiness probe: the model is loaded and warm once this module has been imported
+@app.route('/ready', methods=['GET'])
+def ready():
+    return jsonify({"status": "ready", "backend": MODEL_BACKEND, "pid": os.getpid()})
+
+# Development server; see serve.py for the pre-fork production entry point
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(debug=True, port=int(os.environ.get("PORT", 5000)))
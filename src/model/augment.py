@@ -0,0 +1,97 @@
+import numpy as np
+
+from features import FEATURE_NAMES, KEYPOINT_KEYS, compute_features, normalize_keypoints
+
+# KEYPOINT_KEYS order with the left/right shoulders and ears swapped, for mirrored frames
+MIRROR_ORDER = [KEYPOINT_KEYS.index(key.replace("left_", "@").replace("right_", "left_").replace("@", "right_"))
+                for key in KEYPOINT_KEYS]
+
+
+class LandmarkAugmenter:
+    """Random camera-like perturbations of (N, 12) pixel keypoint rows.
+
+    Each row is independently mirrored (x flipped and left/right keypoints
+    swapped) with probability mirror_prob, rotated by up to rotation degrees
+    and scaled within scale around its shoulder midpoint, shifted by up to
+    translation of the frame size, and jittered by jitter pixels. The video
+    size columns are left alone, and none of these change the posture label.
+    """
+
+    def __init__(self, rotation=8.0, scale=(0.9, 1.1), translation=0.05, mirror_prob=0.5, jitter=1.5):
+        self.rotation = rotation
+        self.scale = scale
+        self.translation = translation
+        self.mirror_prob = mirror_prob
+        self.jitter = jitter
+
+    def __call__(self, kp, rng):
+        kp = np.array(kp, dtype=np.float64)
+        n = len(kp)
+        width, height = kp[:, 0:1], kp[:, 1:2]
+
+        mirrored = rng.random(n) < self.mirror_prob
+        kp[mirrored, 2::2] = width[mirrored] - kp[mirrored, 2::2]
+        kp[mirrored] = kp[mirrored][:, MIRROR_ORDER]
+
+        x, y = kp[:, 2::2], kp[:, 3::2]
+        cx = (x[:, 1:2] + x[:, 2:3]) / 2
+        cy = (y[:, 1:2] + y[:, 2:3]) / 2
+        angle = np.radians(rng.uniform(-self.rotation, self.rotation, (n, 1)))
+        scale = rng.uniform(*self.scale, (n, 1))
+        cos, sin = scale * np.cos(angle), scale * np.sin(angle)
+        dx, dy = x - cx, y - cy
+        shift_x = rng.uniform(-self.translation, self.translation, (n, 1)) * width
+        shift_y = rng.uniform(-self.translation, self.translation, (n, 1)) * height
+
+        kp[:, 2::2] = cx + cos * dx - sin * dy + shift_x + rng.normal(0, self.jitter, x.shape)
+        kp[:, 3::2] = cy + sin * dx + cos * dy + shift_y + rng.normal(0, self.jitter, y.shape)
+        return kp
+
+    def features(self, kp, rng):
+        """Augments rows and returns their float32 model features (invalid rows stay NaN)."""
+        features, _ = compute_features(normalize_keypoints(self(kp, rng)))
+        return features.astype(np.float32)
+
+
+def augmented_batches(kp, y, indices, batch_size, augmenter=None, seed=42):
+    """Endless NumPy generator of (features, labels) batches, freshly augmented every epoch."""
+    augmenter = augmenter or LandmarkAugmenter()
+    rng = np.random.default_rng(seed)
+    indices = np.asarray(indices)
+    while True:
+        order = rng.permutation(indices)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            yield augmenter.features(kp[batch], rng), y[batch].astype(np.float32)
+
+
+def make_augmented_dataset(kp, y, indices, batch_size, augmenter=None, seed=42, parallel_calls=None):
+    """tf.data pipeline that augments and featurizes shuffled batches in parallel map calls.
+
+    Each epoch reshuffles the rows and draws new perturbations (every batch
+    gets its own random seed), so nothing augmented is ever stored.
+    parallel_calls defaults to tf.data.AUTOTUNE.
+    """
+    import tensorflow as tf
+
+    # kp and y may be memory-mapped; only each batch's rows are read
+    augmenter = augmenter or LandmarkAugmenter()
+
+    def augment_batch(batch, batch_seed):
+        rng = np.random.default_rng(batch_seed)
+        return augmenter.features(kp[batch], rng), np.asarray(y[batch], dtype=np.float32)
+
+    def map_batch(batch, batch_seed):
+        features, labels = tf.numpy_function(augment_batch, [batch, batch_seed], [tf.float32, tf.float32])
+        features.set_shape((None, len(FEATURE_NAMES)))
+        labels.set_shape((None,))
+        return features, labels
+
+    n_batches = -(-len(indices) // batch_size)
+    batches = (tf.data.Dataset.from_tensor_slices(np.asarray(indices))
+               .shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+               .batch(batch_size))
+    seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True)
+    dataset = tf.data.Dataset.zip((batches, seeds)).map(
+        map_batch, num_parallel_calls=parallel_calls or tf.data.AUTOTUNE, deterministic=False)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
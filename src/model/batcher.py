@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Rows per model call, for the batch size histogram
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class _Pending:
+    # One caller's rows waiting for the next batch
+    def __init__(self, rows):
+        self.rows = rows
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Merges concurrent scoring calls into one vectorized call.
+
+    Callers block in submit() while a background thread gathers queued rows
+    until max_batch rows are waiting or max_wait seconds have passed since
+    the oldest one arrived, runs fn once on all of them, and hands every
+    caller its own slice of the results. With max_wait=0 a batch is just
+    whatever queued up while the previous one ran. Inputs that already
+    have max_batch rows skip the queue.
+    """
+
+    def __init__(self, fn, max_batch=64, max_wait=0.002, metrics=None):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = deque()
+        self._queued_rows = 0
+        self._cond = threading.Condition()
+        self._batch_size = self._queue_wait = None
+        if metrics is not None:
+            self._batch_size = metrics.histogram("predict_batch_rows", "Rows per batched model call",
+                                                 buckets=BATCH_SIZE_BUCKETS)
+            self._queue_wait = metrics.histogram("predict_queue_wait_seconds",
+                                                 "Time a request waited for its batch to start")
+            metrics.gauge("predict_batch_max_rows", "Configured maximum rows per batch").set(max_batch)
+            metrics.gauge("predict_batch_max_wait_seconds", "Configured maximum batching wait").set(max_wait)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Returns fn(rows), computed together with whatever other rows are queued."""
+        if len(rows) >= self.max_batch:
+            return self.fn(rows)
+        pending = _Pending(rows)
+        with self._cond:
+            self._queue.append(pending)
+            self._queued_rows += len(rows)
+            if len(self._queue) == 1 or self._queued_rows >= self.max_batch:
+                self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = self._queue[0].enqueued + self.max_wait
+                while self._queued_rows < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch, rows = [], 0
+                while self._queue and rows + len(self._queue[0].rows) <= self.max_batch:
+                    pending = self._queue.popleft()
+                    batch.append(pending)
+                    rows += len(pending.rows)
+                self._queued_rows -= rows
+
+            started = time.perf_counter()
+            try:
+                results = self.fn(np.concatenate([pending.rows for pending in batch]))
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            if self._batch_size is not None:
+                self._batch_size.observe(rows)
+                for pending in batch:
+                    self._queue_wait.observe(started - pending.enqueued)
+            offset = 0
+            for pending in batch:
+                pending.results = results[offset:offset + len(pending.rows)]
+                offset += len(pending.rows)
+                pending.done.set()
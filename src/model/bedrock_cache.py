@@ -0,0 +1,193 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def prompt_key(model_id, payload):
+    # Hash of the model and every generation parameter, not just the prompt text
+    blob = json.dumps({"modelId": model_id, "payload": payload}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    # One in-progress model invocation that concurrent identical requests wait on
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BedrockResponseCache:
+    """LRU + TTL cache of Bedrock responses with single-flight coalescing.
+
+    Entries live in memory (up to maxsize, for ttl seconds) and, when
+    disk_path is given, in a SQLite file that survives restarts. An entry
+    keeps the time it was created in both tiers, so it expires ttl seconds
+    after the model produced it no matter how often it moves between them.
+    Concurrent misses on the same key share one model call: invoke() wraps
+    invoke_model, and callers that produce the response another way (a
+    stream) use lookup() with complete() or fail().
+    """
+
+    def __init__(self, maxsize=256, ttl=3600, disk_path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+        # Python's sqlite3 connections must not be used by two threads at once, so every
+        # disk access holds _disk_lock; it is never held while waiting for self._lock
+        self._db = None
+        self._disk_lock = threading.Lock()
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                             "(key TEXT PRIMARY KEY, created REAL, value TEXT)")
+            self._db.commit()
+
+    def invoke(self, client, model_id, payload):
+        """Returns the decoded response body for payload, invoking the model at most once per key."""
+        value = self.lookup(model_id, payload)
+        if value is not None:
+            return value
+        try:
+            response = client.invoke_model(
+                modelId=model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=json.dumps(payload)
+            )
+            value = json.loads(response["body"].read().decode("utf-8"))
+        except Exception as e:
+            self.fail(model_id, payload, e)
+            raise
+        self.complete(model_id, payload, value)
+        return value
+
+    def lookup(self, model_id, payload):
+        """Returns the cached response for payload, waiting on an identical request in flight.
+
+        None means nothing is cached or in flight: the caller is now the
+        single flight for this key and must call complete() with the
+        response, or fail(), to release the requests waiting on it. Raises
+        the in-flight request's error if it failed.
+        """
+        key = prompt_key(model_id, payload)
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+
+        # Disk reads happen outside the lock so a slow one does not hold up memory hits
+        row = self._read_disk(key)
+        if row is not None and time.time() - row[0] > self.ttl:
+            self._delete_disk(key, row[0])
+            row = None
+        with self._lock:
+            value = self._get_memory(key)  # a concurrent leader may have finished meanwhile
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+            value = self._promote(key, row)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                return value
+
+            flight = self._flights.get(key)
+            if flight is None:
+                self._flights[key] = _Flight()
+                self.stats["misses"] += 1
+                return None
+            self.stats["coalesced"] += 1
+
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def complete(self, model_id, payload, value):
+        # Caches the response of a lookup() miss and hands it to the requests waiting on it
+        key = prompt_key(model_id, payload)
+        created = time.time()
+        with self._lock:
+            self._put_memory(key, value, created)
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.result = value
+            flight.done.set()
+        self._put_disk(key, value, created)
+
+    def fail(self, model_id, payload, error):
+        # Ends a lookup() miss without a response; waiting requests raise error
+        with self._lock:
+            self.stats["errors"] += 1
+            flight = self._flights.pop(prompt_key(model_id, payload), None)
+        if flight is not None:
+            flight.error = error
+            flight.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._disk_lock:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    # The helpers below are called with self._lock held
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if time.time() - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key, value, created=None):
+        self._entries[key] = (time.time() if created is None else created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _promote(self, key, row):
+        # Moves an unexpired disk row into memory with its original creation time
+        if row is None:
+            return None
+        created, value = row
+        value = json.loads(value)
+        self._put_memory(key, value, created)
+        return value
+
+    # Disk reads and writes run without self._lock, serialized on the shared connection by _disk_lock
+    def _read_disk(self, key):
+        if self._db is None:
+            return None
+        with self._disk_lock:
+            return self._db.execute("SELECT created, value FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _put_disk(self, key, value, created):
+        if self._db is None:
+            return
+        with self._disk_lock:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, created, value) VALUES (?, ?, ?)",
+                             (key, created, json.dumps(value)))
+            self._db.commit()
+
+    def _delete_disk(self, key, created):
+        # Only removes the row that was read, not a fresher one written since
+        with self._disk_lock:
+            self._db.execute("DELETE FROM responses WHERE key = ? AND created = ?", (key, created))
+            self._db.commit()
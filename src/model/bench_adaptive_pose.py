@@ -0,0 +1,91 @@
+"""Accuracy versus CPU cost of adaptive pose detection on recorded videos.
+
+Every configuration is compared with full-resolution detection on every
+frame: CPU time per frame, share of frames where detection ran, mean
+keypoint error (normalized coordinates) and mean posture score error.
+
+Usage: python src/model/bench_adaptive_pose.py VIDEO [VIDEO ...]
+"""
+import argparse
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from adaptive_pose import AdaptivePose
+from features import extract_features
+from inference import load_posture_model
+
+KEYPOINTS = ["NOSE", "LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_EAR", "RIGHT_EAR"]
+
+CONFIGS = [
+    ("full rate, scale 1.0", dict(scale=1.0, max_skip=0)),
+    ("full rate, scale 0.5", dict(scale=0.5, max_skip=0)),
+    ("adaptive, scale 1.0", dict(scale=1.0, max_skip=8)),
+    ("adaptive, scale 0.5", dict(scale=0.5, max_skip=8)),
+    ("adaptive, scale 0.5, skip 16", dict(scale=0.5, max_skip=16)),
+]
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def run(frames, scale, max_skip, motion_threshold):
+    pose = mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    adaptive = AdaptivePose(pose, scale=scale, motion_threshold=motion_threshold, max_skip=max_skip)
+    keypoints = np.full((len(frames), 10), np.nan)
+    cpu_start = time.process_time()
+    for i, frame in enumerate(frames):
+        results = adaptive.process(frame)
+        if results.pose_landmarks:
+            landmarks = results.pose_landmarks.landmark
+            keypoints[i] = [value for name in KEYPOINTS
+                            for value in (landmarks[mp.solutions.pose.PoseLandmark[name].value].x,
+                                          landmarks[mp.solutions.pose.PoseLandmark[name].value].y)]
+    cpu_per_frame = (time.process_time() - cpu_start) / len(frames)
+    pose.close()
+    return keypoints, cpu_per_frame, adaptive.inference_rate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--motion-threshold", type=float, default=3.0)
+    args = parser.parse_args()
+
+    model = load_posture_model(backend="numpy")
+
+    def scores(keypoints):
+        features, valid = extract_features(keypoints)
+        out = np.full(len(keypoints), np.nan)
+        if valid.any():
+            out[valid] = model.predict(features[valid])[:, 0] * 100
+        return out
+
+    for path in args.videos:
+        frames = read_frames(path)
+        print(f"{path}: {len(frames)} frames")
+        reference = None
+        for name, config in CONFIGS:
+            keypoints, cpu, rate = run(frames, motion_threshold=args.motion_threshold, **config)
+            if reference is None:
+                reference, reference_cpu = keypoints, cpu
+            both = np.isfinite(keypoints).all(axis=1) & np.isfinite(reference).all(axis=1)
+            keypoint_error = np.mean(np.abs(keypoints[both] - reference[both])) if both.any() else float("nan")
+            score_error = np.nanmean(np.abs(scores(keypoints) - scores(reference)))
+            print(f"  {name:30s} cpu {cpu * 1000:6.1f} ms/frame ({reference_cpu / cpu:4.1f}x less)  "
+                  f"detection on {rate:4.0%}  keypoint err {keypoint_error:.4f}  score err {score_error:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
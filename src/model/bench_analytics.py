@@ -0,0 +1,128 @@
+"""Rollup-backed analytics against aggregating the raw measurements.
+
+Writes months of synthetic sessions for one user (plus other users' rows
+around them) to a fresh store through RollupMeasurementSink, then times
+the analytics report for a few ranges against the Progress/Stats-page
+approach of fetching the user's raw rows and aggregating them, checks the
+two agree, and times a full rebuild of the rollups.
+
+    python src/model/bench_analytics.py --days 180 --frames-per-session 900
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from analytics import PostureAnalytics, RollupMeasurementSink, rebuild_rollups
+from bench_suite import timed_runs
+from features import POSTURE_ISSUES
+from measurements import SQLiteMeasurementSink, measurement_row
+
+DAY = 86400
+START = date(2026, 1, 5)
+
+
+def synthetic_sessions(days, sessions_per_day, frames_per_session, users, seed=0):
+    # Sessions at random times of day, ~1 scored frame per second, scores drifting upwards over the months
+    rng = np.random.default_rng(seed)
+    keypoints = np.array([640.0, 480.0] + [0.0] * 10)
+    base = time.mktime(START.timetuple())
+    for day in range(days):
+        for s in range(sessions_per_day):
+            user = "bench-user" if s % users == 0 else f"other-{s % users}"
+            started = base + day * DAY + rng.uniform(8, 20) * 3600
+            quality = min(95, 55 + day * 0.1 + rng.normal(0, 8))
+            scores = np.clip(rng.normal(quality, 10, frames_per_session), 0, 100).astype(int)
+            issues = rng.random((frames_per_session, len(POSTURE_ISSUES))) < 0.25 * (1 - quality / 100)
+            yield [measurement_row(f"{user}-{day}-{s}", user, keypoints,
+                                   {"posture_score": int(score),
+                                    "posture_issues": [name for name, flag in zip(POSTURE_ISSUES, flags) if flag]},
+                                   started + i)
+                   for i, (score, flags) in enumerate(zip(scores, issues))]
+
+
+def raw_report(db, user_id, start, end):
+    # What the pages do today: fetch every row in range, aggregate client-side
+    rows = db.execute("SELECT session_id, posture_score, posture_issues, created_at FROM posture_measurements "
+                      "WHERE user_id = ? AND created_at >= ? AND created_at < ?",
+                      (user_id, start, (date.fromisoformat(end) + timedelta(days=1)).isoformat())).fetchall()
+    scores = np.array([row[1] for row in rows])
+    days, issue_counts, sessions = {}, {}, {}
+    for session_id, score, issues, created_at in rows:
+        days.setdefault(created_at[:10], []).append(score)
+        sessions.setdefault(session_id, []).append(score)
+        for issue in json.loads(issues):
+            issue_counts[issue] = issue_counts.get(issue, 0) + 1
+    return {"measurements": len(rows), "average_score": scores.mean(),
+            "p50": int(np.percentile(scores, 50, method="inverted_cdf")),
+            "days": {day: float(np.mean(values)) for day, values in days.items()},
+            "sessions": {session_id: float(np.mean(values)) for session_id, values in sessions.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--sessions-per-day", type=int, default=4)
+    parser.add_argument("--frames-per-session", type=int, default=900)
+    parser.add_argument("--users", type=int, default=2, help="the bench user owns every users-th session")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "measurements.sqlite3")
+        plain_path = os.path.join(tmp, "plain.sqlite3")
+        sink, plain = RollupMeasurementSink(path), SQLiteMeasurementSink(plain_path)
+        written = rollup_time = plain_time = 0.0
+        for rows in synthetic_sessions(args.days, args.sessions_per_day, args.frames_per_session, args.users):
+            for i in range(0, len(rows), args.batch_size):
+                batch = rows[i:i + args.batch_size]
+                start = time.perf_counter()
+                sink.write_many(batch)
+                rollup_time += time.perf_counter() - start
+                start = time.perf_counter()
+                plain.write_many(batch)
+                plain_time += time.perf_counter() - start
+                written += len(batch)
+        plain.close()
+        print(f"{written:.0f} rows, {args.days} days: ingest {written / plain_time:,.0f} rows/s without rollups, "
+              f"{written / rollup_time:,.0f} rows/s with")
+
+        analytics = PostureAnalytics(path)
+        end = START + timedelta(days=args.days - 1)
+        print(f"{'range':>6s} {'granularity':11s} {'rows':>8s} {'rollups':>9s} {'raw rows':>9s} {'speedup':>8s}")
+        for span in (7, 30, args.days):
+            range_start = (end - timedelta(days=span - 1)).isoformat()
+            for granularity in ("day", "week"):
+                report = analytics.report("bench-user", granularity, range_start, end.isoformat())
+                rollup_ms = float(np.median(timed_runs(
+                    lambda: analytics.report("bench-user", granularity, range_start, end.isoformat()),
+                    min_time=0.3))) * 1e3
+                raw_ms = float(np.median(timed_runs(lambda: raw_report(sink.db, "bench-user", range_start,
+                                                                       end.isoformat()), min_time=0.3))) * 1e3
+                print(f"{span:5d}d {granularity:11s} {report['overall']['measurements']:8d} {rollup_ms:7.2f}ms "
+                      f"{raw_ms:7.1f}ms {raw_ms / rollup_ms:7.0f}x")
+
+            raw = raw_report(sink.db, "bench-user", range_start, end.isoformat())
+            report = analytics.report("bench-user", "day", range_start, end.isoformat(), sessions=10_000)
+            overall = report["overall"]
+            assert overall["measurements"] == raw["measurements"] and overall["p50"] == raw["p50"]
+            assert abs(overall["average_score"] - raw["average_score"]) < 1e-9
+            assert all(abs(b["average_score"] - raw["days"][b["start"]]) < 1e-9 for b in report["buckets"])
+            assert all(abs(s["average_score"] - raw["sessions"][s["session_id"]]) < 1e-9 for s in report["sessions"])
+        print(f"trend {report['trends']['average_score_per_week']:+.2f} points/week")
+
+        start = time.perf_counter()
+        rebuild_rollups(sink.db)
+        elapsed = time.perf_counter() - start
+        print(f"rebuild of all rollups from {written:.0f} rows: {elapsed:.2f}s ({written / elapsed:,.0f} rows/s)")
+        assert analytics.report("bench-user", "day", range_start, end.isoformat(), sessions=10_000) == report
+        analytics.close()
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
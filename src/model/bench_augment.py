@@ -0,0 +1,93 @@
+"""Throughput of on-the-fly landmark augmentation and its effect on validation error.
+
+Throughput is measured for the NumPy batch generator and for the tf.data
+pipeline (one map call at a time vs AUTOTUNE). The validation effect is
+k-fold cross-validation of the rl_model.py network trained on the cached
+features versus trained on freshly augmented landmarks every epoch, scored
+on the untouched validation rows and on a perturbed copy of them (fixed
+seed), which shows how much the model relies on exact camera placement.
+
+    python src/model/bench_augment.py --folds 5 --epochs 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from augment import LandmarkAugmenter, augmented_batches, make_augmented_dataset
+from sweep import build_model, kfold_indices
+from training_data import load_training_features, load_training_keypoints, make_dataset
+
+
+def generator_rate(kp, y, batch_size, seconds=1.0):
+    batches = augmented_batches(kp, y, np.arange(len(y)), batch_size)
+    samples, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        samples += len(next(batches)[1])
+    return samples / (time.perf_counter() - start)
+
+
+def dataset_rate(kp, y, batch_size, parallel_calls, epochs=3):
+    dataset = make_augmented_dataset(kp, y, np.arange(len(y)), batch_size, parallel_calls=parallel_calls)
+    for _ in dataset:
+        pass  # build the pipeline outside the timing
+    samples, start = 0, time.perf_counter()
+    for _ in range(epochs):
+        for _, labels in dataset:
+            samples += len(labels)
+    return samples / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="src/posture_data.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=2000, help="rows are tiled to this many for throughput")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    X, y = load_training_features(args.data)
+    kp, _ = load_training_keypoints(args.data)
+    tiled = np.arange(args.repeat) % len(y)
+
+    print(f"{'pipeline':24s} {'batch':>6s} {'samples/s':>11s}")
+    for batch_size in (32, 256, 4096):
+        print(f"{'numpy generator':24s} {batch_size:6d} {generator_rate(kp[tiled], y[tiled], batch_size):11,.0f}")
+    for parallel_calls, name in ((1, "tf.data map x1"), (None, "tf.data map AUTOTUNE")):
+        rate = dataset_rate(kp[tiled], y[tiled], 256, parallel_calls)
+        print(f"{name:24s} {256:6d} {rate:11,.0f}")
+
+    # Perturbed validation rows: same augmenter, fixed seed, so both runs see identical inputs
+    augmenter = LandmarkAugmenter()
+    X_perturbed = augmenter.features(kp, np.random.default_rng(args.seed))
+
+    results = {"baseline": [], "augmented": []}
+    for fold, (train_idx, val_idx) in enumerate(kfold_indices(len(y), args.folds, args.seed)):
+        for name in results:
+            tf.keras.utils.set_random_seed(args.seed + fold)
+            model = build_model(widths=(16, 16), learning_rate=0.001)
+            if name == "baseline":
+                train_ds = make_dataset(X, y, train_idx, args.batch_size, shuffle=True, seed=args.seed + fold)
+            else:
+                train_ds = make_augmented_dataset(kp, y, train_idx, args.batch_size, augmenter, seed=args.seed + fold)
+            start = time.perf_counter()
+            model.fit(train_ds, epochs=args.epochs, verbose=0)
+            elapsed = time.perf_counter() - start
+            clean = np.abs(model.predict(np.asarray(X[val_idx]), verbose=0)[:, 0] - y[val_idx]).mean()
+            perturbed = np.abs(model.predict(X_perturbed[val_idx], verbose=0)[:, 0] - y[val_idx]).mean()
+            results[name].append((clean * 100, perturbed * 100, elapsed))
+
+    print(f"\n{args.folds}-fold validation MAE in score points, {args.epochs} epochs")
+    print(f"{'training':10s} {'clean val':>15s} {'perturbed val':>15s} {'fit time':>9s}")
+    for name, rows in results.items():
+        clean, perturbed, elapsed = np.array(rows).T
+        print(f"{name:10s} {clean.mean():8.2f} +/- {clean.std():4.2f} "
+              f"{perturbed.mean():8.2f} +/- {perturbed.std():4.2f} {elapsed.mean():8.1f}s")
+
+
+if __name__ == "__main__":
+    main()
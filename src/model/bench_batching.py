@@ -0,0 +1,85 @@
+"""Throughput and latency of /predict_posture with and without micro-batching.
+
+Concurrent clients send single-frame JSON requests to a local threaded
+server; each configuration swaps a fresh MicroBatcher (or none) into the
+app, so one run compares batch sizes and wait times on the same model:
+
+    python src/model/bench_batching.py --concurrency 1 8 32 --waits 0 2 5
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("BEDROCK_FAKE", "1")
+
+import app
+from batcher import MicroBatcher
+from bench_features import synthetic_frames
+from features import KEYPOINT_KEYS
+from metrics import MetricsRegistry
+
+
+def drive(port, bodies, concurrency, requests_per_client):
+    def client(worker):
+        latencies = []
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        for i in range(requests_per_client):
+            body = bodies[(worker * requests_per_client + i) % len(bodies)]
+            start = time.perf_counter()
+            conn.request("POST", "/predict_posture", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"/predict_posture returned {response.status}")
+            latencies.append(time.perf_counter() - start)
+        conn.close()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.concatenate([np.array(l) for l in pool.map(client, range(concurrency))])
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 2, 5], help="max wait values in ms")
+    args = parser.parse_args()
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bodies = [json.dumps(frame) for frame in synthetic_frames(1000)[KEYPOINT_KEYS].to_dict("records")]
+
+    configs = [("unbatched", None)] + [(f"wait {wait:g}ms", wait) for wait in args.waits]
+    print(f"backend {app.MODEL_BACKEND}, max batch {args.max_batch}, {args.requests} requests per client")
+    print(f"{'clients':>7s} {'config':12s} {'req/s':>8s} {'p50':>9s} {'p99':>9s} {'rows/call':>9s}")
+    for concurrency in args.concurrency:
+        for name, wait in configs:
+            registry = MetricsRegistry()
+            app.predict_batcher = None if wait is None else MicroBatcher(
+                app.score_keypoints, max_batch=args.max_batch, max_wait=wait / 1000, metrics=registry)
+            drive(server.server_port, bodies, concurrency, 5)  # warm up
+            latencies, elapsed = drive(server.server_port, bodies, concurrency, args.requests)
+            rows = registry.series("predict_batch_rows").get(())
+            rows_per_call = rows.sum / rows.count if rows is not None and rows.count else 1.0
+            print(f"{concurrency:7d} {name:12s} {len(latencies) / elapsed:8.0f} "
+                  f"{np.percentile(latencies, 50) * 1e3:7.2f}ms {np.percentile(latencies, 99) * 1e3:7.2f}ms "
+                  f"{rows_per_call:9.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
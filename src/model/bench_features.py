@@ -0,0 +1,90 @@
+"""Row-by-row (df.iterrows) versus vectorized feature extraction throughput.
+
+Usage: python src/model/bench_features.py [--rows 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import KEYPOINT_KEYS, extract_features
+
+
+# Scalar extraction as rl_model.py did it before the shared feature module
+def safe_float(val):
+    try:
+        return float(val)
+    except ValueError:
+        return None
+
+def distance2D(x1, y1, x2, y2):
+    return np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+def angleABC(Ax, Ay, Bx, By, Cx, Cy):
+    ABx, ABy = Ax - Bx, Ay - By
+    CBx, CBy = Cx - Bx, Cy - By
+    dot = ABx * CBx + ABy * CBy
+    magAB, magCB = np.sqrt(ABx**2 + ABy**2), np.sqrt(CBx**2 + CBy**2)
+    if magAB == 0 or magCB == 0:
+        return 180.0
+    cosTheta = np.clip(dot / (magAB * magCB), -1, 1)
+    return np.degrees(np.arccos(cosTheta))
+
+def extract_features_row(row):
+    vw, vh = safe_float(row["videoWidth"]), safe_float(row["videoHeight"])
+    if vw is None or vh is None:
+        return None
+    noseX, noseY = safe_float(row["nose_x"]) / vw, safe_float(row["nose_y"]) / vh
+    lshoX, lshoY = safe_float(row["left_shoulder_x"]) / vw, safe_float(row["left_shoulder_y"]) / vh
+    rshoX, rshoY = safe_float(row["right_shoulder_x"]) / vw, safe_float(row["right_shoulder_y"]) / vh
+    learX, learY = safe_float(row["left_ear_x"]) / vw, safe_float(row["left_ear_y"]) / vh
+    rearX, rearY = safe_float(row["right_ear_x"]) / vw, safe_float(row["right_ear_y"]) / vh
+
+    mshoX, mshoY = (lshoX + rshoX) / 2, (lshoY + rshoY) / 2
+    dist_nose_shoulders = distance2D(noseX, noseY, mshoX, mshoY)
+    shoulder_width = distance2D(lshoX, lshoY, rshoX, rshoY)
+    return [
+        dist_nose_shoulders,
+        dist_nose_shoulders / shoulder_width if shoulder_width > 0 else 0,
+        angleABC(learX, learY, noseX, noseY, rearX, rearY),
+        distance2D(learX, learY, noseX, noseY),
+        distance2D(rearX, rearY, noseX, noseY),
+        angleABC(learX, learY, lshoX, lshoY, noseX, noseY),
+        angleABC(rearX, rearY, rshoX, rshoY, noseX, noseY),
+    ]
+
+
+def synthetic_frames(n_rows, seed=0):
+    # Resample real rows from posture_data.csv and jitter the keypoints by a few pixels
+    source = pd.read_csv("src/posture_data.csv")[KEYPOINT_KEYS].dropna()
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+    df[KEYPOINT_KEYS[2:]] += rng.normal(0, 3, (n_rows, len(KEYPOINT_KEYS) - 2))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = synthetic_frames(args.rows)
+    print(f"Rows: {len(df)}")
+
+    start = time.perf_counter()
+    features, valid = extract_features(df)
+    vectorized_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = [extract_features_row(row) for _, row in df.iterrows()]
+    iterrows_time = time.perf_counter() - start
+
+    max_diff = np.max(np.abs(np.array(rows) - features[valid]))
+    print(f"iterrows:   {iterrows_time:8.3f} s  {len(df) / iterrows_time:14,.0f} rows/s")
+    print(f"vectorized: {vectorized_time:8.3f} s  {len(df) / vectorized_time:14,.0f} rows/s")
+    print(f"Speedup: {iterrows_time / vectorized_time:.0f}x, max abs feature difference {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
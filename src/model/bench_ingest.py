@@ -0,0 +1,93 @@
+"""Compare per-row measurement inserts with the write-behind bulk buffer.
+
+Both runs write the same synthetic posture_measurements rows to a fresh
+SQLite file. The per-row run commits every insert, like one Supabase
+insert per scored frame; the buffered run queues rows from producer
+threads and lets WriteBehindBuffer write them in batches.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from features import POSTURE_ISSUES
+from measurements import SQLiteMeasurementSink, WriteBehindBuffer, measurement_row
+
+
+def synthetic_rows(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    keypoints = np.column_stack([np.full(n_rows, 640.0), np.full(n_rows, 480.0),
+                                 rng.uniform(0, 640, (n_rows, 10))])
+    rows = []
+    for i in range(n_rows):
+        issues = [name for name in POSTURE_ISSUES if rng.random() < 0.2]
+        result = {"posture_score": int(rng.integers(40, 100)), "posture_issues": issues}
+        rows.append(measurement_row(f"session-{i % 8}", "bench-user", keypoints[i], result, 1_700_000_000 + i / 30))
+    return rows
+
+
+def bench_per_row(path, rows):
+    sink = SQLiteMeasurementSink(path)
+    start = time.perf_counter()
+    for row in rows:
+        sink.write_many([row])
+    elapsed = time.perf_counter() - start
+    written = sink.count()
+    sink.close()
+    return elapsed, written
+
+
+def bench_buffered(path, rows, producers, max_batch, flush_interval):
+    sink = SQLiteMeasurementSink(path)
+    buffer = WriteBehindBuffer(sink, max_batch=max_batch, flush_interval=flush_interval)
+    put_latencies = [[] for _ in range(producers)]
+
+    def produce(worker):
+        latencies = put_latencies[worker]
+        for row in rows[worker::producers]:
+            t = time.perf_counter()
+            buffer.put(row)
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(producers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    enqueued = time.perf_counter() - start
+    buffer.close()
+    elapsed = time.perf_counter() - start
+    written = sink.count()
+    sink.close()
+    return elapsed, enqueued, written, np.concatenate([np.array(l) for l in put_latencies]), buffer.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--producers", type=int, default=4, help="threads calling put, like request handlers")
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row, per_row_written = bench_per_row(os.path.join(tmp, "per_row.sqlite3"), rows)
+        buffered, enqueued, buffered_written, put_latencies, stats = bench_buffered(
+            os.path.join(tmp, "buffered.sqlite3"), rows, args.producers, args.max_batch, args.flush_interval)
+
+    assert per_row_written == buffered_written == len(rows)
+    print(f"{len(rows)} rows")
+    print(f"  per-row inserts: {per_row:7.2f}s  {len(rows) / per_row:10.0f} rows/s")
+    print(f"  write-behind:    {buffered:7.2f}s  {len(rows) / buffered:10.0f} rows/s "
+          f"({per_row / buffered:.0f}x), {stats['batches']} batches")
+    print(f"  put latency: p50 {np.percentile(put_latencies, 50) * 1e6:.1f}us, "
+          f"p99 {np.percentile(put_latencies, 99) * 1e6:.1f}us, all queued after {enqueued:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
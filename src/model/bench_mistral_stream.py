@@ -0,0 +1,46 @@
+"""Time to first byte of /query_mistral versus /query_mistral_stream on a stub Bedrock.
+
+Usage: python src/model/bench_mistral_stream.py [--latency 0.3] [--token-latency 0.02] [--runs 5]
+"""
+import argparse
+import statistics
+import time
+
+import app
+from fake_bedrock import FakeBedrockClient
+
+
+def time_request(client, path, prompt):
+    # Returns (time to first body byte, total time) through the Flask test client
+    start = time.perf_counter()
+    response = client.post(path, json={"prompt": prompt}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    first = time.perf_counter() - start
+    for _ in chunks:
+        pass
+    response.close()
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="stub time before the first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="stub time per token (s)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    app.bedrock_client = FakeBedrockClient(latency=args.latency, token_latency=args.token_latency,
+                                           text=" ".join(["word"] * 150))
+    client = app.app.test_client()
+
+    for path in ["/query_mistral", "/query_mistral_stream"]:
+        # Unique prompts so the response cache never answers
+        timings = [time_request(client, path, f"benchmark prompt {path} {i}") for i in range(args.runs)]
+        ttfb = statistics.median(t[0] for t in timings)
+        total = statistics.median(t[1] for t in timings)
+        print(f"{path:24s} TTFB {ttfb * 1000:8.1f} ms   total {total * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
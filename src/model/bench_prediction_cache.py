@@ -0,0 +1,93 @@
+"""Hit rate and accuracy cost of the quantized-keypoint prediction cache.
+
+Every session is replayed one frame per request, in order, through a
+PredictionCache in front of app.score_keypoints, and each served result is
+compared with scoring that frame exactly. Sessions are posture_data.csv-style
+files (--sessions, e.g. extract_landmarks.py output of recorded videos; each
+file is one session) plus synthetic still sessions: a real row held for a
+while with MediaPipe-like landmark jitter, then a new posture.
+
+    python src/model/bench_prediction_cache.py --steps 0.002 0.005 0.01 --jitter 1.5
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("BEDROCK_FAKE", "1")
+os.environ.setdefault("POSTURE_MODEL_BACKEND", "numpy")
+os.environ["PREDICTION_CACHE_STEP"] = "0"  # the app's own cache stays out of the measurement
+
+import app
+from features import KEYPOINT_KEYS, to_keypoint_array
+from prediction_cache import PredictionCache
+
+
+def still_sessions(source, n_sessions, frames, hold, jitter, seed=0):
+    # Hold a random real posture for `hold` frames at a time, jittering the keypoints by `jitter` pixels
+    rng = np.random.default_rng(seed)
+    sessions = []
+    for _ in range(n_sessions):
+        rows = source[rng.integers(0, len(source), -(-frames // hold))].repeat(hold, axis=0)[:frames].copy()
+        rows[:, 2:] += rng.normal(0, jitter, (frames, len(KEYPOINT_KEYS) - 2))
+        sessions.append(rows)
+    return sessions
+
+
+def replay(sessions, cache):
+    served, elapsed = [], 0.0
+    for session_id, kp in enumerate(sessions):
+        start = time.perf_counter()
+        if cache is None:
+            served += [app.score_keypoints(kp[i:i + 1])[0] for i in range(len(kp))]
+        else:
+            served += [cache.score(kp[i:i + 1], session_id, app.score_keypoints)[0] for i in range(len(kp))]
+        elapsed += time.perf_counter() - start
+    return served, elapsed
+
+
+def compare(served, exact):
+    pairs = [(s, e) for s, e in zip(served, exact) if e is not None]
+    errors = np.array([abs(s["posture_score"] - e["posture_score"]) for s, e in pairs])
+    label_flips = sum(s["posture_label"] != e["posture_label"] for s, e in pairs)
+    issue_mismatches = sum(set(s["posture_issues"]) != set(e["posture_issues"]) for s, e in pairs)
+    return errors.mean(), errors.max(), label_flips / len(pairs), issue_mismatches / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", nargs="*", default=["src/posture_data.csv"],
+                        help="posture_data.csv-style files, one session each")
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.001, 0.002, 0.005, 0.01, 0.02])
+    parser.add_argument("--still-sessions", type=int, default=20)
+    parser.add_argument("--still-frames", type=int, default=600)
+    parser.add_argument("--hold", type=int, default=150, help="frames each synthetic posture is held for")
+    parser.add_argument("--jitter", type=float, default=1.5, help="landmark jitter in pixels")
+    args = parser.parse_args()
+
+    recorded = [to_keypoint_array(pd.read_csv(path)) for path in args.sessions]
+    source = to_keypoint_array(pd.read_csv("src/posture_data.csv").dropna(subset=KEYPOINT_KEYS))
+    workloads = [("recorded", recorded)] if recorded else []
+    workloads.append((f"still {args.jitter:g}px", still_sessions(source, args.still_sessions, args.still_frames,
+                                                                args.hold, args.jitter)))
+
+    print(f"backend {app.MODEL_BACKEND}")
+    print(f"{'workload':12s} {'step':>6s} {'frames':>7s} {'hit rate':>8s} {'us/frame':>9s} "
+          f"{'score MAE':>9s} {'max err':>7s} {'label flips':>11s} {'issue diffs':>11s}")
+    for name, sessions in workloads:
+        exact, elapsed = replay(sessions, None)
+        frames = len(exact)
+        print(f"{name:12s} {'-':>6s} {frames:7d} {'-':>8s} {elapsed / frames * 1e6:9.1f}")
+        for step in args.steps:
+            cache = PredictionCache(step=step, maxsize=100_000, ttl=float("inf"))
+            served, elapsed = replay(sessions, cache)
+            mae, max_err, flips, issue_diffs = compare(served, exact)
+            stats = cache.snapshot()
+            print(f"{name:12s} {step:6g} {frames:7d} {stats['hits'] / frames:8.1%} {elapsed / frames * 1e6:9.1f} "
+                  f"{mae:9.3f} {max_err:7d} {flips:11.2%} {issue_diffs:11.2%}")
+
+
+if __name__ == "__main__":
+    main()
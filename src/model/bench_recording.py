@@ -0,0 +1,144 @@
+"""Recording, random access and replay speed of memory-mapped landmark sessions.
+
+Synthetic sessions are recorded at 30 fps from posture_data.csv rows (each
+real posture held for a while with MediaPipe-like jitter, some frames
+without a detected pose). The bench times appending them, gathering
+training keypoints for random frames from the mapped file against reading
+the same frames from a CSV, and replaying a session frame by frame
+through feature extraction, scoring and issue detection at maximum speed,
+checking the replayed scores match scoring the session in one batch. A
+short real-time replay checks the pacing.
+
+    python src/model/bench_recording.py --sessions 10 --minutes 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("POSTURE_MODEL_BACKEND", "numpy")
+
+from features import compute_features, detect_issues, normalize_keypoints
+from inference import load_posture_model
+from recording import (NUM_LANDMARKS, POSE_KEYPOINTS, RECORD_DTYPE, LandmarkRecorder, LandmarkRecording,
+                       LandmarkReplay, keypoints)
+
+FPS = 30
+
+# MediaPipe Pose indices of the posture_data.csv columns (as in extract_landmarks.py)
+CSV_LANDMARKS = [("nose", 0), ("left_eye_inner", 1), ("left_eye", 2), ("left_eye_outer", 3),
+                 ("right_eye_inner", 4), ("right_eye", 5), ("right_eye_outer", 6), ("left_ear", 7), ("right_ear", 8),
+                 ("mouth_left", 9), ("mouth_right", 10), ("left_shoulder", 11), ("right_shoulder", 12)]
+
+
+def synthetic_session(df, frames, hold, jitter, missing, rng):
+    # (frames, 33, 4) normalized landmarks; None rows where no pose was detected
+    rows = df.iloc[rng.integers(0, len(df), -(-frames // hold))].to_numpy().repeat(hold, axis=0)[:frames]
+    width, height = rows[:, :1], rows[:, 1:2]
+    landmarks = np.zeros((frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    for column, (name, index) in enumerate(CSV_LANDMARKS):
+        xy = rows[:, 2 + 2 * column:4 + 2 * column] + rng.normal(0, jitter, (frames, 2))
+        landmarks[:, index, 0] = xy[:, 0] / width[:, 0]
+        landmarks[:, index, 1] = xy[:, 1] / height[:, 0]
+        landmarks[:, index, 3] = 0.99
+    detected = rng.random(frames) >= missing
+    return width[:, 0].astype(int), height[:, 0].astype(int), landmarks, detected
+
+
+def score_replay(replay, model):
+    # What run_rl.py does per frame once landmarks are known
+    scores = []
+    while True:
+        ok, frame, results = replay.read()
+        if not ok:
+            return np.array(scores)
+        if results.landmarks is None:
+            scores.append(np.nan)
+            continue
+        h, w = frame.shape[:2]
+        points = results.landmarks[POSE_KEYPOINTS, :2].astype(np.float64).reshape(1, -1)
+        features, _ = compute_features(points)
+        scores.append(int(model.predict(features, verbose=0)[0][0] * 100))
+        detect_issues(points, y_scale=h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="src/posture_data.csv")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--hold", type=int, default=90, help="frames each posture is held")
+    parser.add_argument("--jitter", type=float, default=1.5, help="landmark noise in pixels")
+    parser.add_argument("--missing", type=float, default=0.02, help="share of frames without a detected pose")
+    parser.add_argument("--samples", type=int, default=10_000, help="random frames gathered for a training set")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data).drop(columns=["label"])
+    rng = np.random.default_rng(0)
+    frames = int(args.minutes * 60 * FPS)
+    model = load_posture_model(None, os.environ["POSTURE_MODEL_BACKEND"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.lmrec")
+        elapsed = 0.0
+        for s in range(args.sessions):
+            width, height, landmarks, detected = synthetic_session(df, frames, args.hold, args.jitter, args.missing,
+                                                                   rng)
+            start = time.perf_counter()
+            with LandmarkRecorder(path, f"session-{s}") as recorder:
+                for i in range(frames):
+                    recorder.record(landmarks[i] if detected[i] else None, width[i], height[i], 1e9 + s * 1e4 + i / FPS)
+            elapsed += time.perf_counter() - start
+        total = args.sessions * frames
+        print(f"recorded {total:,} frames ({RECORD_DTYPE.itemsize} bytes each, {os.path.getsize(path) / 1e6:.0f} MB): "
+              f"{total / elapsed:,.0f} frames/s, {elapsed / total * 1e6:.1f} us/frame")
+
+        start = time.perf_counter()
+        recording = LandmarkRecording(path)
+        open_ms = (time.perf_counter() - start) * 1e3
+        print(f"opened {len(recording.sessions)} sessions in {open_ms:.2f} ms")
+
+        # Training-set gather: random frames from across all sessions
+        picks = np.sort(rng.choice(len(recording), args.samples, replace=False))
+        start = time.perf_counter()
+        sample = keypoints(recording.records[picks])
+        mapped_ms = (time.perf_counter() - start) * 1e3
+        assert np.shares_memory(recording.session(3)["landmarks"], recording.records)
+
+        csv_path = os.path.join(tmp, "sessions.csv")
+        pd.DataFrame(keypoints(recording.records)).to_csv(csv_path, index=False)
+        start = time.perf_counter()
+        from_csv = pd.read_csv(csv_path).to_numpy()[picks]
+        csv_ms = (time.perf_counter() - start) * 1e3
+        assert np.allclose(sample, from_csv, equal_nan=True, atol=1e-6)
+        print(f"gathered {args.samples:,} random frames' keypoints: {mapped_ms:.1f} ms mapped, "
+              f"{csv_ms:.0f} ms from CSV ({csv_ms / mapped_ms:.0f}x)")
+
+        # Maximum-speed replay must score every frame exactly as batch scoring does
+        session = recording.session(0)
+        start = time.perf_counter()
+        scores = score_replay(LandmarkReplay(session), model)
+        elapsed = time.perf_counter() - start
+        batch_kp = keypoints(session)
+        features, valid = compute_features(normalize_keypoints(batch_kp))
+        expected = np.full(len(session), np.nan)
+        expected[valid] = (model.predict(features[valid].astype(np.float32), verbose=0)[:, 0] * 100).astype(int)
+        mismatched = int(np.sum(~np.isclose(scores, expected, equal_nan=True)))
+        print(f"replayed {len(session):,} frames ({len(session) / FPS:.0f}s of recording) at max speed: "
+              f"{len(session) / elapsed:,.0f} frames/s ({len(session) / FPS / elapsed:,.0f}x real time), "
+              f"{mismatched} score mismatches against batch scoring")
+
+        replay = LandmarkReplay(session[:3 * FPS], realtime=True)
+        start = time.perf_counter()
+        while replay.read()[0]:
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"real-time replay of {3 * FPS} frames: {elapsed:.3f}s for {(3 * FPS - 1) / FPS:.3f}s recorded")
+        recording.close()
+
+
+if __name__ == "__main__":
+    main()
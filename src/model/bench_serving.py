@@ -0,0 +1,129 @@
+"""Cold start and throughput of the development server against serve.py.
+
+Each configuration is started as a fresh process; cold start is the time
+from launch to the first successful /predict_posture, then client
+processes (not threads, so the load generator isn't bound by one GIL)
+hammer the server with single-frame JSON requests over keep-alive
+connections:
+
+    python src/model/bench_serving.py --backends keras onnx --workers 1 4 --clients 8
+
+Throughput only scales with workers up to the number of cores the server
+and the clients share.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from bench_features import synthetic_frames
+from features import KEYPOINT_KEYS
+from serve import FORK_UNSAFE_BACKENDS
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post(conn, body):
+    conn.request("POST", "/predict_posture", body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def wait_ready(port, body, process, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} before answering")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+            if post(conn, body) == 200:
+                conn.close()
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"No successful /predict_posture within {timeout}s")
+
+
+def client(task):
+    port, bodies, n_requests = task
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    for i in range(n_requests):
+        start = time.perf_counter()
+        if post(conn, bodies[i % len(bodies)]) != 200:
+            raise RuntimeError("/predict_posture failed under load")
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def drive(port, bodies, clients, requests_per_client):
+    with Pool(clients) as pool:
+        tasks = [(port, bodies[i::clients], requests_per_client) for i in range(clients)]
+        pool.map(client, [(port, bodies, 5)] * clients)  # warm up every connection path
+        start = time.perf_counter()
+        latencies = np.concatenate(pool.map(client, tasks))
+        return latencies, time.perf_counter() - start
+
+
+def run_config(command, env, bodies, args):
+    port = free_port()
+    env = dict(os.environ, **env, PORT=str(port), BEDROCK_FAKE="1")
+    # Own session, so the dev server's reloader child is stopped along with it
+    process = subprocess.Popen(command + (["--port", str(port)] if "serve.py" in command[1] else []),
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        cold_start = wait_ready(port, bodies[0], process, args.timeout)
+        latencies, elapsed = drive(port, bodies, args.clients, args.requests)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+    return cold_start, len(latencies) / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["keras", "onnx"])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for a server to answer")
+    args = parser.parse_args()
+
+    bodies = [json.dumps(frame) for frame in synthetic_frames(1000)[KEYPOINT_KEYS].to_dict("records")]
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes, {args.requests} requests each")
+    print(f"{'backend':8s} {'server':14s} {'cold start':>10s} {'req/s':>8s} {'p50':>9s} {'p99':>9s}")
+    for backend in args.backends:
+        configs = [("app.run", [sys.executable, os.path.join(SERVER_DIR, "app.py")])]
+        # serve.py refuses backends that can't be shared across fork(), so those only run on app.run
+        if backend not in FORK_UNSAFE_BACKENDS:
+            configs += [(f"serve.py x{n}", [sys.executable, os.path.join(SERVER_DIR, "serve.py"), "--workers", str(n)])
+                        for n in args.workers]
+        for name, command in configs:
+            cold_start, throughput, latencies = run_config(command, {"POSTURE_MODEL_BACKEND": backend}, bodies, args)
+            print(f"{backend:8s} {name:14s} {cold_start:9.2f}s {throughput:8.0f} "
+                  f"{np.percentile(latencies, 50) * 1e3:7.2f}ms {np.percentile(latencies, 99) * 1e3:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Repeatable performance benchmarks for features, model, HTTP API and frame loop.
+
+Synthetic frames are resampled from posture_data.csv. Results are written
+as JSON and can be compared against a stored baseline run:
+
+    python src/model/bench_suite.py --output bench.json
+    python src/model/bench_suite.py --baseline bench.json --output new.json
+
+Comparing exits with status 1 when a metric is worse than the baseline by
+more than --tolerance.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench_features import synthetic_frames
+from features import KEYPOINT_KEYS, extract_features
+from inference import load_posture_model
+
+
+def timed_runs(fn, min_time=0.5, min_runs=5):
+    # Calls fn repeatedly for at least min_time seconds, returns per-call latencies
+    latencies = []
+    deadline = time.perf_counter() + min_time
+    while len(latencies) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def metric(value, unit, better):
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix, latencies):
+    return {
+        f"{prefix}.p50": metric(np.percentile(latencies, 50) * 1e6, "us", "lower"),
+        f"{prefix}.p99": metric(np.percentile(latencies, 99) * 1e6, "us", "lower"),
+    }
+
+
+def bench_features(frames):
+    results = {}
+    single = frames.iloc[0].to_dict()
+    results.update(latency_metrics("features.single_frame", timed_runs(lambda: extract_features(single))))
+    for batch in [1_000, 100_000]:
+        chunk = frames.iloc[:batch]
+        latencies = timed_runs(lambda: extract_features(chunk))
+        results[f"features.batch_{batch}.rows_per_s"] = metric(batch / np.median(latencies), "rows/s", "higher")
+    return results
+
+
+def bench_inference(frames, backends, batch_sizes):
+    results = {}
+    features, valid = extract_features(frames)
+    features = features[valid]
+    for backend in backends:
+        model = load_posture_model(backend=backend)
+        for batch in batch_sizes:
+            x = features[:batch]
+            model.predict(x, verbose=0)
+            latencies = timed_runs(lambda: model.predict(x, verbose=0))
+            results.update(latency_metrics(f"inference.{backend}.batch_{batch}", latencies))
+    return results
+
+
+def bench_http(frames, concurrency, requests_per_client):
+    """Drives /predict_posture on a local threaded server from concurrent clients."""
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    bodies = [json.dumps(frame) for frame in frames[KEYPOINT_KEYS].head(1000).to_dict("records")]
+
+    def client(worker):
+        latencies = []
+        for i in range(requests_per_client):
+            body = bodies[(worker * requests_per_client + i) % len(bodies)]
+            start = time.perf_counter()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            conn.request("POST", "/predict_posture", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                raise RuntimeError(f"/predict_posture returned {response.status}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    client(0)  # warm up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.concatenate([np.array(l) for l in pool.map(client, range(concurrency))])
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    results = {f"http.predict_posture.c{concurrency}.requests_per_s": metric(len(latencies) / elapsed, "req/s", "higher")}
+    results.update(latency_metrics(f"http.predict_posture.c{concurrency}", latencies))
+    return results
+
+
+def bench_frame_loop(video):
+    """Runs the run_rl.py sequential loop headless over a recorded video."""
+    import cv2
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import run_rl
+
+    pose = run_rl.mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    model = load_posture_model(backend=os.environ.get("POSTURE_MODEL_BACKEND", "keras"))
+    cap = cv2.VideoCapture(video)
+    args = run_rl.parse_args(["--source", video, "--headless"])
+    start = time.perf_counter()
+    (frame_stats,) = run_rl.run_sequential(cap, pose, model, args)
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return {"frame_loop.fps": metric(frame_stats.count / elapsed, "fps", "higher")}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"  {name:48s} {current['value']:14.2f} {current['unit']:7s} (new)")
+            continue
+        ratio = current["value"] / previous["value"] if previous["value"] else float("inf")
+        worse = ratio > 1 + tolerance if current["better"] == "lower" else ratio < 1 - tolerance
+        flag = "  REGRESSION" if worse else ""
+        print(f"  {name:48s} {current['value']:14.2f} {current['unit']:7s} {ratio:6.2f}x baseline{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--backends", nargs="+", default=["numpy", "keras"],
+                        help="any of inference.BACKEND_PATHS, e.g. onnx tflite-fp16")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 4096])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per concurrent client")
+    parser.add_argument("--video", help="recorded video for the end-to-end run_rl.py loop")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["features", "inference", "http"])
+    args = parser.parse_args()
+
+    frames = synthetic_frames(100_000)
+    results = {}
+    if "features" not in args.skip:
+        results.update(bench_features(frames))
+    if "inference" not in args.skip:
+        results.update(bench_inference(frames, args.backends, args.batch_sizes))
+    if "http" not in args.skip:
+        results.update(bench_http(frames, args.concurrency, args.requests))
+    if args.video:
+        results.update(bench_frame_loop(args.video))
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "model_backend": os.environ.get("POSTURE_MODEL_BACKEND", "keras"),
+        },
+        "metrics": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, baseline, args.tolerance)
+    else:
+        for name, m in sorted(results.items()):
+            print(f"  {name:48s} {m['value']:14.2f} {m['unit']}")
+
+    if regressions:
+        sys.exit(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
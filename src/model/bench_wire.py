@@ -0,0 +1,64 @@
+"""Compare JSON and packed float32 payloads for /predict_posture.
+
+Reports request and response sizes, server-side decode/encode time, and
+full round trips through the Flask app (test client, so no socket time)
+for a few batch sizes of frames resampled from posture_data.csv.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+os.environ.setdefault("BEDROCK_FAKE", "1")
+os.environ.setdefault("POSTURE_MODEL_BACKEND", "numpy")
+
+import app
+import wire
+from bench_features import synthetic_frames
+from bench_suite import timed_runs
+from features import KEYPOINT_KEYS, to_keypoint_array
+
+
+def median_us(fn):
+    return float(np.median(timed_runs(fn, min_time=0.3))) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256])
+    args = parser.parse_args()
+
+    frames = synthetic_frames(max(args.batch_sizes))[KEYPOINT_KEYS]
+    client = app.app.test_client()
+
+    print(f"{'frames':>6s} {'format':6s} {'request':>9s} {'response':>9s} {'decode':>10s} "
+          f"{'encode':>10s} {'round trip':>11s}")
+    for n in args.batch_sizes:
+        records = frames.head(n).to_dict("records")
+        json_body = json.dumps(records[0] if n == 1 else {"frames": records}).encode()
+        binary_body = wire.encode_frames(frames.head(n).to_numpy())
+        path = "/predict_posture" if n == 1 else "/predict_posture_batch"
+
+        results = app.score_frames(to_keypoint_array(records))
+        json_response = json.dumps(results[0] if n == 1 else {"results": results}).encode()
+        binary_response = wire.encode_results(results)
+
+        def json_decode():
+            data = json.loads(json_body)
+            to_keypoint_array(data if n == 1 else data["frames"])
+
+        rows = [
+            ("json", json_body, json_response, json_decode, lambda: json.dumps(results).encode(),
+             lambda: client.post(path, data=json_body, content_type="application/json")),
+            ("binary", binary_body, binary_response, lambda: wire.decode_frames(binary_body),
+             lambda: wire.encode_results(results),
+             lambda: client.post(path, data=binary_body, content_type=wire.CONTENT_TYPE)),
+        ]
+        for name, request_body, response_body, decode, encode, round_trip in rows:
+            print(f"{n:6d} {name:6s} {len(request_body):8d}B {len(response_body):8d}B "
+                  f"{median_us(decode):8.1f}us {median_us(encode):8.1f}us {median_us(round_trip):9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import math
+
+
+class RunningStats:
+    """Count, mean and variance of a stream of values (Welford), in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class PostureCalibration:
+    """Shoulder and neck angle baseline for one camera stream.
+
+    The first `frames` angle pairs passed to update() build a running
+    baseline; from then on an angle more than `margin` degrees below its
+    baseline mean counts as poor posture. Each stream keeps its own object,
+    so several can be calibrated side by side, and reset() starts over.
+    """
+
+    def __init__(self, frames=30, margin=10.0):
+        self.frames = frames
+        self.margin = margin
+        self.reset()
+
+    def reset(self):
+        self.shoulder = RunningStats()
+        self.neck = RunningStats()
+
+    @property
+    def count(self):
+        return self.shoulder.count
+
+    @property
+    def calibrated(self):
+        return self.shoulder.count >= self.frames
+
+    @property
+    def shoulder_threshold(self):
+        return self.shoulder.mean - self.margin
+
+    @property
+    def neck_threshold(self):
+        return self.neck.mean - self.margin
+
+    def update(self, shoulder_angle, neck_angle):
+        """Adds a calibration frame; returns True on the frame that completes calibration."""
+        if self.calibrated:
+            return False
+        self.shoulder.add(shoulder_angle)
+        self.neck.add(neck_angle)
+        return self.calibrated
+
+    def is_poor(self, shoulder_angle, neck_angle):
+        return shoulder_angle < self.shoulder_threshold or neck_angle < self.neck_threshold
@@ -0,0 +1,64 @@
+import io
+import json
+import threading
+import time
+
+
+class FakeBedrockClient:
+    """Offline stand-in for the bedrock-runtime client used by app.py.
+
+    Answers invoke_model with a canned Mistral-shaped response after an
+    optional delay and counts how many times the model was called.
+    invoke_model_with_response_stream emits the same text one word per
+    chunk, token_latency seconds apart, so a full invoke_model call costs
+    latency plus one token_latency per word.
+    """
+
+    def __init__(self, latency=0.0, text="Keep your shoulders level and your head over your spine.",
+                 token_latency=0.0):
+        self.latency = latency
+        self.text = text
+        self.token_latency = token_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _completion(self, body):
+        prompt = json.loads(body).get("prompt", "")
+        return f"{self.text} ({len(prompt)} prompt chars)"
+
+    def invoke_model(self, modelId, body, contentType="application/json", accept="application/json"):
+        with self._lock:
+            self.calls += 1
+        text = self._completion(body)
+        time.sleep(self.latency + self.token_latency * len(text.split(" ")))
+        response = {"outputs": [{"text": text, "stop_reason": "stop"}]}
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId, body, contentType="application/json",
+                                          accept="application/json"):
+        with self._lock:
+            self.calls += 1
+        return {"body": FakeEventStream(self._completion(body).split(" "), self.latency, self.token_latency)}
+
+
+class FakeEventStream:
+    # Iterates Bedrock-style {"chunk": {"bytes": ...}} events; close() stops it early
+    def __init__(self, words, latency, token_latency):
+        self.words = words
+        self.latency = latency
+        self.token_latency = token_latency
+        self.closed = False
+
+    def __iter__(self):
+        time.sleep(self.latency)
+        for i, word in enumerate(self.words):
+            if self.closed:
+                return
+            time.sleep(self.token_latency)
+            last = i == len(self.words) - 1
+            chunk = {"outputs": [{"text": word if i == 0 else " " + word,
+                                  "stop_reason": "stop" if last else None}]}
+            yield {"chunk": {"bytes": json.dumps(chunk).encode("utf-8")}}
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,152 @@
+import sys
+
+import numpy as np
+
+# Video size followed by the 5 keypoints the model uses, x/y interleaved
+KEYPOINT_KEYS = [
+    "videoWidth", "videoHeight",
+    "nose_x", "nose_y",
+    "left_shoulder_x", "left_shoulder_y",
+    "right_shoulder_x", "right_shoulder_y",
+    "left_ear_x", "left_ear_y",
+    "right_ear_x", "right_ear_y",
+]
+
+FEATURE_NAMES = [
+    "dist_nose_shoulders",
+    "ratio_noseShoulders",
+    "neck_tilt_angle",
+    "dist_leftEar_nose",
+    "dist_rightEar_nose",
+    "angle_leftShoulder",
+    "angle_rightShoulder",
+]
+
+POSTURE_ISSUES = [
+    "Head Tilt Detected",
+    "Shoulders Uneven",
+    "Head Too Low",
+    "Head Too Far Forward",
+]
+
+
+def distance2D(x1, y1, x2, y2):
+    return np.hypot(x2 - x1, y2 - y1)
+
+
+def angleABC(Ax, Ay, Bx, By, Cx, Cy):
+    ABx, ABy = Ax - Bx, Ay - By
+    CBx, CBy = Cx - Bx, Cy - By
+    dot = ABx * CBx + ABy * CBy
+    mag = np.hypot(ABx, ABy) * np.hypot(CBx, CBy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosTheta = np.clip(dot / mag, -1, 1)
+    return np.where(mag == 0, 180.0, np.degrees(np.arccos(cosTheta)))
+
+
+def _to_float(value):
+    # Same result as pd.to_numeric(errors="coerce") for the values a JSON frame can hold
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def to_keypoint_array(data):
+    """Converts frames to a 2-D float array in KEYPOINT_KEYS order.
+
+    Accepts a DataFrame, a list of frame dicts or a single frame (dict or
+    Series); missing or non-numeric values become NaN. Numeric arrays are
+    returned as-is with at least two dimensions. Dict frames are converted
+    without pandas, which is only imported by callers that pass pandas
+    objects.
+    """
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(data, pd.DataFrame):
+        df = data.reindex(columns=KEYPOINT_KEYS)
+        return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    if isinstance(data, dict) or (pd is not None and isinstance(data, pd.Series)):
+        data = [data]
+    if isinstance(data, list) and all(isinstance(frame, dict) or (pd is not None and isinstance(frame, pd.Series))
+                                      for frame in data):
+        return np.array([[_to_float(frame.get(key)) for key in KEYPOINT_KEYS] for frame in data],
+                        dtype=np.float64).reshape(len(data), len(KEYPOINT_KEYS))
+    return np.atleast_2d(np.asarray(data, dtype=np.float64))
+
+
+def normalize_keypoints(kp):
+    # (N, 12) pixel keypoints with video size -> (N, 10) normalized keypoints
+    kp = np.atleast_2d(kp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = np.empty((kp.shape[0], 10))
+        normalized[:, 0::2] = kp[:, 2::2] / kp[:, 0:1]
+        normalized[:, 1::2] = kp[:, 3::2] / kp[:, 1:2]
+    return normalized
+
+
+def compute_features(points):
+    """Computes the 7 model features from an (N, 10) keypoint array.
+
+    Returns the (N, 7) feature matrix and a boolean mask of the rows whose
+    keypoints were all finite; features of invalid rows are NaN.
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    noseX, noseY, lshoX, lshoY, rshoX, rshoY, learX, learY, rearX, rearY = points.T
+
+    mshoX, mshoY = (lshoX + rshoX) / 2, (lshoY + rshoY) / 2
+    dist_nose_shoulders = distance2D(noseX, noseY, mshoX, mshoY)
+    shoulder_width = distance2D(lshoX, lshoY, rshoX, rshoY)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio_noseShoulders = np.where(shoulder_width > 0, dist_nose_shoulders / shoulder_width, 0.0)
+
+    features = np.column_stack([
+        dist_nose_shoulders,
+        ratio_noseShoulders,
+        angleABC(learX, learY, noseX, noseY, rearX, rearY),
+        distance2D(learX, learY, noseX, noseY),
+        distance2D(rearX, rearY, noseX, noseY),
+        angleABC(learX, learY, lshoX, lshoY, noseX, noseY),
+        angleABC(rearX, rearY, rshoX, rshoY, noseX, noseY),
+    ])
+    valid = np.isfinite(points).all(axis=1)
+    features[~valid] = np.nan
+    return features, valid
+
+
+def extract_features(data):
+    """Extracts model features from frames in any supported input form.
+
+    DataFrames, frame dicts and (N, 12) arrays carry pixel coordinates plus
+    video size and are normalized first; an (N, 10) array or a single
+    10-value frame is taken as already-normalized keypoints.
+    """
+    kp = to_keypoint_array(data)
+    if kp.shape[1] == 10:
+        return compute_features(kp)
+    return compute_features(normalize_keypoints(kp))
+
+
+def detect_issues(points, y_scale=1.0):
+    """Flags the four posture issues for an (N, 10) keypoint array.
+
+    The ear/shoulder level thresholds are in pixels, so normalized keypoints
+    need the frame height passed as y_scale. Returns an (N, 4) boolean array
+    in POSTURE_ISSUES order.
+    """
+    points = np.atleast_2d(points)
+    nose_x, nose_y, lsho_x, lsho_y, rsho_x, rsho_y, _, lear_y, _, rear_y = points.T
+
+    msho_x, msho_y = (lsho_x + rsho_x) / 2, (lsho_y + rsho_y) / 2
+    shoulder_width = distance2D(lsho_x, lsho_y, rsho_x, rsho_y)
+    head_height = distance2D(nose_x, nose_y, msho_x, msho_y)
+
+    return np.column_stack([
+        np.abs(lear_y - rear_y) * y_scale > 15,
+        np.abs(lsho_y - rsho_y) * y_scale > 20,
+        head_height < shoulder_width * 0.6,
+        head_height > shoulder_width * 1.2,
+    ])
+
+
+def issue_names(flags):
+    return [name for name, flag in zip(POSTURE_ISSUES, flags) if flag]
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+
+import h5py
+import numpy as np
+
+DEFAULT_MODEL_PATH = "src/model/posture_model.h5"
+
+# Activations used by the posture network
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "sigmoid": lambda x: np.reciprocal(1 + np.exp(-x, out=x), out=x),
+    "linear": lambda x: x,
+}
+
+
+class NumpyPostureModel:
+    """Forward pass of the Dense posture MLP using plain NumPy matmuls.
+
+    Weights are read once from the Keras .h5 file (or the .npz bundle written
+    by convert_model.py) into contiguous float32 arrays, so predictions need
+    neither TensorFlow nor graph dispatch.
+    """
+
+    def __init__(self, path=DEFAULT_MODEL_PATH):
+        self.layers = [(kernel, bias, ACTIVATIONS[activation])
+                       for kernel, bias, activation in (read_npz_layers(path) if path.endswith(".npz")
+                                                        else read_h5_layers(path))]
+
+    def predict(self, x, verbose=0):
+        # Same call shape as keras Model.predict: (N, 7) in, (N, 1) out
+        out = np.asarray(x, dtype=np.float32)
+        if out.ndim == 1:
+            out = out[np.newaxis, :]
+        for kernel, bias, activation in self.layers:
+            out = out @ kernel
+            out += bias
+            out = activation(out)
+        return out
+
+
+def read_h5_layers(path):
+    """Returns [(kernel, bias, activation name)] for each Dense layer of a Keras .h5 model."""
+    layers = []
+    with h5py.File(path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        dense_configs = [layer["config"] for layer in config["config"]["layers"]
+                         if layer["class_name"] == "Dense"]
+        weights = f["model_weights"]
+        for layer_config in dense_configs:
+            group = weights[layer_config["name"]]
+            names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs["weight_names"]]
+            kernel = np.ascontiguousarray(group[next(n for n in names if n.endswith("kernel"))], dtype=np.float32)
+            bias = np.ascontiguousarray(group[next(n for n in names if n.endswith("bias"))], dtype=np.float32)
+            activation = layer_config["activation"]
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{activation}' in layer {layer_config['name']}")
+            layers.append((kernel, bias, activation))
+    return layers
+
+
+def read_npz_layers(path):
+    with np.load(path) as bundle:
+        activations = [str(a) for a in bundle["activations"]]
+        return [(np.ascontiguousarray(bundle[f"kernel_{i}"]), np.ascontiguousarray(bundle[f"bias_{i}"]), activation)
+                for i, activation in enumerate(activations)]
+
+
+class TFLitePostureModel:
+    """Runs a .tflite export (float16 or int8) with the TFLite interpreter.
+
+    Resizing and reallocating an interpreter costs far more than scoring a
+    few padded rows, so each bucket size gets its own interpreter allocated
+    once. A batch is zero-padded up to the smallest bucket that fits, and
+    batches larger than the biggest bucket run in chunks of that size.
+    """
+
+    def __init__(self, path, buckets=(1, 8, 64)):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.buckets = sorted(buckets)
+        self.interpreters = {}
+        for size in self.buckets:
+            interpreter = Interpreter(model_path=path, num_threads=1)
+            input_details = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(input_details["index"], (size, input_details["shape"][-1]))
+            interpreter.allocate_tensors()
+            self.interpreters[size] = (interpreter, input_details["index"],
+                                       interpreter.get_output_details()[0]["index"], threading.Lock())
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[np.newaxis, :]
+        largest = self.buckets[-1]
+        if len(x) > largest:
+            return np.concatenate([self._run(x[i:i + largest]) for i in range(0, len(x), largest)])
+        return self._run(x)
+
+    def _run(self, x):
+        rows = len(x)
+        size = next(size for size in self.buckets if size >= rows)
+        interpreter, input_index, output_index, lock = self.interpreters[size]
+        if rows < size:
+            x = np.concatenate([x, np.zeros((size - rows, x.shape[1]), dtype=np.float32)])
+        with lock:
+            interpreter.set_tensor(input_index, x)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index)[:rows].copy()
+
+
+class OnnxPostureModel:
+    """Runs the .onnx export with onnxruntime."""
+
+    def __init__(self, path):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[np.newaxis, :]
+        return self.session.run(None, {self.input_name: x})[0]
+
+
+# Default artifact per backend; everything except the .h5 is written by convert_model.py
+BACKEND_PATHS = {
+    "keras": DEFAULT_MODEL_PATH,
+    "numpy": DEFAULT_MODEL_PATH,
+    "npz": "src/model/posture_model.npz",
+    "tflite-fp16": "src/model/posture_model_fp16.tflite",
+    "tflite-int8": "src/model/posture_model_int8.tflite",
+    "onnx": "src/model/posture_model.onnx",
+}
+
+
+# Models loaded by preload_posture_model, handed out instead of loading again
+_preloaded = {}
+
+
+def preload_posture_model(path=None, backend="keras"):
+    """Loads and warms a model once, so later load_posture_model calls in this
+    process (or in processes forked from it) reuse the same weights."""
+    model = load_posture_model(path, backend)
+    model.predict(np.zeros((1, 7), dtype=np.float32), verbose=0)
+    _preloaded[(path or BACKEND_PATHS[backend], backend)] = model
+    return model
+
+
+def load_posture_model(path=None, backend="keras"):
+    # TensorFlow is only imported when the keras or tflite backends are requested
+    if backend not in BACKEND_PATHS:
+        raise ValueError(f"Unknown model backend '{backend}', expected one of {', '.join(BACKEND_PATHS)}")
+    path = path or BACKEND_PATHS[backend]
+    if (path, backend) in _preloaded:
+        return _preloaded[(path, backend)]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No model at {path} for backend '{backend}' (run src/convert_model.py)")
+    if backend in ("numpy", "npz"):
+        return NumpyPostureModel(path)
+    if backend.startswith("tflite"):
+        return TFLitePostureModel(path)
+    if backend == "onnx":
+        return OnnxPostureModel(path)
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
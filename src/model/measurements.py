@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+
+from features import POSTURE_ISSUES
+
+# posture_measurements columns (src/types/database.ts); JSON columns are stored as text
+COLUMNS = ["session_id", "user_id", "posture_score", "head_position", "shoulder_position", "spine_alignment",
+           "posture_issues", "head_tilt_detected", "shoulders_uneven", "head_too_low", "head_too_forward",
+           "created_at"]
+ISSUE_COLUMNS = dict(zip(POSTURE_ISSUES, ["head_tilt_detected", "shoulders_uneven", "head_too_low",
+                                          "head_too_forward"]))
+
+
+def point(x, y):
+    return {"x": float(x), "y": float(y), "score": None}
+
+
+def measurement_row(session_id, user_id, keypoints, result, timestamp):
+    """Builds a posture_measurements row from one (12,) keypoint row and its score_frames result."""
+    issues = result["posture_issues"]
+    return (
+        session_id,
+        user_id,
+        result["posture_score"],
+        json.dumps(point(keypoints[2], keypoints[3])),
+        json.dumps({"left": point(keypoints[4], keypoints[5]), "right": point(keypoints[6], keypoints[7])}),
+        None,
+        json.dumps(issues),
+        *(name in issues for name in ISSUE_COLUMNS),
+        datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+    )
+
+
+class SQLiteMeasurementSink:
+    """posture_measurements table in a local SQLite file, standing in for Supabase."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS posture_measurements "
+                        "(id INTEGER PRIMARY KEY, session_id TEXT, user_id TEXT, posture_score INTEGER, "
+                        "head_position TEXT, shoulder_position TEXT, spine_alignment TEXT, posture_issues TEXT, "
+                        "head_tilt_detected INTEGER, shoulders_uneven INTEGER, head_too_low INTEGER, "
+                        "head_too_forward INTEGER, created_at TEXT)")
+        self.db.commit()
+        self.insert_sql = (f"INSERT INTO posture_measurements ({', '.join(COLUMNS)}) "
+                           f"VALUES ({', '.join('?' * len(COLUMNS))})")
+        self.lock = threading.Lock()
+
+    def write_many(self, rows):
+        # One transaction per batch
+        with self.lock, self.db:
+            self.db.executemany(self.insert_sql, rows)
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM posture_measurements").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+class WriteBehindBuffer:
+    """Queues rows in memory and writes them to a sink in bulk from a background thread.
+
+    A batch is written as soon as max_batch rows are queued or flush_interval
+    seconds after the oldest queued row, whichever comes first. When
+    max_pending rows are already waiting (the sink is slower than the
+    producers), put blocks for up to put_timeout seconds and then drops the
+    row. Failed batches stay queued and are retried after retry_delay.
+    close() writes everything still queued before returning.
+    """
+
+    def __init__(self, sink, max_batch=500, flush_interval=1.0, max_pending=50_000, put_timeout=0.5,
+                 retry_delay=1.0):
+        if max_batch > max_pending:
+            raise ValueError("max_batch must not exceed max_pending")
+        self.sink = sink
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.retry_delay = retry_delay
+        self._rows = deque()
+        self._oldest = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "dropped": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="measurement-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        return self.put_many([row]) == 1
+
+    def put_many(self, rows):
+        """Queues rows and returns how many were accepted (the rest were dropped under backpressure)."""
+        accepted = 0
+        with self._cond:
+            was_empty = not self._rows
+            for row in rows:
+                if len(self._rows) >= self.max_pending:
+                    deadline = time.monotonic() + self.put_timeout
+                    while len(self._rows) >= self.max_pending and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if len(self._rows) >= self.max_pending or self._closed:
+                        self.stats["dropped"] += len(rows) - accepted
+                        break
+                if self._closed:
+                    self.stats["dropped"] += len(rows) - accepted
+                    break
+                if not self._rows:
+                    self._oldest = time.monotonic()
+                self._rows.append(row)
+                accepted += 1
+            self.stats["queued"] += accepted
+            # The writer sleeps without a deadline while empty, and until the deadline otherwise
+            if accepted and (was_empty or len(self._rows) >= self.max_batch):
+                self._cond.notify_all()
+        return accepted
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self.stats, pending=len(self._rows))
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Wait until a full batch, the oldest row's deadline, or close
+                while not self._closed and len(self._rows) < self.max_batch:
+                    if self._rows:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if not self._rows:
+                    return  # closed and drained
+                batch = list(islice(self._rows, self.max_batch))
+
+            try:
+                self.sink.write_many(batch)
+            except Exception:
+                with self._cond:
+                    self.stats["errors"] += 1
+                    closed = self._closed
+                if closed:
+                    return  # keep shutdown bounded; the unwritten rows stay counted as pending
+                time.sleep(self.retry_delay)
+                continue
+
+            with self._cond:
+                for _ in batch:
+                    self._rows.popleft()
+                self._oldest = time.monotonic() if self._rows else None
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                # Wake producers blocked on a full buffer
+                self._cond.notify_all()
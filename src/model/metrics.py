@@ -0,0 +1,124 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from 50us up to 10s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram; also keeps a moving average for overlays."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, smoothing=0.1):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = None
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self.recent = value if self.recent is None else self.recent + self.smoothing * (value - self.recent)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set_total(self, value):
+        # Mirrors a running total kept elsewhere (e.g. a cache's own stats)
+        with self._lock:
+            self.value = value
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+
+class MetricsRegistry:
+    """Named metric families with labels, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        if family is None or key not in family["series"]:
+            with self._lock:
+                family = self._families.setdefault(name, {"kind": kind, "help": help_text, "series": {}})
+                family["series"].setdefault(key, factory())
+        return family["series"][key]
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def counter(self, name, help_text="", **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text="", **labels):
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    @contextmanager
+    def time(self, name, help_text="", **labels):
+        histogram = self.histogram(name, help_text, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def series(self, name):
+        # {labels: metric} for one family, used by the run_rl.py overlay
+        with self._lock:
+            family = self._families.get(name)
+            return dict(family["series"]) if family else {}
+
+    def render(self):
+        # Series are created lazily by request threads, so copy the families under the lock
+        # and format outside it
+        with self._lock:
+            families = [(name, dict(family, series=sorted(family["series"].items())))
+                        for name, family in sorted(self._families.items())]
+        lines = []
+        for name, family in families:
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for labels, series in family["series"]:
+                if family["kind"] == "histogram":
+                    with series._lock:
+                        counts, total, count = list(series.counts), series.sum, series.count
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(series.buckets) + ["+Inf"], counts):
+                        cumulative += bucket_count
+                        bucket_labels = _format_labels(labels + (("le", bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {series.value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,73 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer.
+
+    Used between pipeline stages so a slow consumer always sees the freshest
+    frame and stale frames never pile up.
+    """
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item, drop=True):
+        # drop=False blocks like a normal queue, for offline sources where every frame counts
+        if not drop:
+            self._queue.put(item)
+            return
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class StageStats:
+    """Throughput and latency of one pipeline stage."""
+
+    def __init__(self, name, window=1000):
+        self.name = name
+        self.count = 0
+        self.started = None
+        self.finished = None
+        self._latencies = np.zeros(window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        now = time.perf_counter()
+        with self._lock:
+            if self.started is None:
+                self.started = now - latency
+            self.finished = now
+            self._latencies[self.count % len(self._latencies)] = latency
+            self.count += 1
+
+    def fps(self):
+        with self._lock:
+            if self.count == 0 or self.finished == self.started:
+                return 0.0
+            return self.count / (self.finished - self.started)
+
+    def summary(self):
+        with self._lock:
+            latencies = self._latencies[:min(self.count, len(self._latencies))]
+        if len(latencies) == 0:
+            return f"{self.name:10s} no frames"
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        return f"{self.name:10s} {self.count:6d} frames {self.fps():7.1f} fps  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms"
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def quantized_keys(kp, step):
+    """One hashable bucket per (N, 12) keypoint row, or None for rows that can't be scored.
+
+    Keypoints are normalized by the video size and rounded to multiples of
+    step; the video size stays in the key because the issue thresholds are
+    in pixels.
+    """
+    # Same buckets as rint(normalize_keypoints(kp) / step), in fewer passes for single frames
+    scale = np.ones_like(kp)
+    scale[:, 2::2] = kp[:, :1] * step
+    scale[:, 3::2] = kp[:, 1:2] * step
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buckets = np.rint(kp / scale) + 0.0  # + 0.0 folds -0.0 into 0.0
+    valid = np.isfinite(buckets).all(axis=1)
+    return [row.tobytes() if ok else None for row, ok in zip(buckets, valid.tolist())]
+
+
+class PredictionCache:
+    """LRU + TTL cache of frame results keyed on quantized keypoints.
+
+    A frame whose normalized keypoints round to an already-scored bucket
+    gets that bucket's score and issues back without running features or
+    the model. Entries are scoped to a session (frames without one share a
+    scope) and expire ttl seconds after they were scored, so a user who
+    stays still is re-scored at least that often; at most maxsize entries
+    are kept across all sessions.
+    """
+
+    def __init__(self, step=0.005, maxsize=10000, ttl=30.0):
+        self.step = step
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    def score(self, kp, session_id, score_fn):
+        """Returns score_fn(kp)-style results, calling score_fn only on the rows that missed."""
+        keys = quantized_keys(kp, self.step)
+        results = [None] * len(kp)
+        misses = []
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._get((session_id, key), now) if key is not None else None
+                if value is None:
+                    misses.append(i)
+                else:
+                    results[i] = value
+            self.stats["hits"] += len(kp) - len(misses)
+            self.stats["misses"] += len(misses)
+
+        if misses:
+            scored = score_fn(kp[misses])
+            with self._lock:
+                for i, result in zip(misses, scored):
+                    results[i] = result
+                    if keys[i] is not None and result is not None:
+                        self._put((session_id, keys[i]), result, now)
+        return results
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # The helpers below are called with self._lock held
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if now - created > self.ttl:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key, value, now):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -0,0 +1,241 @@
+import os
+import time
+import uuid
+
+import numpy as np
+
+MAGIC = b"PPLMREC1"
+HEADER_SIZE = 64
+NUM_LANDMARKS = 33  # MediaPipe Pose
+
+# One fixed-size record per analyzed frame; detected is 0 when no pose was found
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("detected", "<u4"),
+    ("landmarks", "<f4", (NUM_LANDMARKS, 4)),  # normalized x, y, z, visibility
+])
+
+# <path>.idx: one entry per recorded session, appended when the session starts
+INDEX_DTYPE = np.dtype([
+    ("session_id", "S32"),
+    ("first_record", "<u8"),
+    ("started", "<f8"),
+])
+
+# MediaPipe Pose indices of the features.KEYPOINT_KEYS landmarks: nose, shoulders, ears
+POSE_KEYPOINTS = [0, 11, 12, 7, 8]
+
+
+def _header():
+    header = MAGIC + np.array([RECORD_DTYPE.itemsize, NUM_LANDMARKS], dtype="<u4").tobytes()
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def _check_header(path, header):
+    record_size, landmarks = np.frombuffer(header[len(MAGIC):len(MAGIC) + 8], dtype="<u4")
+    if header[:len(MAGIC)] != MAGIC or record_size != RECORD_DTYPE.itemsize or landmarks != NUM_LANDMARKS:
+        raise ValueError(f"{path} is not a landmark recording in this format")
+
+
+def landmark_array(landmarks):
+    """(33, 4) float32 array from a MediaPipe landmark list (or anything with that shape)."""
+    if hasattr(landmarks, "landmark"):
+        landmarks = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark]
+    return np.asarray(landmarks, dtype=np.float32).reshape(NUM_LANDMARKS, 4)
+
+
+class LandmarkRecorder:
+    """Appends one session of per-frame pose landmarks to a recording file.
+
+    The file is a 64-byte header followed by RECORD_DTYPE records and only
+    ever grows; every recorder adds a session entry to <path>.idx pointing
+    at its first record. A record torn by a crash is cut off when the file
+    is next opened for recording. One recorder should write a file at a time.
+    """
+
+    def __init__(self, path, session_id=None, flush_every=30):
+        self.path = path
+        self.session_id = session_id or uuid.uuid4().hex
+        self.flush_every = flush_every
+        self.count = 0
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+
+        self._file = open(path, "a+b")
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            self._file.write(_header())
+        else:
+            self._file.seek(0)
+            _check_header(path, self._file.read(HEADER_SIZE))
+            whole = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize + HEADER_SIZE
+            if whole != size:
+                self._file.truncate(whole)
+        self.first_record = (self._file.seek(0, os.SEEK_END) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+        entry = np.array([(self.session_id.encode()[:32], self.first_record, time.time())], dtype=INDEX_DTYPE)
+        with open(path + ".idx", "ab") as f:
+            f.write(entry.tobytes())
+
+    def record(self, landmarks, width, height, timestamp=None):
+        """Appends one frame; landmarks is None when no pose was detected."""
+        record = self._record[0]
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["width"], record["height"] = width, height
+        record["detected"] = landmarks is not None
+        record["landmarks"] = landmark_array(landmarks) if landmarks is not None else 0
+        self._file.write(self._record.tobytes())
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkRecording:
+    """Read-only, memory-mapped view of a recording file.
+
+    `records` maps every whole record in the file, so slicing it or taking
+    a field (records["landmarks"]) never copies; `session()` returns such a
+    slice for one recorded session. A session being recorded into the same
+    file is visible up to the records written when this was opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            _check_header(path, f.read(HEADER_SIZE))
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)  # mmap cannot map an empty range
+
+        index_path = path + ".idx"
+        index = np.fromfile(index_path, dtype=INDEX_DTYPE) if os.path.exists(index_path) else None
+        if index is None or not len(index):
+            index = np.array([(b"", 0, 0.0)], dtype=INDEX_DTYPE)
+        # A session runs until the next one starts; drop entries past the end (torn writes)
+        index = index[index["first_record"] <= count]
+        ends = np.append(index["first_record"][1:], count)
+        self.sessions = [(sid.decode(), int(start), int(end), float(started))
+                         for sid, start, end, started in zip(index["session_id"], index["first_record"], ends,
+                                                             index["started"])]
+
+    def __len__(self):
+        return len(self.records)
+
+    def session_ids(self):
+        return [session_id for session_id, *_ in self.sessions]
+
+    def session(self, key=-1):
+        """Records of one session, by position in the index or by session id (default: the last one)."""
+        if isinstance(key, str):
+            matches = [s for s in self.sessions if s[0] == key]
+            if not matches:
+                raise KeyError(key)
+            _, start, end, _ = matches[-1]
+        else:
+            _, start, end, _ = self.sessions[key]
+        return self.records[start:end]
+
+    def close(self):
+        mmap = getattr(self.records, "_mmap", None)
+        self.records = None
+        if mmap is not None:
+            mmap.close()
+
+
+def keypoints(records):
+    """(N, 12) pixel keypoints in KEYPOINT_KEYS order; rows without a detected pose are NaN."""
+    width = records["width"].astype(np.float64)
+    height = records["height"].astype(np.float64)
+    points = records["landmarks"][:, POSE_KEYPOINTS, :2].astype(np.float64)
+    points[..., 0] *= width[:, None]
+    points[..., 1] *= height[:, None]
+    kp = np.concatenate([width[:, None], height[:, None], points.reshape(len(records), -1)], axis=1)
+    kp[records["detected"] == 0, 2:] = np.nan
+    return kp
+
+
+class LandmarkReplay:
+    """Plays recorded frames back in place of a camera and pose detector.
+
+    read() returns (ok, frame, results): a blank frame of the recorded size
+    and a MediaPipe-style results object whose pose_landmarks is the
+    recorded landmark list (None when no pose was detected). With realtime,
+    frames are released at the recorded pace (scaled by speed); otherwise
+    as fast as the caller reads them. clock() is the recorded time of the
+    last frame read, so cooldowns and rates replay the same at any speed.
+    """
+
+    def __init__(self, records, realtime=False, speed=1.0):
+        self.records = records
+        self.realtime = realtime
+        self.speed = speed
+        self.position = 0
+        self._start = None
+        self._blank = {}
+
+    def isOpened(self):
+        return self.position < len(self.records)
+
+    def clock(self):
+        return float(self.records["timestamp"][max(0, self.position - 1)]) if len(self.records) else 0.0
+
+    def fps(self):
+        span = float(self.records["timestamp"][-1] - self.records["timestamp"][0]) if len(self.records) > 1 else 0.0
+        return (len(self.records) - 1) / span if span > 0 else 30.0
+
+    def read(self):
+        if not self.isOpened():
+            return False, None, None
+        record = self.records[self.position]
+        self.position += 1
+        if self.realtime:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now - (record["timestamp"] - self.records["timestamp"][0]) / self.speed
+            delay = self._start + (record["timestamp"] - self.records["timestamp"][0]) / self.speed - now
+            if delay > 0:
+                time.sleep(delay)
+
+        # Callers draw on the frame, so each one is a fresh copy of a cached blank image
+        size = (int(record["height"]), int(record["width"]))
+        if size not in self._blank:
+            self._blank[size] = np.zeros(size + (3,), dtype=np.uint8)
+        return True, self._blank[size].copy(), ReplayResults(record["landmarks"] if record["detected"] else None)
+
+    def release(self):
+        self.position = len(self.records)
+
+
+class ReplayResults:
+    # Same shape as the object mp.solutions.pose.Pose.process returns; the protobuf is built on first use,
+    # numeric consumers can read the (33, 4) landmarks array directly
+    def __init__(self, landmarks):
+        self.landmarks = landmarks
+        self._proto = None
+
+    @property
+    def pose_landmarks(self):
+        if self.landmarks is None:
+            return None
+        if self._proto is None:
+            from mediapipe.framework.formats import landmark_pb2
+            self._proto = landmark_pb2.NormalizedLandmarkList(landmark=[
+                landmark_pb2.NormalizedLandmark(x=x, y=y, z=z, visibility=visibility)
+                for x, y, z, visibility in self.landmarks.tolist()])
+        return self._proto
@@ -0,0 +1,163 @@
+"""Pre-fork production server for the posture API.
+
+The parent process imports the web stack, loads and warms the posture
+model once, binds the listening socket and then forks --workers children.
+Each child imports app.py (which picks up the preloaded model instead of
+loading it again) and serves the shared socket with a threaded werkzeug
+server, so the weights and the imported modules are shared copy-on-write
+and the kernel spreads connections across processes. Dead workers are
+replaced; SIGTERM or Ctrl-C stops them all, letting each flush its session
+and measurement buffers on the way out.
+
+    python src/model/serve.py --workers 4 --port 5000 --backend onnx
+
+TensorFlow's runtime does not survive fork(): a Keras model warmed in the
+parent hangs on its first call in a child, so the keras backend is refused.
+Without --backend (or POSTURE_MODEL_BACKEND) the server uses the npz bundle
+from convert_model.py, or reads the same weights straight from the .h5 with
+the numpy backend when there is no bundle; neither needs TensorFlow.
+
+Run it from the repository root like app.py. Per-process state (micro-batch
+queues, the Mistral cache) is local to each worker. Session aggregates go
+to one SQLite file that every worker shares (--session-store, default
+SESSION_STORE_PATH or src/model/sessions.sqlite3), so /sessions/<id>/summary
+merges all workers' rows and a session gets one measurement per second
+whichever workers serve its frames.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+log = logging.getLogger("posture.serve")
+
+# Backends whose loaded models cannot be used across fork()
+FORK_UNSAFE_BACKENDS = {"keras"}
+
+DEFAULT_SESSION_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.sqlite3")
+
+
+def default_backend():
+    import inference
+
+    return "npz" if os.path.exists(inference.BACKEND_PATHS["npz"]) else "numpy"
+
+
+def preload(model_path, backend):
+    # Everything imported here is shared with the workers. app itself is
+    # imported after the fork: it starts threads and opens SQLite files,
+    # neither of which survive fork().
+    import flask  # noqa: F401
+    import flask_cors  # noqa: F401
+    import flask_sock  # noqa: F401
+    import numpy  # noqa: F401
+    import werkzeug.serving  # noqa: F401
+
+    import inference
+
+    start = time.perf_counter()
+    inference.preload_posture_model(model_path, backend)
+    log.info("Loaded and warmed the %s model in %.2fs", backend, time.perf_counter() - start)
+
+
+def run_worker(sock, host, port):
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    import app
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, app.app, threaded=True, fd=sock.fileno())
+    log.info("Worker %d serving", os.getpid())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default=os.environ.get("POSTURE_MODEL_BACKEND"),
+                        help="model backend shared by the workers (default: npz if exported, else numpy)")
+    parser.add_argument("--session-store", default=os.environ.get("SESSION_STORE_PATH") or DEFAULT_SESSION_STORE_PATH,
+                        help="SQLite file the workers share session aggregates through")
+    parser.add_argument("--backlog", type=int, default=256, help="listen queue length")
+    parser.add_argument("--graceful-timeout", type=float, default=10.0,
+                        help="seconds to wait for workers to exit before killing them")
+    args = parser.parse_args()
+    backend = args.backend or default_backend()
+    if backend in FORK_UNSAFE_BACKENDS:
+        parser.error(f"the {backend} backend can't be shared across fork(); pass --backend npz, numpy, onnx, "
+                     "tflite-fp16 or tflite-int8 (src/convert_model.py writes the exports)")
+    # The workers' app.py reads the backend and the shared session store from the environment
+    os.environ["POSTURE_MODEL_BACKEND"] = backend
+    os.environ["SESSION_STORE_PATH"] = args.session_store
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(message)s")
+
+    preload(os.environ.get("POSTURE_MODEL_PATH"), backend)
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    log.info("Listening on http://%s:%d with %d workers", args.host, sock.getsockname()[1], args.workers)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    workers = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, args.host, args.port)
+        workers[pid] = time.monotonic()
+
+    for _ in range(args.workers):
+        spawn()
+
+    while not stopping:
+        time.sleep(0.2)
+        while workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            started = workers.pop(pid, None)
+            if stopping or started is None:
+                continue
+            log.warning("Worker %d exited with status %d, restarting", pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)  # don't spin on a worker that crashes at import
+            spawn()
+
+    log.info("Stopping %d workers", len(workers))
+    for pid in workers:
+        os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + args.graceful_timeout
+    while workers and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.pop(pid, None)
+        else:
+            time.sleep(0.05)
+    for pid in workers:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import copy
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from features import POSTURE_ISSUES
+
+ISSUE_INDEX = {name: i for i, name in enumerate(POSTURE_ISSUES)}
+
+
+class SessionAggregate:
+    """Running summary of one session's scored frames.
+
+    Every frame updates the count, the score mean/variance (Welford), the
+    issue counters and one time bucket in constant time, so a summary costs
+    the same after ten frames as after ten hours. Frames also count as a
+    stored measurement at most once per measurement_interval seconds, the
+    cadence Analysis.tsx stores posture_measurements rows at, so
+    measurement_count means the same thing as a count of those rows.
+    """
+
+    def __init__(self, session_id, bucket_seconds=60, measurement_interval=1.0):
+        self.session_id = session_id
+        self.bucket_seconds = bucket_seconds
+        self.measurement_interval = measurement_interval
+        self.count = 0
+        self.measurements = 0
+        self.last_measurement_at = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_score = None
+        self.max_score = None
+        self.good = 0
+        self.issue_counts = [0] * len(POSTURE_ISSUES)
+        self.started_at = None
+        self.last_at = None
+        # bucket start time -> [frames, score sum, issue counts...]
+        self.buckets = {}
+
+    def add(self, score, issues, timestamp, good=False, claim=None):
+        # True when this frame is also a stored measurement. claim(session_id, timestamp), when given,
+        # returns (won, latest measurement time of any worker), so workers sharing a session take
+        # one measurement between them
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (score - self.mean)
+        self.min_score = score if self.min_score is None else min(self.min_score, score)
+        self.max_score = score if self.max_score is None else max(self.max_score, score)
+        self.good += bool(good)
+        if self.started_at is None:
+            self.started_at = timestamp
+        self.last_at = timestamp
+
+        start = int(timestamp // self.bucket_seconds * self.bucket_seconds)
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = [0, 0.0] + [0] * len(POSTURE_ISSUES)
+        bucket[0] += 1
+        bucket[1] += score
+        for issue in issues:
+            index = ISSUE_INDEX.get(issue)
+            if index is not None:
+                self.issue_counts[index] += 1
+                bucket[2 + index] += 1
+
+        if self.last_measurement_at is None or timestamp - self.last_measurement_at >= self.measurement_interval:
+            won, last_at = claim(self.session_id, timestamp) if claim is not None else (True, timestamp)
+            # After a lost claim the next attempt waits for the winner's interval to pass
+            self.last_measurement_at = last_at
+            if won:
+                self.measurements += 1
+                return True
+        return False
+
+    def merge(self, other):
+        # Combines another worker's aggregate of the same session (Chan et al. for the variance)
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.measurements += other.measurements
+        if other.last_measurement_at is not None:
+            self.last_measurement_at = (other.last_measurement_at if self.last_measurement_at is None
+                                        else max(self.last_measurement_at, other.last_measurement_at))
+        self.min_score = other.min_score if self.min_score is None else min(self.min_score, other.min_score)
+        self.max_score = other.max_score if self.max_score is None else max(self.max_score, other.max_score)
+        self.good += other.good
+        self.issue_counts = [a + b for a, b in zip(self.issue_counts, other.issue_counts)]
+        self.started_at = other.started_at if self.started_at is None else min(self.started_at, other.started_at)
+        self.last_at = other.last_at if self.last_at is None else max(self.last_at, other.last_at)
+        for start, bucket in other.buckets.items():
+            mine = self.buckets.get(start)
+            self.buckets[start] = list(bucket) if mine is None else [a + b for a, b in zip(mine, bucket)]
+        # Workers without a shared store sample their share of the frames independently, so the
+        # sum can exceed one measurement per interval of the combined span; cap it there
+        if self.measurement_interval > 0:
+            span = int((self.last_at - self.started_at) // self.measurement_interval) + 1
+            self.measurements = min(self.measurements, span)
+
+    def summary(self):
+        variance = self.m2 / self.count if self.count else 0.0
+        return {
+            "session_id": self.session_id,
+            "count": self.count,
+            "measurement_count": self.measurements,
+            "average_score": self.mean,
+            "score_variance": variance,
+            "score_std": math.sqrt(variance),
+            "min_score": self.min_score,
+            "max_score": self.max_score,
+            "good_posture_ratio": self.good / self.count if self.count else 0.0,
+            "issue_counts": dict(zip(POSTURE_ISSUES, self.issue_counts)),
+            "started_at": self.started_at,
+            "last_at": self.last_at,
+            "duration_seconds": (self.last_at - self.started_at) if self.count else 0.0,
+            "bucket_seconds": self.bucket_seconds,
+            "buckets": [{"start": start,
+                         "count": bucket[0],
+                         "average_score": bucket[1] / bucket[0],
+                         "issue_counts": dict(zip(POSTURE_ISSUES, bucket[2:]))}
+                        for start, bucket in sorted(self.buckets.items())],
+        }
+
+    def to_state(self):
+        state = dict(vars(self))
+        state["buckets"] = list(self.buckets.items())
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        aggregate = cls(state["session_id"], state["bucket_seconds"], state.get("measurement_interval", 1.0))
+        vars(aggregate).update(state)
+        aggregate.buckets = {start: bucket for start, bucket in state["buckets"]}
+        return aggregate
+
+
+class SessionStore:
+    """Per-session aggregates kept in memory, optionally backed by SQLite.
+
+    With disk_path, changed sessions are written out at most every
+    persist_interval seconds (and on flush), and sessions not in memory are
+    loaded back from the file, so summaries survive restarts. The file
+    stands in for the Supabase tables in local runs and tests. At most
+    maxsize sessions stay in memory; the least recently updated ones are
+    persisted and dropped first.
+
+    Every store writes its own row per session, keyed by a per-process
+    worker id, so pre-forked workers sharing one file never overwrite each
+    other; summaries merge the other workers' rows, which lag by up to
+    persist_interval. Measurements are claimed in the shared file as they
+    happen, so all workers together flag at most one frame per session
+    every measurement_interval.
+    """
+
+    def __init__(self, bucket_seconds=60, disk_path=None, persist_interval=5.0, maxsize=10000,
+                 measurement_interval=1.0):
+        self.bucket_seconds = bucket_seconds
+        self.measurement_interval = measurement_interval
+        self.persist_interval = persist_interval
+        self.maxsize = maxsize
+        self._sessions = OrderedDict()
+        self._dirty = set()
+        self._last_persist = time.monotonic()
+        self._lock = threading.Lock()
+        self.worker = uuid.uuid4().hex[:12]
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=30)
+            # Workers claim measurements concurrently; WAL keeps readers off the writers' lock
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS session_aggregates (session_id TEXT, worker TEXT, "
+                             "updated REAL, state TEXT, PRIMARY KEY (session_id, worker))")
+            self._db.execute("CREATE TABLE IF NOT EXISTS measurement_claims (session_id TEXT PRIMARY KEY, "
+                             "last_at REAL)")
+            self._db.commit()
+
+    def record(self, session_id, results, timestamp=None):
+        """Adds scored frames (score_frames results; None entries are skipped) to a session.
+
+        Returns one flag per result, True for the frames that count as stored measurements.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            aggregate = self._get(session_id, create=True)
+            claim = self._claim if self._db is not None else None
+            measured = [result is not None and
+                        aggregate.add(result["posture_score"], result["posture_issues"], timestamp,
+                                      good=result["posture_label"] == "Good Posture", claim=claim)
+                        for result in results]
+            self._dirty.add(session_id)
+            if self._db is not None and time.monotonic() - self._last_persist >= self.persist_interval:
+                self._persist()
+        return measured
+
+    def summary(self, session_id):
+        # None for sessions that have never been recorded
+        with self._lock:
+            aggregate = self._get(session_id)
+            merged = copy.deepcopy(aggregate) if aggregate is not None else None
+            if self._db is not None:
+                rows = self._db.execute("SELECT state FROM session_aggregates WHERE session_id = ? AND worker != ?",
+                                        (session_id, self.worker)).fetchall()
+                for (state,) in rows:
+                    other = SessionAggregate.from_state(json.loads(state))
+                    if merged is None:
+                        merged = other
+                    else:
+                        merged.merge(other)
+            return merged.summary() if merged is not None else None
+
+    def flush(self):
+        with self._lock:
+            self._persist()
+
+    # The helpers below are called with self._lock held
+    def _get(self, session_id, create=False):
+        aggregate = self._sessions.get(session_id)
+        if aggregate is None:
+            aggregate = self._load(session_id)
+            if aggregate is None:
+                if not create:
+                    return None
+                aggregate = SessionAggregate(session_id, self.bucket_seconds, self.measurement_interval)
+            self._sessions[session_id] = aggregate
+            self._evict()
+        self._sessions.move_to_end(session_id)
+        return aggregate
+
+    def _evict(self):
+        while len(self._sessions) > self.maxsize:
+            session_id, aggregate = next(iter(self._sessions.items()))
+            if session_id in self._dirty:
+                self._save(aggregate)
+                self._dirty.discard(session_id)
+                if self._db is not None:
+                    self._db.commit()
+            del self._sessions[session_id]
+
+    def _claim(self, session_id, timestamp):
+        # Takes the measurement unless any worker took one of this session within the interval
+        cursor = self._db.execute(
+            "INSERT INTO measurement_claims (session_id, last_at) VALUES (?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET last_at = excluded.last_at "
+            "WHERE excluded.last_at - measurement_claims.last_at >= ?",
+            (session_id, timestamp, self.measurement_interval))
+        won = cursor.rowcount == 1
+        last_at = timestamp if won else self._db.execute(
+            "SELECT last_at FROM measurement_claims WHERE session_id = ?", (session_id,)).fetchone()[0]
+        self._db.commit()
+        return won, last_at
+
+    def _load(self, session_id):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT state FROM session_aggregates WHERE session_id = ? AND worker = ?",
+                               (session_id, self.worker)).fetchone()
+        return SessionAggregate.from_state(json.loads(row[0])) if row else None
+
+    def _save(self, aggregate):
+        if self._db is None:
+            return
+        self._db.execute("INSERT OR REPLACE INTO session_aggregates (session_id, worker, updated, state) "
+                         "VALUES (?, ?, ?, ?)",
+                         (aggregate.session_id, self.worker, time.time(), json.dumps(aggregate.to_state())))
+
+    def _persist(self):
+        if self._db is not None and self._dirty:
+            for session_id in self._dirty:
+                aggregate = self._sessions.get(session_id)
+                if aggregate is not None:
+                    self._save(aggregate)
+            self._db.commit()
+            self._dirty.clear()
+        self._last_persist = time.monotonic()
@@ -0,0 +1,154 @@
+import itertools
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from training_data import make_dataset, open_feature_cache
+
+DEFAULT_EXPORT_PATH = "src/model/posture_model.h5"
+
+
+def build_model(widths=(16, 16), learning_rate=0.001):
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([tf.keras.Input(shape=(7,))]
+                                + [tf.keras.layers.Dense(width, activation="relu") for width in widths]
+                                + [tf.keras.layers.Dense(1, activation="sigmoid")])
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss="mean_squared_error", metrics=["mae"])
+    return model
+
+
+def parse_widths(text):
+    # "32,16" -> (32, 16)
+    return tuple(int(width) for width in text.split(","))
+
+
+def trial_seed(base_seed, config_index, fold):
+    return base_seed + 1000 * config_index + fold
+
+
+def init_worker(threads):
+    # One intra-op thread per trial process, so the pool uses cores instead of oversubscribing them
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def fit_config(X, y, train_idx, val_idx, config, seed, verbose=0):
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    model = build_model(config["widths"], config["learning_rate"])
+    train_ds = make_dataset(X, y, train_idx, config["batch_size"], shuffle=True, seed=seed)
+    val_ds = make_dataset(X, y, val_idx, config["batch_size"]) if val_idx is not None else None
+    history = model.fit(train_ds, epochs=config["epochs"], validation_data=val_ds, verbose=verbose)
+    return model, history.history
+
+
+def run_trial(task):
+    """Trains one (config, fold) pair; runs inside a pool worker."""
+    cache_path, config_index, config, fold, train_idx, val_idx, seed = task
+    X, y = open_feature_cache(cache_path)
+    start = time.perf_counter()
+    _, history = fit_config(X, y, train_idx, val_idx, config, seed)
+    return {
+        "config": config_index,
+        "fold": fold,
+        "seed": seed,
+        "train_loss": history["loss"][-1],
+        "val_mse": history["val_loss"][-1],
+        "val_mae": history["val_mae"][-1],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def make_grid(widths, learning_rates, batch_sizes, epochs):
+    return [{"widths": w, "learning_rate": lr, "batch_size": b, "epochs": e}
+            for w, lr, b, e in itertools.product(widths, learning_rates, batch_sizes, epochs)]
+
+
+def kfold_indices(n_rows, folds, seed):
+    from sklearn.model_selection import KFold
+    return list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(np.arange(n_rows)))
+
+
+def summarize(grid, trials):
+    summary = []
+    for index, config in enumerate(grid):
+        rows = [t for t in trials if t["config"] == index]
+        val_mse = np.array([t["val_mse"] for t in rows])
+        summary.append({
+            "config": index,
+            **config,
+            "val_mse_mean": float(val_mse.mean()),
+            "val_mse_std": float(val_mse.std()),
+            "val_mae_mean": float(np.mean([t["val_mae"] for t in rows])),
+            "seconds": float(sum(t["seconds"] for t in rows)),
+        })
+    return sorted(summary, key=lambda s: s["val_mse_mean"])
+
+
+def export_model(X, y, config, seed, export_path, convert=True):
+    """Retrains the winning config on all rows and writes it where app.py and convert_model.py expect it."""
+    model, _ = fit_config(X, y, np.arange(len(y)), None, config, seed)
+    os.makedirs(os.path.dirname(export_path) or ".", exist_ok=True)
+    model.save(export_path)
+    print(f"Best model saved to {export_path}")
+    if convert:
+        script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "convert_model.py")
+        result = subprocess.run([sys.executable, script, "--model", export_path])
+        if result.returncode:
+            print(f"convert_model.py failed with status {result.returncode}; {export_path} is still up to date")
+
+
+def run_sweep(X, y, grid, folds=5, workers=None, seed=42, results_path=None,
+              export_path=DEFAULT_EXPORT_PATH, convert=True):
+    """K-fold cross-validates every config in `grid` on a process pool and exports the best one.
+
+    Every (config, fold) pair is its own task with a seed derived from
+    `seed`, the config index and the fold, so results do not depend on
+    worker count or scheduling order.
+    """
+    workers = workers or os.cpu_count()
+    cache_path = os.path.dirname(X.filename)
+    splits = kfold_indices(len(y), folds, seed)
+    tasks = [(cache_path, index, config, fold, train_idx, val_idx, trial_seed(seed, index, fold))
+             for index, config in enumerate(grid)
+             for fold, (train_idx, val_idx) in enumerate(splits)]
+    # Longest trials first keeps the pool busy towards the end of the sweep
+    tasks.sort(key=lambda t: -t[2]["epochs"] * len(t[4]) / t[2]["batch_size"])
+    print(f"{len(grid)} configs x {folds} folds = {len(tasks)} trials on {workers} workers")
+
+    trials = []
+    start = time.perf_counter()
+    with mp.get_context("spawn").Pool(workers, initializer=init_worker, initargs=(1,)) as pool:
+        for done, trial in enumerate(pool.imap_unordered(run_trial, tasks), 1):
+            trials.append(trial)
+            config = grid[trial["config"]]
+            print(f"[{done}/{len(tasks)}] config {trial['config']} {config} fold {trial['fold']}: "
+                  f"val_mse {trial['val_mse']:.5f} ({trial['seconds']:.1f}s)", flush=True)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(grid, trials)
+    serial = sum(t["seconds"] for t in trials)
+    print(f"\nSweep took {elapsed:.1f}s ({serial:.1f}s of training, {serial / elapsed:.1f}x parallel speedup)")
+    for s in summary[:10]:
+        print(f"  widths={s['widths']} lr={s['learning_rate']} batch={s['batch_size']} epochs={s['epochs']}: "
+              f"val_mse {s['val_mse_mean']:.5f} +/- {s['val_mse_std']:.5f}, val_mae {s['val_mae_mean']:.4f}")
+
+    if results_path:
+        with open(results_path, "w") as f:
+            json.dump({"folds": folds, "seed": seed, "seconds": elapsed, "summary": summary,
+                       "trials": sorted(trials, key=lambda t: (t["config"], t["fold"]))}, f, indent=2)
+        print(f"Results written to {results_path}")
+
+    best = summary[0]
+    if export_path:
+        export_model(X, y, grid[best["config"]], seed, export_path, convert)
+    return summary
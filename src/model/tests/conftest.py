@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The model modules use flat imports (from features import ...), like app.py does when run from src/model
+sys.path.insert(0, MODEL_DIR)
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    # app.py loads its model at import time; the numpy backend reads the .h5 without TensorFlow
+    pytest.importorskip("flask_cors")
+    pytest.importorskip("flask_sock")
+    os.environ.setdefault("POSTURE_MODEL_BACKEND", "numpy")
+    os.environ.setdefault("POSTURE_MODEL_PATH", os.path.join(MODEL_DIR, "posture_model.h5"))
+    import app
+
+    return app
+
+
+def keypoint_frames(n, seed=0, width=640, height=480):
+    """(n, 12) keypoint rows in KEYPOINT_KEYS order around a seated, front-facing pose."""
+    rng = np.random.default_rng(seed)
+    # nose, left/right shoulder, left/right ear
+    base = np.array([320, 150, 400, 260, 240, 262, 360, 140, 280, 141], dtype=np.float64)
+    kp = np.empty((n, 12))
+    kp[:, 0], kp[:, 1] = width, height
+    kp[:, 2:] = base + rng.normal(0, 15, (n, 10))
+    return kp
@@ -0,0 +1,25 @@
+import time
+
+from alerts import AlertWorker
+
+
+def test_slow_sound_does_not_block_trigger_and_bursts_coalesce():
+    played = []
+
+    def slow_play(message):
+        time.sleep(0.2)
+        played.append(message)
+
+    worker = AlertWorker(slow_play, cooldown=0.05)
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < 1.0:
+        t = time.perf_counter()
+        worker.trigger("Poor posture detected! Please sit up straight.")
+        latencies.append(time.perf_counter() - t)
+        time.sleep(1 / 120)
+    worker.close()
+
+    assert max(latencies) < 0.05
+    assert worker.stats["played"] == len(played) <= 7
+    assert worker.stats["played"] + worker.stats["coalesced"] + worker.stats["suppressed"] == len(latencies)
@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+
+from analytics import PERCENTILES, PostureAnalytics, Rollup, RollupMeasurementSink, describe, rebuild_rollups
+from conftest import keypoint_frames
+from features import POSTURE_ISSUES
+from measurements import SQLiteMeasurementSink, measurement_row
+
+# 2024-01-04 is a Thursday; 60 rows 7 hours apart span three ISO weeks
+START = 1704326400.0
+
+
+def measurement_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    kp = keypoint_frames(n, seed)
+    rows = []
+    for i in range(n):
+        issues = [name for name in POSTURE_ISSUES if rng.random() < 0.3]
+        result = {"posture_score": int(rng.integers(0, 101)), "posture_issues": issues}
+        timestamp = START + i * 7 * 3600 + rng.uniform(0, 60)
+        rows.append(measurement_row(f"s{i // 5}", f"u{i % 2}", kp[i], result, timestamp))
+    return rows
+
+
+def rollup_table(db):
+    return db.execute("SELECT * FROM posture_rollups ORDER BY kind, user_id, bucket").fetchall()
+
+
+def test_incremental_rollups_match_a_full_rebuild(tmp_path):
+    sink = RollupMeasurementSink(str(tmp_path / "store.sqlite3"))
+    rows = measurement_rows(60)
+    for start in range(0, len(rows), 7):
+        sink.write_many(rows[start:start + 7])
+    incremental = rollup_table(sink.db)
+
+    rebuild_rollups(sink.db, chunksize=11)
+    assert rollup_table(sink.db) == incremental
+    kinds = {row[0] for row in incremental}
+    assert kinds == {"day", "week", "session"}
+    for kind in kinds:
+        assert sum(row[3] for row in incremental if row[0] == kind) == len(rows)
+    sink.close()
+
+
+def test_rollups_are_built_for_a_store_written_without_them(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    rows = measurement_rows(30, seed=1)
+    legacy = SQLiteMeasurementSink(path)
+    legacy.write_many(rows)
+    legacy.close()
+
+    sink = RollupMeasurementSink(path)
+    rebuilt = rollup_table(sink.db)
+    sink.close()
+
+    fresh = RollupMeasurementSink(str(tmp_path / "fresh.sqlite3"))
+    fresh.write_many(rows)
+    assert rebuilt == rollup_table(fresh.db)
+    fresh.close()
+
+
+def nearest_rank(scores, p):
+    ordered = sorted(scores)
+    return ordered[max(math.ceil(p / 100 * len(ordered)), 1) - 1]
+
+
+def test_describe_uses_nearest_rank_percentiles():
+    rng = np.random.default_rng(2)
+    for n in (1, 2, 3, 10, 37, 100):
+        scores = rng.integers(0, 101, n)
+        issues = rng.integers(0, 2, (n, len(POSTURE_ISSUES)))
+        rollup = Rollup.aggregate(np.full(n, "u"), np.full(n, "b"), scores, issues, np.arange(n, dtype=float))
+        (stats,) = describe(rollup)
+        assert stats["measurements"] == n
+        for p in PERCENTILES:
+            assert stats[f"p{p}"] == nearest_rank(scores.tolist(), p), (n, p)
+        assert stats["min_score"] == scores.min() and stats["max_score"] == scores.max()
+        assert math.isclose(stats["average_score"], scores.mean())
+        assert math.isclose(stats["score_std"], scores.std(), abs_tol=1e-9)
+        assert stats["issue_rates"] == dict(zip(POSTURE_ISSUES, issues.mean(axis=0).tolist()))
+
+
+def test_describe_of_an_empty_range():
+    (stats,) = describe(Rollup.from_rows([]).total())
+    assert stats["measurements"] == 0 and stats["p50"] is None and stats["average_score"] is None
+
+
+def test_report_totals_match_the_measurements(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    rows = measurement_rows(60, seed=3)
+    sink = RollupMeasurementSink(path)
+    sink.write_many(rows)
+    sink.close()
+
+    analytics = PostureAnalytics(path)
+    mine = [row for row in rows if row[1] == "u0"]
+    scores = [row[2] for row in mine]
+    for granularity in ("day", "week"):
+        report = analytics.report("u0", granularity, sessions=3)
+        assert report["overall"]["measurements"] == len(mine)
+        assert report["overall"]["p50"] == nearest_rank(scores, 50)
+        assert sum(bucket["measurements"] for bucket in report["buckets"]) == len(mine)
+    weeks = [bucket["start"] for bucket in analytics.report("u0", "week")["buckets"]]
+    assert weeks == ["2024-01-01", "2024-01-08", "2024-01-15"]
+    # Newest session first
+    assert [s["session_id"] for s in report["sessions"]] == ["s11", "s10", "s9"]
+
+    day = analytics.report("u0", "day", start="2024-01-05", end="2024-01-05")
+    expected = [row for row in mine if row[-1].startswith("2024-01-05")]
+    assert day["overall"]["measurements"] == len(expected)
+    analytics.close()
@@ -0,0 +1,36 @@
+from conftest import keypoint_frames
+from features import KEYPOINT_KEYS
+
+
+def frame_dicts(n, seed=0):
+    return [dict(zip(KEYPOINT_KEYS, row.tolist())) for row in keypoint_frames(n, seed)]
+
+
+def test_batch_matches_single_frame_results(app_module):
+    client = app_module.app.test_client()
+    frames = frame_dicts(20)
+
+    response = client.post("/predict_posture_batch", json={"frames": frames})
+    assert response.status_code == 200
+    batch = response.get_json()["results"]
+
+    single = [client.post("/predict_posture", json=frame).get_json() for frame in frames]
+    assert batch == single
+
+
+def test_batch_marks_invalid_frames_in_place(app_module):
+    client = app_module.app.test_client()
+    frames = frame_dicts(3)
+    del frames[1]["nose_x"]
+
+    results = client.post("/predict_posture_batch", json=frames).get_json()["results"]
+    assert results[1] == {"error": "Invalid data"}
+    assert "posture_score" in results[0] and "posture_score" in results[2]
+
+
+def test_batch_rejects_bad_input(app_module):
+    client = app_module.app.test_client()
+    assert client.post("/predict_posture_batch", json={"frames": 5}).status_code == 400
+    assert client.post("/predict_posture_batch", json=[1, 2, 3]).status_code == 400
+    assert client.post("/predict_posture_batch", json="frames").status_code == 400
+    assert client.post("/predict_posture_batch", json=[]).get_json() == {"results": []}
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from augment import LandmarkAugmenter, augmented_batches
+from conftest import keypoint_frames
+from features import FEATURE_NAMES, KEYPOINT_KEYS
+
+IDENTITY = dict(rotation=0.0, scale=(1.0, 1.0), translation=0.0, mirror_prob=0.0, jitter=0.0)
+
+
+def test_augmentation_keeps_shape_and_video_size():
+    kp = keypoint_frames(32)
+    original = kp.copy()
+    out = LandmarkAugmenter()(kp, np.random.default_rng(0))
+    assert out.shape == kp.shape
+    np.testing.assert_array_equal(out[:, :2], kp[:, :2])
+    np.testing.assert_array_equal(kp, original)  # the input is not modified
+    assert not np.allclose(out[:, 2:], kp[:, 2:])
+
+
+def test_augmentation_is_deterministic_under_a_seed():
+    kp = keypoint_frames(32)
+    augmenter = LandmarkAugmenter()
+    first = augmenter(kp, np.random.default_rng(7))
+    np.testing.assert_array_equal(augmenter(kp, np.random.default_rng(7)), first)
+    assert not np.allclose(augmenter(kp, np.random.default_rng(8)), first)
+
+
+def test_no_perturbation_is_the_identity():
+    kp = keypoint_frames(8)
+    np.testing.assert_allclose(LandmarkAugmenter(**IDENTITY)(kp, np.random.default_rng(0)), kp)
+
+
+def test_mirroring_flips_x_and_swaps_sides():
+    kp = keypoint_frames(4)
+    mirror = LandmarkAugmenter(**dict(IDENTITY, mirror_prob=1.0))
+    out = mirror(kp, np.random.default_rng(0))
+    for key in KEYPOINT_KEYS[2:]:
+        other = key.replace("left_", "@").replace("right_", "left_").replace("@", "right_")
+        i, j = KEYPOINT_KEYS.index(key), KEYPOINT_KEYS.index(other)
+        expected = kp[:, 0] - kp[:, j] if key.endswith("_x") else kp[:, j]
+        np.testing.assert_allclose(out[:, i], expected)
+    np.testing.assert_allclose(mirror(out, np.random.default_rng(0)), kp)
+
+
+def test_features_are_float32_rows():
+    kp = keypoint_frames(5)
+    kp[2, 3] = np.nan
+    features = LandmarkAugmenter().features(kp, np.random.default_rng(0))
+    assert features.shape == (5, len(FEATURE_NAMES)) and features.dtype == np.float32
+    assert np.isnan(features[2]).all() and np.isfinite(np.delete(features, 2, axis=0)).all()
+
+
+def take_batches(generator, n):
+    return [next(generator) for _ in range(n)]
+
+
+def test_augmented_batches_are_deterministic_and_cover_every_row():
+    kp = keypoint_frames(10)
+    y = np.linspace(0, 1, 10)
+    indices = np.arange(10)
+    first = take_batches(augmented_batches(kp, y, indices, batch_size=4, seed=3), 6)
+    second = take_batches(augmented_batches(kp, y, indices, batch_size=4, seed=3), 6)
+
+    assert [len(labels) for _, labels in first] == [4, 4, 2, 4, 4, 2]
+    for (features_a, labels_a), (features_b, labels_b) in zip(first, second):
+        np.testing.assert_array_equal(features_a, features_b)
+        np.testing.assert_array_equal(labels_a, labels_b)
+        assert features_a.shape == (len(labels_a), len(FEATURE_NAMES)) and labels_a.dtype == np.float32
+    # Each epoch sees every row once, in a fresh order with fresh perturbations
+    epochs = [np.concatenate([labels for _, labels in first[k:k + 3]]) for k in (0, 3)]
+    for labels in epochs:
+        np.testing.assert_allclose(np.sort(labels), y.astype(np.float32))
+    assert not np.array_equal(first[0][0], first[3][0])
+
+
+def test_augmented_dataset_keeps_shapes():
+    tf = pytest.importorskip("tensorflow")
+    from augment import make_augmented_dataset
+
+    kp, y = keypoint_frames(10), np.linspace(0, 1, 10)
+    dataset = make_augmented_dataset(kp, y, np.arange(10), batch_size=4, seed=1)
+    assert int(tf.data.experimental.cardinality(dataset)) == 3
+    sizes = [(features.shape, labels.shape) for features, labels in dataset.as_numpy_iterator()]
+    assert sorted(sizes) == sorted([((4, len(FEATURE_NAMES)), (4,))] * 2 + [((2, len(FEATURE_NAMES)), (2,))])
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batcher import MicroBatcher
+from metrics import MetricsRegistry
+
+
+def run_concurrently(batcher, inputs):
+    results, errors = [None] * len(inputs), [None] * len(inputs)
+
+    def call(i):
+        try:
+            results[i] = batcher.submit(inputs[i])
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_share_one_batch():
+    calls = []
+
+    def fn(rows):
+        calls.append(len(rows))
+        return rows * 2
+
+    # The long max_wait means the batch only starts once all 16 rows are queued
+    metrics = MetricsRegistry()
+    batcher = MicroBatcher(fn, max_batch=16, max_wait=10, metrics=metrics)
+    inputs = [np.full((2, 3), i, dtype=float) for i in range(8)]
+    results, errors = run_concurrently(batcher, inputs)
+
+    assert calls == [16]
+    assert errors == [None] * 8
+    for rows, result in zip(inputs, results):
+        np.testing.assert_array_equal(result, rows * 2)
+    (histogram,) = metrics.series("predict_batch_rows").values()
+    assert histogram.count == 1 and histogram.sum == 16
+
+
+def test_short_wait_flushes_a_partial_batch():
+    batcher = MicroBatcher(lambda rows: rows + 1, max_batch=64, max_wait=0.001)
+    np.testing.assert_array_equal(batcher.submit(np.zeros((3, 2))), np.ones((3, 2)))
+
+
+def test_large_inputs_skip_the_queue():
+    callers = []
+
+    def fn(rows):
+        callers.append(threading.current_thread())
+        return rows
+
+    batcher = MicroBatcher(fn, max_batch=4, max_wait=10)
+    batcher.submit(np.zeros((4, 2)))
+    assert callers == [threading.current_thread()]
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def fn(rows):
+        if (rows < 0).any():
+            raise ValueError("bad rows")
+        return rows
+
+    batcher = MicroBatcher(fn, max_batch=4, max_wait=10)
+    inputs = [np.zeros((1, 2)), np.full((1, 2), -1.0), np.zeros((1, 2)), np.zeros((1, 2))]
+    results, errors = run_concurrently(batcher, inputs)
+
+    assert results == [None] * 4
+    assert all(isinstance(e, ValueError) and str(e) == "bad rows" for e in errors)
+
+    # The batcher keeps serving after a failed batch
+    with pytest.raises(ValueError):
+        batcher.submit(np.full((4, 2), -1.0))
+    results, errors = run_concurrently(batcher, [np.full((1, 2), i, dtype=float) for i in range(4)])
+    assert errors == [None] * 4
+    assert [result[0, 0] for result in results] == [0, 1, 2, 3]
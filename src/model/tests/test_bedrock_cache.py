@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bedrock_cache import BedrockResponseCache, prompt_key
+from fake_bedrock import FakeBedrockClient
+
+PAYLOAD = {"prompt": "<s>[INST] Summarize my posture session [/INST]", "max_tokens": 200}
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    client = FakeBedrockClient(latency=0.2)
+    cache = BedrockResponseCache(maxsize=16, ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.invoke(client, "mistral.fake", PAYLOAD), range(8)))
+    cache.invoke(client, "mistral.fake", PAYLOAD)
+
+    assert client.calls == 1 and all(r == results[0] for r in results)
+
+
+def test_promoted_disk_entry_keeps_its_ttl(tmp_path):
+    client = FakeBedrockClient(latency=0)
+    path = str(tmp_path / "cache.sqlite3")
+    BedrockResponseCache(ttl=60, disk_path=path).invoke(client, "mistral.fake", PAYLOAD)
+    key = prompt_key("mistral.fake", PAYLOAD)
+
+    restarted = BedrockResponseCache(ttl=60, disk_path=path)
+    restarted._db.execute("UPDATE responses SET created = created - 59.5")
+    restarted._db.commit()
+    restarted.invoke(client, "mistral.fake", PAYLOAD)
+    assert restarted.snapshot()["disk_hits"] == 1 and client.calls == 1
+    assert time.time() - restarted._entries[key][0] > 59
+
+    time.sleep(0.6)
+    restarted.invoke(client, "mistral.fake", PAYLOAD)
+    assert client.calls == 2
+
+
+def test_concurrent_disk_traffic_on_shared_connection(tmp_path):
+    client = FakeBedrockClient(latency=0)
+    cache = BedrockResponseCache(maxsize=4, ttl=60, disk_path=str(tmp_path / "cache.sqlite3"))
+    payloads = [dict(PAYLOAD, prompt=f"prompt {i}") for i in range(32)]
+
+    # maxsize 4 keeps evicting, so most lookups read from and write to disk concurrently
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for _ in range(3):
+            results = list(pool.map(lambda p: cache.invoke(client, "mistral.fake", p), payloads))
+    expected = [BedrockResponseCache().invoke(FakeBedrockClient(), "mistral.fake", p) for p in payloads]
+    assert client.calls == len(payloads) and results == expected
+    assert cache.snapshot()["disk_hits"] > 0
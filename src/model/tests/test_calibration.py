@@ -0,0 +1,21 @@
+import numpy as np
+
+from calibration import PostureCalibration
+
+
+def test_incremental_baselines_match_batch_per_stream():
+    rng = np.random.default_rng(0)
+    streams = {name: rng.normal(mean, 2.0, (40, 2)) for name, mean in [("desk", 85.0), ("laptop", 70.0)]}
+    calibrations = {name: PostureCalibration() for name in streams}
+    for i in range(40):
+        for name, angles in streams.items():
+            completed = calibrations[name].update(*angles[i])
+            assert completed == (i == 29)
+
+    for name, angles in streams.items():
+        calibration, baseline = calibrations[name], angles[:30]
+        assert np.isclose(calibration.shoulder.mean, baseline[:, 0].mean())
+        assert np.isclose(calibration.neck.variance, baseline[:, 1].var())
+        assert np.isclose(calibration.shoulder_threshold, baseline[:, 0].mean() - 10)
+        assert calibration.is_poor(calibration.shoulder_threshold - 1, calibration.neck.mean)
+        assert not calibration.is_poor(calibration.shoulder.mean, calibration.neck.mean)
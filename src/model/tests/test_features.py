@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+
+from conftest import keypoint_frames
+from features import (KEYPOINT_KEYS, POSTURE_ISSUES, compute_features, detect_issues, extract_features,
+                      normalize_keypoints, to_keypoint_array)
+
+
+# Scalar per-frame versions of the original app.py feature and issue code
+def angle(ax, ay, bx, by, cx, cy):
+    abx, aby, cbx, cby = ax - bx, ay - by, cx - bx, cy - by
+    mag_ab, mag_cb = math.hypot(abx, aby), math.hypot(cbx, cby)
+    if mag_ab == 0 or mag_cb == 0:
+        return 180.0
+    return math.degrees(math.acos(max(-1.0, min(1.0, (abx * cbx + aby * cby) / (mag_ab * mag_cb)))))
+
+
+def scalar_features(row):
+    vw, vh = row[0], row[1]
+    nx, ny, lsx, lsy, rsx, rsy, lex, ley, rex, rey = (v / (vw if i % 2 == 0 else vh) for i, v in enumerate(row[2:]))
+    msx, msy = (lsx + rsx) / 2, (lsy + rsy) / 2
+    dist_nose_shoulders = math.hypot(nx - msx, ny - msy)
+    shoulder_width = math.hypot(lsx - rsx, lsy - rsy)
+    return [
+        dist_nose_shoulders,
+        dist_nose_shoulders / shoulder_width if shoulder_width > 0 else 0,
+        angle(lex, ley, nx, ny, rex, rey),
+        math.hypot(lex - nx, ley - ny),
+        math.hypot(rex - nx, rey - ny),
+        angle(lex, ley, lsx, lsy, nx, ny),
+        angle(rex, rey, rsx, rsy, nx, ny),
+    ]
+
+
+def scalar_issues(row):
+    nx, ny, lsx, lsy, rsx, rsy, _, ley, _, rey = row[2:]
+    shoulder_width = math.hypot(lsx - rsx, lsy - rsy)
+    head_height = math.hypot(nx - (lsx + rsx) / 2, ny - (lsy + rsy) / 2)
+    return [abs(ley - rey) > 15, abs(lsy - rsy) > 20, head_height < shoulder_width * 0.6,
+            head_height > shoulder_width * 1.2]
+
+
+def edge_frames():
+    kp = keypoint_frames(200, seed=1)
+    kp[0, 4:8] = [300, 250, 300, 250]  # both shoulders on one point: zero shoulder width
+    kp[1, 2:4] = kp[1, 8:10]  # nose on the left ear: zero-length angle arm
+    kp[2, 7] = kp[2, 5] + 40  # uneven shoulders
+    kp[3, 11] = kp[3, 9] + 30  # tilted head
+    return kp
+
+
+def test_vectorized_features_match_scalar_baseline():
+    kp = edge_frames()
+    features, valid = extract_features(kp)
+    assert valid.all()
+    assert np.allclose(features, [scalar_features(row) for row in kp], atol=1e-12)
+    assert features[0, 1] == 0 and features[1, 2] == 180.0
+
+
+def test_vectorized_issues_match_scalar_baseline():
+    kp = edge_frames()
+    flags = detect_issues(kp[:, 2:])
+    assert flags.tolist() == [scalar_issues(row) for row in kp]
+    # Normalized keypoints give the same pixel-threshold flags with the frame height as y_scale
+    assert np.array_equal(detect_issues(normalize_keypoints(kp[3:4]), y_scale=480)[:, :2], flags[3:4, :2])
+    assert flags[2, POSTURE_ISSUES.index("Shoulders Uneven")] and flags[3, POSTURE_ISSUES.index("Head Tilt Detected")]
+
+
+def test_input_forms_agree_and_invalid_rows_are_masked():
+    kp = keypoint_frames(5)
+    frames = [dict(zip(KEYPOINT_KEYS, row.tolist())) for row in kp]
+    frames[2]["nose_x"] = "not a number"
+    del frames[4]["right_ear_y"]
+
+    from_dicts, valid = extract_features(frames)
+    from_array, _ = extract_features(kp)
+    assert valid.tolist() == [True, True, False, True, False]
+    assert np.isnan(from_dicts[~valid]).all()
+    assert np.array_equal(from_dicts[valid], from_array[valid])
+    assert to_keypoint_array(frames[0]).shape == (1, len(KEYPOINT_KEYS))
+    # A 10-value frame is taken as already normalized
+    assert np.allclose(compute_features(normalize_keypoints(kp))[0], extract_features(normalize_keypoints(kp))[0])
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+from features import extract_features
+from inference import BACKEND_PATHS, load_posture_model
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(MODEL_DIR, "..", "posture_data.csv")
+
+
+def posture_features():
+    pd = pytest.importorskip("pandas")
+    features, valid = extract_features(pd.read_csv(DATA_PATH))
+    return features[valid]
+
+
+def test_numpy_matches_keras():
+    pytest.importorskip("tensorflow")
+    features = posture_features()
+    path = os.path.join(MODEL_DIR, "posture_model.h5")
+
+    keras_pred = load_posture_model(path, "keras").predict(features, verbose=0)
+    numpy_pred = load_posture_model(path, "numpy").predict(features)
+
+    assert float(np.max(np.abs(keras_pred - numpy_pred))) <= 1e-5
+    assert np.array_equal((keras_pred * 100).astype(int), (numpy_pred * 100).astype(int))
+
+
+def test_npz_bundle_matches_h5():
+    npz_path = os.path.join(MODEL_DIR, "posture_model.npz")
+    if not os.path.exists(npz_path):
+        pytest.skip("run convert_model.py --formats npz first")
+    features = posture_features()
+    h5_pred = load_posture_model(os.path.join(MODEL_DIR, "posture_model.h5"), "numpy").predict(features)
+    npz_pred = load_posture_model(npz_path, "numpy").predict(features)
+    assert np.allclose(h5_pred, npz_pred, atol=1e-6)
+
+
+@pytest.mark.parametrize("backend", ["tflite-fp16", "tflite-int8"])
+def test_tflite_buckets_match_unpadded_rows(backend):
+    path = os.path.join(MODEL_DIR, os.path.basename(BACKEND_PATHS[backend]))
+    if not os.path.exists(path):
+        pytest.skip(f"run convert_model.py --formats {backend} first")
+    model = load_posture_model(path, backend)
+    features = np.random.default_rng(0).normal(size=(150, 7)).astype(np.float32)
+
+    # Every size from 1 to past the largest bucket is padded, sliced or chunked back to row-for-row results
+    single = np.concatenate([model.predict(row) for row in features])
+    for rows in (1, 2, 8, 9, 64, 65, 150):
+        assert np.allclose(model.predict(features[:rows]), single[:rows], atol=1e-6)
+    assert all(interpreter.get_input_details()[0]["shape"][0] == size
+               for size, (interpreter, *_) in model.interpreters.items())
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import numpy as np
+
+from conftest import keypoint_frames
+from measurements import COLUMNS, SQLiteMeasurementSink, WriteBehindBuffer, measurement_row
+from sessions import SessionStore
+
+
+class RecordingSink:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.written = threading.Event()
+
+    def write_many(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("sink unavailable")
+        self.batches.append(list(rows))
+        self.written.set()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_full_batch_flushes_before_the_interval():
+    sink = RecordingSink()
+    buffer = WriteBehindBuffer(sink, max_batch=4, flush_interval=60, max_pending=100)
+    assert buffer.put_many(range(10)) == 10
+    assert wait_for(lambda: sum(map(len, sink.batches)) == 8)
+    assert sink.batches[:2] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert buffer.snapshot()["pending"] == 2
+    buffer.close()
+
+
+def test_partial_batch_flushes_after_the_interval():
+    sink = RecordingSink()
+    buffer = WriteBehindBuffer(sink, max_batch=100, flush_interval=0.05)
+    start = time.monotonic()
+    buffer.put_many(["a", "b"])
+    assert sink.written.wait(2)
+    assert time.monotonic() - start >= 0.05
+    assert sink.batches == [["a", "b"]]
+    buffer.close()
+
+
+def test_close_writes_everything_queued():
+    sink = RecordingSink()
+    buffer = WriteBehindBuffer(sink, max_batch=3, flush_interval=60)
+    for row in range(7):
+        buffer.put(row)
+    buffer.close()
+    assert [row for batch in sink.batches for row in batch] == list(range(7))
+    assert buffer.snapshot() == {"queued": 7, "written": 7, "batches": 3, "dropped": 0, "errors": 0, "pending": 0}
+    assert not buffer.put("late")
+    assert buffer.snapshot()["dropped"] == 1
+
+
+def test_rows_survive_a_failing_sink():
+    sink = RecordingSink(failures=2)
+    buffer = WriteBehindBuffer(sink, max_batch=2, flush_interval=0.01, retry_delay=0.01)
+    buffer.put_many([1, 2, 3])
+    assert wait_for(lambda: buffer.snapshot()["pending"] == 0)
+    buffer.close()
+    assert [row for batch in sink.batches for row in batch] == [1, 2, 3]
+    stats = buffer.snapshot()
+    assert stats["errors"] == 2 and stats["written"] == 3
+
+
+def test_sqlite_sink_stores_measurement_rows(tmp_path):
+    sink = SQLiteMeasurementSink(str(tmp_path / "measurements.sqlite3"))
+    result = {"posture_score": 72, "posture_issues": ["head_too_forward"]}
+    row = measurement_row("s1", "u1", keypoint_frames(1)[0], result, 0)
+    assert len(row) == len(COLUMNS)
+    sink.write_many([row, row])
+    assert sink.count() == 2
+    sink.close()
+
+
+class FakeBuffer:
+    def __init__(self):
+        self.rows = []
+
+    def put_many(self, rows):
+        self.rows.extend(rows)
+        return len(rows)
+
+
+def test_score_frames_queues_only_measured_frames(app_module, monkeypatch):
+    buffer = FakeBuffer()
+    clock = [1000.0]
+    monkeypatch.setattr(app_module, "measurement_buffer", buffer)
+    monkeypatch.setattr(app_module, "sessions", SessionStore())
+    monkeypatch.setattr(app_module, "predict_batcher", None)
+    monkeypatch.setattr(app_module, "prediction_cache", None)
+    monkeypatch.setattr(app_module.time, "time", lambda: clock[0])
+
+    kp = keypoint_frames(5)
+    kp[0, 2] = np.nan  # unscorable: never a measurement
+    results = app_module.score_frames(kp, "s1", "u1")
+    assert results[0] is None
+    # One measurement per second: the first scored frame of the call
+    assert [(row[0], row[1], row[2]) for row in buffer.rows] == [("s1", "u1", results[1]["posture_score"])]
+
+    clock[0] += 0.5
+    app_module.score_frames(kp, "s1", "u1")
+    assert len(buffer.rows) == 1
+
+    clock[0] += 0.5
+    app_module.score_frames(kp[1:], "s1", "u1")
+    assert len(buffer.rows) == 2
+
+    # Frames without a session are scored but never stored
+    app_module.score_frames(kp)
+    assert len(buffer.rows) == 2
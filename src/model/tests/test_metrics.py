@@ -0,0 +1,29 @@
+import threading
+
+from metrics import MetricsRegistry
+
+
+def test_mirrored_totals_render_as_counters():
+    registry = MetricsRegistry()
+    registry.counter("cache_total", "Cache totals", stat="hits").set_total(3)
+    registry.counter("cache_total", "Cache totals", stat="hits").set_total(5)
+    registry.gauge("cache", "Cache state", stat="size").set(2)
+
+    text = registry.render()
+    assert "# TYPE cache_total counter" in text and 'cache_total{stat="hits"} 5' in text
+    assert "# TYPE cache gauge" in text and 'cache{stat="size"} 2' in text
+
+
+def test_render_while_series_are_created():
+    registry = MetricsRegistry()
+
+    def create_series():
+        for i in range(2000):
+            registry.counter("requests_total", "Requests", route=str(i)).inc()
+
+    thread = threading.Thread(target=create_series)
+    thread.start()
+    while thread.is_alive():
+        registry.render()
+    thread.join()
+    assert len(registry.series("requests_total")) == 2000
@@ -0,0 +1,110 @@
+import numpy as np
+
+import prediction_cache
+from conftest import keypoint_frames
+from features import normalize_keypoints
+from prediction_cache import PredictionCache, quantized_keys
+
+STEP = 0.005
+
+
+def centered_frames(n, seed=0):
+    # Keypoints on bucket centers, so shifts of under half a bucket stay in it
+    kp = keypoint_frames(n, seed)
+    kp[:, 2::2] = np.round(kp[:, 2::2] / (640 * STEP)) * 640 * STEP
+    kp[:, 3::2] = np.round(kp[:, 3::2] / (480 * STEP)) * 480 * STEP
+    return kp
+
+
+class CountingScorer:
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, kp):
+        self.rows += len(kp)
+        return [None if np.isnan(row).any() else {"posture_score": int(row[2])} for row in kp]
+
+
+def test_keys_are_rounded_normalized_keypoints():
+    kp = keypoint_frames(50, seed=1)
+    expected = np.rint(normalize_keypoints(kp) / STEP) + 0.0
+    keys = quantized_keys(kp, STEP)
+    for key, row, buckets in zip(keys, kp, expected):
+        assert np.array_equal(np.frombuffer(key)[2:], buckets)
+        assert np.array_equal(np.frombuffer(key)[:2], row[:2])
+
+
+def test_hits_within_a_bucket_and_misses_outside_it():
+    cache = PredictionCache(step=STEP)
+    scorer = CountingScorer()
+    kp = centered_frames(4)
+    first = cache.score(kp, "s1", scorer)
+    assert scorer.rows == 4
+
+    nearby = kp.copy()
+    nearby[:, 2] += 0.4 * 640 * STEP
+    nearby[:, 3] -= 0.4 * 480 * STEP
+    assert cache.score(nearby, "s1", scorer) == first
+    assert scorer.rows == 4
+
+    moved = kp.copy()
+    moved[1, 2] += 640 * STEP  # one bucket over
+    moved[3, 0], moved[3, 2::2] = 1280, moved[3, 2::2] * 2  # same normalized pose, other video size
+    cache.score(moved, "s1", scorer)
+    assert scorer.rows == 6
+    assert cache.snapshot() == {"hits": 6, "misses": 6, "expired": 0, "size": 6}
+
+
+def test_entries_are_scoped_to_a_session():
+    cache = PredictionCache(step=STEP)
+    scorer = CountingScorer()
+    kp = centered_frames(2)
+    cache.score(kp, "s1", scorer)
+    cache.score(kp, "s2", scorer)
+    cache.score(kp, None, scorer)
+    assert scorer.rows == 6
+    cache.score(kp, "s2", scorer)
+    assert scorer.rows == 6
+
+
+def test_invalid_frames_are_never_cached():
+    cache = PredictionCache(step=STEP)
+    scorer = CountingScorer()
+    kp = centered_frames(2)
+    kp[1, 4] = np.nan
+    for _ in range(3):
+        results = cache.score(kp, "s1", scorer)
+        assert results[1] is None
+    assert scorer.rows == 1 + 3
+    assert cache.snapshot()["size"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: clock[0])
+    cache = PredictionCache(step=STEP, ttl=30)
+    scorer = CountingScorer()
+    kp = centered_frames(1)
+    cache.score(kp, "s1", scorer)
+    clock[0] += 30
+    cache.score(kp, "s1", scorer)
+    assert scorer.rows == 1
+    clock[0] += 0.1
+    cache.score(kp, "s1", scorer)
+    assert scorer.rows == 2
+    assert cache.snapshot()["expired"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PredictionCache(step=STEP, maxsize=2)
+    scorer = CountingScorer()
+    a, b, c = (centered_frames(1, seed) for seed in range(3))
+    cache.score(a, None, scorer)
+    cache.score(b, None, scorer)
+    cache.score(a, None, scorer)  # a is now the most recent
+    cache.score(c, None, scorer)  # evicts b
+    assert scorer.rows == 3
+    cache.score(a, None, scorer)
+    cache.score(b, None, scorer)
+    assert scorer.rows == 4
+    assert cache.snapshot()["size"] == 2
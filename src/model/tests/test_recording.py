@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pytest
+
+from recording import (NUM_LANDMARKS, LandmarkRecorder, LandmarkRecording, LandmarkReplay, keypoints,
+                       landmark_array)
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = rng.random((50, NUM_LANDMARKS, 4)).astype(np.float32)
+    path = str(tmp_path / "session.lmrec")
+    with LandmarkRecorder(path, "first") as recorder:
+        for i, landmarks in enumerate(frames[:30]):
+            recorder.record(landmarks if i % 10 else None, 640, 480, timestamp=100 + i / 30)
+    with open(path, "ab") as f:
+        f.write(b"\1" * 100)  # torn record
+    with LandmarkRecorder(path, "second") as recorder:
+        for i, landmarks in enumerate(frames[30:]):
+            recorder.record(landmarks, 1280, 720, timestamp=200 + i / 30)
+
+    recording = LandmarkRecording(path)
+    yield frames, recording
+    recording.close()
+
+
+def test_round_trip_survives_torn_tail(recorded):
+    frames, recording = recorded
+    assert len(recording) == 50 and recording.session_ids() == ["first", "second"]
+    first, second = recording.session("first"), recording.session(1)
+    assert len(first) == 30 and len(second) == 20
+    assert np.shares_memory(second["landmarks"], recording.records)
+    assert np.array_equal(second["landmarks"], frames[30:])
+    assert list(first["detected"][:11]) == [0] + [1] * 9 + [0]
+
+    kp = keypoints(first)
+    assert np.isnan(kp[0, 2:]).all() and kp[0, 0] == 640
+    assert np.allclose(kp[1, 2:4], frames[1, 0, :2] * [640, 480])
+    assert np.allclose(kp[1, 4:6], frames[1, 11, :2] * [640, 480])
+
+
+def test_replay_is_deterministic(recorded):
+    pytest.importorskip("mediapipe")
+    frames, recording = recorded
+    second = recording.session("second")
+    replay = LandmarkReplay(second)
+    replayed = []
+    while replay.isOpened():
+        ok, frame, results = replay.read()
+        replayed.append((landmark_array(results.pose_landmarks), replay.clock()))
+    assert frame.shape == (720, 1280, 3)
+    assert np.allclose([lm for lm, _ in replayed], frames[30:])
+    assert replayed[-1][1] == 200 + 19 / 30
+
+
+def test_realtime_replay_follows_recorded_clock(recorded):
+    _, recording = recorded
+    second = recording.session("second")
+    replay = LandmarkReplay(second, realtime=True, speed=4.0)
+    start = time.perf_counter()
+    while replay.read()[0]:
+        pass
+    assert abs(time.perf_counter() - start - 19 / 30 / 4) < 0.02
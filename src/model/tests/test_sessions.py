@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from features import POSTURE_ISSUES
+from sessions import SessionStore
+
+
+@pytest.fixture
+def frames():
+    rng = random.Random(0)
+    frames = [(rng.randint(40, 100), rng.sample(POSTURE_ISSUES, rng.randint(0, 2))) for _ in range(5000)]
+    results = [{"posture_score": s, "posture_issues": i, "posture_label": "Good Posture" if s > 85 else "Bad Posture"}
+               for s, i in frames]
+    return frames, results
+
+
+def test_aggregates_match_full_recomputation_after_reload(tmp_path, frames):
+    frames, results = frames
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SessionStore(disk_path=path)
+    for i, result in enumerate(results):
+        store.record("demo", [result], timestamp=1_700_000_000 + i * 0.5)
+    store.flush()
+    summary = SessionStore(disk_path=path).summary("demo")
+
+    scores = [s for s, _ in frames]
+    mean = sum(scores) / len(scores)
+    variance = sum((s - mean) ** 2 for s in scores) / len(scores)
+    assert summary["count"] == len(scores)
+    assert abs(summary["average_score"] - mean) < 1e-9 and abs(summary["score_variance"] - variance) < 1e-6
+    assert summary["issue_counts"] == {name: sum(name in i for _, i in frames) for name in POSTURE_ISSUES}
+    assert sum(b["count"] for b in summary["buckets"]) == len(scores)
+    # Frames arrive every 0.5 s; measurements are counted once per second like the stored rows
+    assert summary["measurement_count"] == len(scores) // 2
+
+
+def test_workers_sharing_a_file_merge_their_halves(tmp_path, frames):
+    frames, results = frames
+    path = str(tmp_path / "sessions.sqlite3")
+    whole = SessionStore()
+    for i, result in enumerate(results):
+        whole.record("demo", [result], timestamp=1_700_000_000 + i * 0.5)
+    summary = whole.summary("demo")
+
+    workers = [SessionStore(disk_path=path), SessionStore(disk_path=path)]
+    for i, result in enumerate(results):
+        workers[i % 2].record("split", [result], timestamp=1_700_000_000 + i * 0.5)
+    workers[1].flush()
+    split = workers[0].summary("split")
+
+    assert split["count"] == len(results) and split["issue_counts"] == summary["issue_counts"]
+    assert split["measurement_count"] == summary["measurement_count"]
+    assert abs(split["score_variance"] - summary["score_variance"]) < 1e-6
+    assert split["buckets"] == summary["buckets"]
+
+
+def test_record_flags_one_measurement_per_interval():
+    store = SessionStore()
+    result = {"posture_score": 90, "posture_issues": [], "posture_label": "Good Posture"}
+    flags = [store.record("demo", [result, None, result], timestamp=100 + i * 0.25) for i in range(9)]
+
+    assert flags[0] == [True, False, False]
+    assert [i for i, f in enumerate(flags) if any(f)] == [0, 4, 8]
+    summary = store.summary("demo")
+    assert summary["count"] == 18 and summary["measurement_count"] == 3
+
+
+def test_workers_sharing_a_file_take_one_measurement_per_interval(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    result = {"posture_score": 70, "posture_issues": [], "posture_label": "Bad Posture"}
+    workers = [SessionStore(disk_path=path) for _ in range(3)]
+    flags = [any(workers[i % 3].record("demo", [result], timestamp=100 + i * 0.25)) for i in range(40)]
+
+    # 40 frames over 10 s, 4 a second, spread across three workers
+    assert [i for i, measured in enumerate(flags) if measured] == list(range(0, 40, 4))
+    for worker in workers:
+        worker.flush()
+    assert workers[0].summary("demo")["measurement_count"] == 10
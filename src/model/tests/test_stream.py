@@ -0,0 +1,43 @@
+from conftest import keypoint_frames
+
+
+def frame(seq, keypoints):
+    return {"type": "frame", "seq": seq, "keypoints": keypoints}
+
+
+def test_frames_need_exactly_ten_numbers(app_module):
+    session = app_module.StreamSession()
+    assert session.handle([{"type": "config", "videoWidth": 640, "videoHeight": 480}]) == [{"type": "ready"}]
+
+    good = keypoint_frames(1)[0, 2:].tolist()
+    replies = session.handle([frame(0, good), frame(1, 5), frame(2, [320.0]), frame(3, good[:9]),
+                              frame(4, good[:9] + ["x"]), frame(5, good[:9] + [True]), frame(6, good + [1.0])])
+
+    assert replies[0]["type"] == "result" and replies[0]["seq"] == 0
+    for reply in replies[1:]:
+        assert reply["type"] == "error" and "10 numbers" in reply["error"]
+    assert [reply["seq"] for reply in replies] == list(range(7))
+
+
+def test_frames_before_config_are_rejected(app_module):
+    session = app_module.StreamSession()
+    (reply,) = session.handle([frame(0, keypoint_frames(1)[0, 2:].tolist())])
+    assert reply == {"type": "error", "seq": 0, "error": "Session not configured"}
+
+
+def test_stream_messages_update_request_metrics(app_module):
+    key = (("endpoint", "stream_posture"),)
+
+    def totals():
+        requests = app_module.metrics.series("api_requests_total")
+        errors = app_module.metrics.series("api_request_errors_total")
+        latency = app_module.metrics.series("api_request_seconds")
+        return requests[key].value, errors[key].value, latency[key].count
+
+    session = app_module.StreamSession()
+    before = totals()
+    session.handle([{"type": "config", "videoWidth": 640, "videoHeight": 480},
+                    frame(0, keypoint_frames(1)[0, 2:].tolist()), frame(1, [1.0]), None])
+    after = totals()
+
+    assert [b - a for a, b in zip(before, after)] == [4, 2, 4]
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from conftest import keypoint_frames
+from features import KEYPOINT_KEYS, extract_features
+from training_data import cache_key, load_training_features, load_training_keypoints
+
+
+def write_csv(path, n=50):
+    frame = pd.DataFrame(keypoint_frames(n, seed=3), columns=KEYPOINT_KEYS)
+    frame.insert(0, "label", np.arange(n) % 101)
+    frame.loc[5, "label"] = np.nan  # dropped: no label
+    frame.loc[9, "nose_x"] = np.nan  # dropped: no features
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def test_keypoints_line_up_with_cached_features(tmp_path):
+    data_path = str(tmp_path / "data.csv")
+    source = write_csv(data_path)
+    cache_dir = str(tmp_path / "cache")
+
+    X, y = load_training_features(data_path, cache_dir, chunksize=16)
+    kp, kp_y = load_training_keypoints(data_path, cache_dir, chunksize=16)
+
+    assert isinstance(kp, np.memmap) and kp.shape == (48, 12)
+    np.testing.assert_array_equal(kp_y, y)
+    kept = source.drop(index=[5, 9])
+    np.testing.assert_allclose(kp, kept[KEYPOINT_KEYS].to_numpy(), rtol=1e-6)
+    np.testing.assert_allclose(y, kept["label"].to_numpy() / 100, rtol=1e-6)
+    np.testing.assert_allclose(extract_features(np.asarray(kp, dtype=np.float64))[0], X, rtol=1e-4, atol=1e-5)
+
+
+def test_cache_key_follows_data(tmp_path):
+    data_path = str(tmp_path / "data.csv")
+    write_csv(data_path)
+    key = cache_key(data_path)
+    assert cache_key(data_path) == key
+    with open(data_path, "a") as f:
+        f.write("50" + ",1" * 12 + "\n")
+    assert cache_key(data_path) != key
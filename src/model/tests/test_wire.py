@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import wire
+from conftest import keypoint_frames
+from features import POSTURE_ISSUES
+
+
+def test_frames_round_trip():
+    kp = keypoint_frames(7).astype(np.float32)
+    payload = wire.encode_frames(kp)
+    assert len(payload) == 7 * wire.FRAME_SIZE == 7 * 48
+    np.testing.assert_array_equal(wire.decode_frames(payload), kp)
+
+
+@pytest.mark.parametrize("size", [0, 1, 47, 49, 95])
+def test_truncated_or_misaligned_frames_are_rejected(size):
+    payload = wire.encode_frames(keypoint_frames(2))[:size]
+    with pytest.raises(ValueError):
+        wire.decode_frames(payload)
+
+
+def test_results_round_trip():
+    results = [
+        {"posture_score": 91, "posture_label": "Good Posture", "posture_issues": []},
+        None,
+        {"posture_score": 12, "posture_label": "Bad Posture", "posture_issues": list(POSTURE_ISSUES)},
+        {"posture_score": 55, "posture_label": "Bad Posture", "posture_issues": [POSTURE_ISSUES[2]]},
+    ]
+    payload = wire.encode_results(results)
+    assert len(payload) == len(results) * wire.RESULT_DTYPE.itemsize == len(results) * 4
+    assert wire.decode_results(payload) == results
+
+
+def test_binary_endpoint_matches_json(app_module):
+    client = app_module.app.test_client()
+    kp = keypoint_frames(5).astype(np.float32)
+    kp[3, 4] = np.nan
+
+    response = client.post("/predict_posture_batch", data=wire.encode_frames(kp), content_type=wire.CONTENT_TYPE)
+    assert response.status_code == 200 and response.mimetype == wire.CONTENT_TYPE
+    results = wire.decode_results(response.data)
+    assert results[3] is None
+    expected = app_module.score_frames(kp)
+    assert [r and (r["posture_score"], r["posture_label"], r["posture_issues"]) for r in results] == \
+           [r and (r["posture_score"], r["posture_label"], r["posture_issues"]) for r in expected]
+
+
+def test_binary_endpoint_rejects_misaligned_payload(app_module):
+    client = app_module.app.test_client()
+    payload = wire.encode_frames(keypoint_frames(2))[:-3]
+    for path in ("/predict_posture", "/predict_posture_batch"):
+        response = client.post(path, data=payload, content_type=wire.CONTENT_TYPE)
+        assert response.status_code == 400 and "48 bytes" in response.get_json()["error"]
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import features as features_module
+from features import FEATURE_NAMES, KEYPOINT_KEYS, extract_features, to_keypoint_array
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".feature_cache")
+
+
+def _file_digest(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def cache_key(data_path):
+    # Changes whenever the source data, the feature extraction code or the cache layout changes
+    digest = hashlib.sha256()
+    _file_digest(data_path, digest)
+    _file_digest(features_module.__file__, digest)
+    _file_digest(os.path.abspath(__file__), digest)
+    return digest.hexdigest()[:32]
+
+
+def iter_chunks(data_path, chunksize):
+    """Yields DataFrame chunks from a CSV, or record batches from a Parquet file."""
+    if data_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(data_path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(data_path, chunksize=chunksize)
+
+
+def build_feature_cache(data_path, cache_path, chunksize=100_000):
+    # Extract chunk by chunk into raw float32 files, so memory stays bounded by one chunk.
+    # The raw keypoints of the kept rows are stored too, for augmentation.
+    tmp_path = cache_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    rows = 0
+    with open(os.path.join(tmp_path, "X.f32"), "wb") as fx, open(os.path.join(tmp_path, "y.f32"), "wb") as fy, \
+            open(os.path.join(tmp_path, "K.f32"), "wb") as fk:
+        for chunk in iter_chunks(data_path, chunksize):
+            features, valid = extract_features(chunk)
+            labels = pd.to_numeric(chunk["label"], errors="coerce").to_numpy()
+            valid &= ~np.isnan(labels)
+            features[valid].astype(np.float32).tofile(fx)
+            (labels[valid] / 100).astype(np.float32).tofile(fy)  # Normalize labels between 0-1
+            to_keypoint_array(chunk)[valid].astype(np.float32).tofile(fk)
+            rows += int(valid.sum())
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({"source": os.path.abspath(data_path), "rows": rows, "features": FEATURE_NAMES}, f)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.rename(tmp_path, cache_path)
+
+
+def ensure_feature_cache(data_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000, use_cache=True):
+    # Returns the cache directory for data_path, building it first if needed
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, cache_key(data_path))
+    if not use_cache or not os.path.exists(os.path.join(cache_path, "meta.json")):
+        print(f"Extracting features from {data_path} into {cache_path}")
+        build_feature_cache(data_path, cache_path, chunksize)
+    else:
+        print(f"Using cached features from {cache_path}")
+    return cache_path
+
+
+def load_training_features(data_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000, use_cache=True):
+    """Returns memory-mapped (X, y) float32 arrays for a CSV or Parquet dataset.
+
+    Features are extracted once per (data, feature code) pair and cached on
+    disk under cache_dir; later calls map the cached arrays without reading
+    the source again.
+    """
+    return open_feature_cache(ensure_feature_cache(data_path, cache_dir, chunksize, use_cache))
+
+
+def _cache_rows(cache_path):
+    with open(os.path.join(cache_path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta["rows"] == 0:
+        raise ValueError(f"No valid rows in {meta['source']}")
+    return meta["rows"]
+
+
+def open_feature_cache(cache_path):
+    # Maps an already built cache; cheap enough to call from every worker process
+    rows = _cache_rows(cache_path)
+    X = np.memmap(os.path.join(cache_path, "X.f32"), dtype=np.float32, mode="r", shape=(rows, len(FEATURE_NAMES)))
+    y = np.memmap(os.path.join(cache_path, "y.f32"), dtype=np.float32, mode="r", shape=(rows,))
+    return X, y
+
+
+def load_training_keypoints(data_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000, use_cache=True):
+    """Returns memory-mapped (N, 12) float32 pixel keypoints and 0-1 labels.
+
+    Augmentation works on the raw landmarks, which the feature cache stores
+    next to the features; rows line up with load_training_features, and
+    batches are gathered from disk like make_dataset does.
+    """
+    cache_path = ensure_feature_cache(data_path, cache_dir, chunksize, use_cache)
+    rows = _cache_rows(cache_path)
+    kp = np.memmap(os.path.join(cache_path, "K.f32"), dtype=np.float32, mode="r", shape=(rows, len(KEYPOINT_KEYS)))
+    return kp, open_feature_cache(cache_path)[1]
+
+
+def make_dataset(X, y, indices, batch_size, shuffle=False, seed=42):
+    """tf.data pipeline over rows `indices` of memory-mapped arrays, with prefetching.
+
+    Batches are gathered from the memmap on the fly, so the dataset never
+    has to fit in RAM; shuffling reshuffles the index order every epoch.
+    """
+    import tensorflow as tf
+
+    indices = np.asarray(indices)
+    n_features = X.shape[1]
+
+    def batches():
+        order = np.random.default_rng(seed + batches.epoch).permutation(indices) if shuffle else indices
+        batches.epoch += 1
+        for start in range(0, len(order), batch_size):
+            # Sorted gathers read the memmap sequentially
+            batch = np.sort(order[start:start + batch_size]) if not shuffle else order[start:start + batch_size]
+            yield np.asarray(X[batch]), np.asarray(y[batch])
+    batches.epoch = 0
+
+    signature = (tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                 tf.TensorSpec(shape=(None,), dtype=tf.float32))
+    n_batches = -(-len(indices) // batch_size)
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
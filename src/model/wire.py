@@ -0,0 +1,52 @@
+import numpy as np
+
+from features import KEYPOINT_KEYS, POSTURE_ISSUES
+
+# Binary /predict_posture payloads (Content-Type: application/octet-stream).
+# Request: N frames of 12 little-endian float32 in KEYPOINT_KEYS order
+# (videoWidth, videoHeight, then the 10 keypoint coordinates), 48 bytes per frame.
+# Response: N records of RESULT_DTYPE, 4 bytes per frame.
+CONTENT_TYPE = "application/octet-stream"
+FRAME_DTYPE = np.dtype("<f4")
+FRAME_SIZE = len(KEYPOINT_KEYS) * FRAME_DTYPE.itemsize
+
+# score is -1 for invalid frames; bit i of issues is POSTURE_ISSUES[i]
+RESULT_DTYPE = np.dtype([("score", "<i2"), ("issues", "u1"), ("flags", "u1")])
+GOOD_POSTURE_FLAG = 1
+ISSUE_BITS = {name: 1 << i for i, name in enumerate(POSTURE_ISSUES)}
+
+
+def decode_frames(payload):
+    """Returns an (N, 12) float32 view of a binary request body, without copying."""
+    if not payload or len(payload) % FRAME_SIZE:
+        raise ValueError(f"Binary payload must be a non-empty multiple of {FRAME_SIZE} bytes")
+    return np.frombuffer(payload, dtype=FRAME_DTYPE).reshape(-1, len(KEYPOINT_KEYS))
+
+
+def encode_frames(kp):
+    return np.ascontiguousarray(kp, dtype=FRAME_DTYPE).tobytes()
+
+
+def encode_results(results):
+    # score_frames results -> packed RESULT_DTYPE records
+    out = np.empty(len(results), dtype=RESULT_DTYPE)
+    out[:] = [(-1, 0, 0) if r is None else
+              (r["posture_score"], sum(ISSUE_BITS[name] for name in r["posture_issues"]),
+               GOOD_POSTURE_FLAG if r["posture_label"] == "Good Posture" else 0)
+              for r in results]
+    return out.tobytes()
+
+
+def decode_results(payload):
+    """Client-side inverse of encode_results, back to score_frames-style dicts."""
+    results = []
+    for record in np.frombuffer(payload, dtype=RESULT_DTYPE):
+        if record["score"] < 0:
+            results.append(None)
+            continue
+        results.append({
+            "posture_score": int(record["score"]),
+            "posture_label": "Good Posture" if record["flags"] & GOOD_POSTURE_FLAG else "Bad Posture",
+            "posture_issues": [name for j, name in enumerate(POSTURE_ISSUES) if record["issues"] >> j & 1],
+        })
+    return results
@@ -6,6 +6,8 @@ import { supabase } from "@/integrations/supabase/client";
 import * as tf from '@tensorflow/tfjs';
 import * as poseDetection from '@tensorflow-models/pose-detection';
 import { PostureSessionInsert, PostureMeasurementInsert, PositionData } from "@/types/database";
+import { PostureStream } from "@/lib/postureStream";
+import { WIRE_CONTENT_TYPE, decodeResults, encodeFrames } from "@/lib/postureWire";
 
 // Add Math.degrees type declaration
 declare global {
@@ -33,6 +35,7 @@ const Analysis = () => {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [sessionId, setSessionId] = useState<string | null>(null);
+  const [userId, setUserId] = useState<string | null>(null);
   const [detector, setDetector] = useState<poseDetection.PoseDetector | null>(null);
   const [currentScore, setCurrentScore] = useState<number | null>(null);
   const [postureIssues, setPostureIssues] = useState<string[]>([]);
@@ -40,6 +43,7 @@ const Analysis = () => {
   const lastNotificationTime = useRef<number | null>(null);
   const notificationSound = useRef<HTMLAudioElement | null>(null);
   const lastMetrics = useRef<PostureMetrics | null>(null);
+  const postureStream = useRef<PostureStream | null>(null);
   
   const startSession = async () => {
     try {
@@ -57,6 +61,7 @@ const Analysis = () => {
 
       if (error) throw error;
       setSessionId(data?.id ?? null);
+      setUserId(user.id);
       setIsAnalyzing(true);
       toast({
         title: "Session Started",
@@ -89,6 +94,7 @@ const Analysis = () => {
       if (error) throw error;
       
       setSessionId(null);
+      setUserId(null);
       setCurrentScore(null);
       lastMeasurementTime.current = null;
 
@@ -178,6 +184,42 @@ const Analysis = () => {
     };
   }, []);
 
+  // Open one streaming session per analysis run; frames fall back to HTTP until it is ready.
+  // The server's pixel thresholds depend on the video size, so the stream opens only once the
+  // metadata is loaded and is told about every later resolution change.
+  useEffect(() => {
+    const video = videoRef.current;
+    if (!isAnalyzing || !video) return;
+
+    const stream = new PostureStream();
+    postureStream.current = stream;
+    let connected = false;
+
+    const syncVideoSize = () => {
+      const { videoWidth, videoHeight } = video;
+      if (!videoWidth || !videoHeight) return;
+      if (connected) {
+        stream.resize(videoWidth, videoHeight);
+        return;
+      }
+      connected = true;
+      stream.connect(videoWidth, videoHeight, sessionId, userId).catch(error => {
+        console.error('Posture stream unavailable, using HTTP:', error);
+      });
+    };
+
+    syncVideoSize();
+    video.addEventListener('loadedmetadata', syncVideoSize);
+    video.addEventListener('resize', syncVideoSize);
+
+    return () => {
+      video.removeEventListener('loadedmetadata', syncVideoSize);
+      video.removeEventListener('resize', syncVideoSize);
+      stream.close();
+      postureStream.current = null;
+    };
+  }, [isAnalyzing, sessionId, userId]);
+
   useEffect(() => {
     if (!detector || !videoRef.current || !canvasRef.current) return;
 
@@ -280,37 +322,50 @@ const Analysis = () => {
 
     if (nose && leftShoulder && rightShoulder && leftEar && rightEar) {
       try {
+        const stream = postureStream.current;
+        if (stream?.isReady) {
+          return await stream.score([
+            nose.x, nose.y,
+            leftShoulder.x, leftShoulder.y,
+            rightShoulder.x, rightShoulder.y,
+            leftEar.x, leftEar.y,
+            rightEar.x, rightEar.y
+          ]);
+        }
+
         const videoWidth = videoRef.current?.videoWidth || 640;
         const videoHeight = videoRef.current?.videoHeight || 480;
 
-        const postureData = {
-          nose_x: nose.x,
-          nose_y: nose.y,
-          left_shoulder_x: leftShoulder.x,
-          left_shoulder_y: leftShoulder.y,
-          right_shoulder_x: rightShoulder.x,
-          right_shoulder_y: rightShoulder.y,
-          left_ear_x: leftEar.x,
-          left_ear_y: leftEar.y,
-          right_ear_x: rightEar.x,
-          right_ear_y: rightEar.y,
+        const body = encodeFrames([{
           videoWidth,
-          videoHeight
-        };
-
-        const response = await fetch('http://127.0.0.1:5000/predict_posture', {
+          videoHeight,
+          keypoints: [
+            nose.x, nose.y,
+            leftShoulder.x, leftShoulder.y,
+            rightShoulder.x, rightShoulder.y,
+            leftEar.x, leftEar.y,
+            rightEar.x, rightEar.y
+          ]
+        }]);
+        // The user id files the server-side measurements under this user's analytics rollups
+        const params = new URLSearchParams();
+        if (sessionId) params.set('session_id', sessionId);
+        if (userId) params.set('user_id', userId);
+        const query = params.toString() ? `?${params}` : '';
+
+        const response = await fetch(`http://127.0.0.1:5000/predict_posture${query}`, {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json',
+            'Content-Type': WIRE_CONTENT_TYPE,
           },
-          body: JSON.stringify(postureData)
+          body
         });
 
         if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        return await response.json();
+        return decodeResults(await response.arrayBuffer())[0];
       } catch (error) {
         console.error('Error getting posture score from API:', error);
         return null;
@@ -10,6 +10,38 @@ interface SessionData extends PostureSession {
   measurement_count: number;
 }
 
+interface AnalyticsSession {
+  session_id: string;
+  started_at: number;
+  last_at: number;
+  average_score: number;
+  measurements: number;
+}
+
+// Latest sessions from the API's precomputed rollups, or an empty list when it has none for this user
+const fetchSessionHistory = async (userId: string, limit: number): Promise<SessionData[]> => {
+  try {
+    const response = await fetch(
+      `http://127.0.0.1:5000/users/${encodeURIComponent(userId)}/analytics?granularity=day&sessions=${limit}`
+    );
+    if (!response.ok) return [];
+    const report: { sessions: AnalyticsSession[] } = await response.json();
+    return report.sessions.map(session => ({
+      id: session.session_id,
+      user_id: userId,
+      created_at: new Date(session.started_at * 1000).toISOString(),
+      ended_at: new Date(session.last_at * 1000).toISOString(),
+      is_active: false,
+      average_score: Math.round(session.average_score),
+      // Rows the API stored, one per second like the Supabase measurements counted below
+      measurement_count: session.measurements
+    }));
+  } catch (error) {
+    console.error('Analytics unavailable, reading measurements:', error);
+    return [];
+  }
+};
+
 const Progress = () => {
   const [sessions, setSessions] = useState<SessionData[]>([]);
 
@@ -18,24 +50,24 @@ const Progress = () => {
       const { data: { user } } = await supabase.auth.getUser();
       if (!user) return;
 
-      const { data: sessionsData, error } = await supabase
-        .from('posture_sessions')
-        .select(`
-          *,
-          posture_measurements(posture_score)
-        `)
-        .eq('user_id', user.id)
-        .order('created_at', { ascending: false })
-        .limit(10);
+      const [history, { data: sessionsData, error }] = await Promise.all([
+        fetchSessionHistory(user.id, 10),
+        supabase
+          .from('posture_sessions')
+          .select(`
+            *,
+            posture_measurements(posture_score)
+          `)
+          .eq('user_id', user.id)
+          .order('created_at', { ascending: false })
+          .limit(10)
+      ]);
 
       if (error) {
         console.error('Error fetching progress:', error);
-        return;
       }
 
-      if (!sessionsData) return;
-
-      const processedSessions = sessionsData.map(session => {
+      const processedSessions: SessionData[] = (sessionsData ?? []).map(session => {
         const measurements = session.posture_measurements as { posture_score: number }[];
         const average = measurements.length > 0
           ? Math.round(measurements.reduce((sum, m) => sum + m.posture_score, 0) / measurements.length)
@@ -48,7 +80,20 @@ const Progress = () => {
         };
       });
 
-      setSessions(processedSessions);
+      // One entry per session: the API's stats where it has the session, the stored rows otherwise
+      const merged = new Map<string, SessionData>(processedSessions.map(session => [session.id, session]));
+      history.forEach(session => {
+        const stored = merged.get(session.id);
+        merged.set(session.id, stored
+          ? { ...stored, average_score: session.average_score, measurement_count: session.measurement_count }
+          : session);
+      });
+
+      setSessions(
+        [...merged.values()]
+          .sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())
+          .slice(0, 10)
+      );
     };
 
     fetchProgress();
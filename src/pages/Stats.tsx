@@ -4,6 +4,30 @@ import { Button } from "@/components/ui/button";
 import { supabase } from "@/integrations/supabase/client";
 import { Loader2 } from "lucide-react";
 import { PostureMeasurementInsert } from "@/types/database";
+import { readMistralStream } from "@/lib/mistralStream";
+
+// count is every scored frame; measurement_count counts them at the once-per-second
+// cadence posture_measurements rows are stored at, so it matches a count of those rows
+interface SessionSummary {
+  count: number;
+  measurement_count: number;
+  average_score: number;
+  issue_counts: { [key: string]: number };
+  last_at: number | null;
+}
+
+// Running aggregates from the API, or null when it has none for this session
+const fetchSessionSummary = async (sessionId: string): Promise<SessionSummary | null> => {
+  try {
+    const response = await fetch(`http://127.0.0.1:5000/sessions/${encodeURIComponent(sessionId)}/summary`);
+    if (!response.ok) return null;
+    const summary: SessionSummary = await response.json();
+    return summary.count > 0 ? summary : null;
+  } catch (error) {
+    console.error('Session summary unavailable, reading measurements:', error);
+    return null;
+  }
+};
 
 interface SessionAnalytics {
   averageScore: number;
@@ -43,57 +67,67 @@ const Stats = () => {
       }
 
       const lastSession = sessions[0];
-      
-      // Get all measurements for the last session
-      const { data: measurements, error: measurementError } = await supabase
-        .from('posture_measurements')
-        .select('posture_score, posture_issues, created_at')
-        .eq('session_id', lastSession.id)
-        .order('created_at')
-        .returns<{ 
-          posture_score: number; 
-          posture_issues: string[] | null; 
-          created_at: string; 
-        }[]>();
-
-      if (measurementError) throw measurementError;
-      if (!measurements || measurements.length === 0) {
-        setError("No measurements found for the last session.");
-        return;
-      }
 
-      console.log('Raw measurements:', measurements); // Debug log
-
-      // Calculate analytics
-      const scores = measurements.map(m => m.posture_score);
-      const averageScore = Math.round(
-        scores.reduce((sum, score) => sum + score, 0) / scores.length
-      );
-
-      // Count issues - Updated handling
-      const issueCount: { [key: string]: number } = {};
-      console.log('Starting to process measurements for issues...');
-      measurements.forEach((m, index) => {
-        console.log(`Processing measurement ${index + 1}:`, {
-          posture_issues: m.posture_issues,
-          isArray: Array.isArray(m.posture_issues)
+      // Aggregates kept by the API while the session was scored; falls back to the stored rows
+      let averageScore: number;
+      let issueCount: { [key: string]: number } = {};
+      let totalMeasurements: number;
+      let lastMeasurementAt: string | null = null;
+
+      const summary = await fetchSessionSummary(lastSession.id);
+      if (summary) {
+        averageScore = Math.round(summary.average_score);
+        Object.entries(summary.issue_counts).forEach(([issue, count]) => {
+          if (count > 0) issueCount[issue] = count;
         });
-        const issues = m.posture_issues || [];
-        if (Array.isArray(issues)) {
-          issues.forEach(issue => {
-            if (issue) {
-              issueCount[issue] = (issueCount[issue] || 0) + 1;
-              console.log(`Added issue: ${issue}, count now: ${issueCount[issue]}`);
-            }
-          });
+        totalMeasurements = summary.measurement_count;
+        if (summary.last_at !== null) lastMeasurementAt = new Date(summary.last_at * 1000).toISOString();
+      } else {
+        // Get all measurements for the last session
+        const { data: measurements, error: measurementError } = await supabase
+          .from('posture_measurements')
+          .select('posture_score, posture_issues, created_at')
+          .eq('session_id', lastSession.id)
+          .order('created_at')
+          .returns<{ 
+            posture_score: number; 
+            posture_issues: string[] | null; 
+            created_at: string; 
+          }[]>();
+
+        if (measurementError) throw measurementError;
+        if (!measurements || measurements.length === 0) {
+          setError("No measurements found for the last session.");
+          return;
         }
-      });
+
+        // Calculate analytics
+        const scores = measurements.map(m => m.posture_score);
+        averageScore = Math.round(
+          scores.reduce((sum, score) => sum + score, 0) / scores.length
+        );
+
+        // Count issues
+        issueCount = {};
+        measurements.forEach(m => {
+          const issues = m.posture_issues || [];
+          if (Array.isArray(issues)) {
+            issues.forEach(issue => {
+              if (issue) {
+                issueCount[issue] = (issueCount[issue] || 0) + 1;
+              }
+            });
+          }
+        });
+        totalMeasurements = measurements.length;
+        lastMeasurementAt = measurements[measurements.length - 1].created_at;
+      }
 
       console.log('Final issue count:', issueCount);
 
       // Calculate session duration
       const startTime = new Date(lastSession.created_at);
-      const endTime = new Date(lastSession.ended_at || measurements[measurements.length - 1].created_at);
+      const endTime = new Date(lastSession.ended_at || lastMeasurementAt || lastSession.created_at);
       const durationMinutes = Math.round((endTime.getTime() - startTime.getTime()) / (1000 * 60));
 
       // Prepare prompt for AI
@@ -120,55 +154,41 @@ const Stats = () => {
         const requestBody = { prompt };
         console.log('Request body:', requestBody);
 
-        const response = await fetch('http://127.0.0.1:5000/query_mistral', {
+        // Stream tokens so feedback appears while Mistral is still generating
+        const response = await fetch('http://127.0.0.1:5000/query_mistral_stream', {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'text/event-stream'
           },
           body: JSON.stringify(requestBody)
         });
 
         console.log('API Response status:', response.status);
-        console.log('API Response headers:', Object.fromEntries(response.headers.entries()));
-        
-        const responseText = await response.text();
-        console.log('API Raw response text:', responseText);
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
+          const responseText = await response.text();
           throw new Error(`HTTP error! status: ${response.status}, response: ${responseText}`);
         }
 
-        let aiResponse;
-        try {
-          aiResponse = JSON.parse(responseText);
-          console.log('Parsed AI response:', aiResponse);
-        } catch (e) {
-          console.error('Failed to parse JSON response:', e);
-          throw new Error(`Invalid JSON response from API: ${responseText}`);
-        }
-
-        // Check the response structure
-        if (!aiResponse || typeof aiResponse !== 'object') {
-          throw new Error(`Invalid response format: ${JSON.stringify(aiResponse)}`);
-        }
-
-        // Get the text from the outputs array
-        const completion = aiResponse.outputs?.[0]?.text || aiResponse.text;
-                         
-        if (!completion) {
-          console.error('Full AI response:', aiResponse);
-          throw new Error('No completion found in AI response. Response: ' + JSON.stringify(aiResponse));
-        }
-
         setAnalytics({
           averageScore,
           issueCount,
-          totalMeasurements: measurements.length,
+          totalMeasurements,
           sessionDuration: `${durationMinutes} minutes`,
-          aiFeedback: completion
+          aiFeedback: ''
+        });
+
+        let completion = '';
+        await readMistralStream(response.body, (text) => {
+          completion += text;
+          setAnalytics(prev => prev && { ...prev, aiFeedback: completion });
         });
 
+        if (!completion) {
+          throw new Error('No completion found in AI response');
+        }
+
       } catch (err) {
         console.error('Detailed error getting AI feedback:', err);
         console.error('Error type:', err.constructor.name);
@@ -181,7 +201,7 @@ const Stats = () => {
         setAnalytics({
           averageScore,
           issueCount,
-          totalMeasurements: measurements.length,
+          totalMeasurements,
           sessionDuration: `${durationMinutes} minutes`,
           aiFeedback: `Failed to get AI analysis: ${err.message}`
         });
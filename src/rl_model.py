@@ -1,104 +1,72 @@
-import tensorflow as tf
-import pandas as pd
+import argparse
+import os
+import sys
 import numpy as np
-
-# Read CSV data
-df = pd.read_csv("src/posture_data.csv")
-
-# Normalize coordinate values
-def safe_float(val):
-    try:
-        return float(val)
-    except ValueError:
-        return None
-
-def norm_x(col, vw):
-    v = safe_float(col)
-    return v / vw if v is not None else None
-
-def norm_y(col, vh):
-    v = safe_float(col)
-    return v / vh if v is not None else None
-
-def distance2D(x1, y1, x2, y2):
-    return np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
-def angleABC(Ax, Ay, Bx, By, Cx, Cy):
-    ABx, ABy = Ax - Bx, Ay - By
-    CBx, CBy = Cx - Bx, Cy - By
-    dot = ABx * CBx + ABy * CBy
-    magAB, magCB = np.sqrt(ABx**2 + ABy**2), np.sqrt(CBx**2 + CBy**2)
-    if magAB == 0 or magCB == 0:
-        return 180.0
-    cosTheta = np.clip(dot / (magAB * magCB), -1, 1)
-    return np.degrees(np.arccos(cosTheta))
-
-# Feature extraction function
-def extract_features(row):
-    vw, vh = safe_float(row["videoWidth"]), safe_float(row["videoHeight"])
-    if vw is None or vh is None:
-        return None
-    
-    # Normalize coordinates
-    noseX, noseY = norm_x(row["nose_x"], vw), norm_y(row["nose_y"], vh)
-    lshoX, lshoY = norm_x(row["left_shoulder_x"], vw), norm_y(row["left_shoulder_y"], vh)
-    rshoX, rshoY = norm_x(row["right_shoulder_x"], vw), norm_y(row["right_shoulder_y"], vh)
-    learX, learY = norm_x(row["left_ear_x"], vw), norm_y(row["left_ear_y"], vh)
-    rearX, rearY = norm_x(row["right_ear_x"], vw), norm_y(row["right_ear_y"], vh)
-
-    if None in [noseX, noseY, lshoX, lshoY, rshoX, rshoY, learX, learY, rearX, rearY]:
-        return None
-
-    mshoX, mshoY = (lshoX + rshoX) / 2, (lshoY + rshoY) / 2
-    dist_nose_shoulders = distance2D(noseX, noseY, mshoX, mshoY)
-    shoulder_width = distance2D(lshoX, lshoY, rshoX, rshoY)
-    ratio_noseShoulders = dist_nose_shoulders / shoulder_width if shoulder_width > 0 else 0
-    neck_tilt_angle = angleABC(learX, learY, noseX, noseY, rearX, rearY)
-    dist_leftEar_nose = distance2D(learX, learY, noseX, noseY)
-    dist_rightEar_nose = distance2D(rearX, rearY, noseX, noseY)
-    angle_leftShoulder = angleABC(learX, learY, lshoX, lshoY, noseX, noseY)
-    angle_rightShoulder = angleABC(rearX, rearY, rshoX, rshoY, noseX, noseY)
-
-    return [
-        dist_nose_shoulders,
-        ratio_noseShoulders,
-        neck_tilt_angle,
-        dist_leftEar_nose,
-        dist_rightEar_nose,
-        angle_leftShoulder,
-        angle_rightShoulder
-    ]
-
-# Process dataset
-X, y = [], []
-for _, row in df.iterrows():
-    label = safe_float(row["label"])
-    features = extract_features(row)
-    if features and label is not None:
-        X.append(features)
-        y.append(label / 100)  # Normalize labels between 0-1
-
-# Convert to NumPy arrays
-X, y = np.array(X), np.array(y)
-
-# Split dataset
 from sklearn.model_selection import train_test_split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Build Neural Network
-model = tf.keras.Sequential([
-    tf.keras.layers.Dense(16, activation="relu", input_shape=(7,)),
-    tf.keras.layers.Dense(16, activation="relu"),
-    tf.keras.layers.Dense(1, activation="sigmoid")
-])
-
-model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-              loss="mean_squared_error")
-
-# Train Model
-print("Training model...")
-history = model.fit(X_train, y_train, epochs=100, batch_size=8, validation_data=(X_test, y_test))
-
-# Save model
-model.save("posture_model.h5")
-print("Model saved as 'posture_model.h5'.")
+# src/model's modules import each other by flat name (from features import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+from augment import make_augmented_dataset
+from training_data import DEFAULT_CACHE_DIR, load_training_features, load_training_keypoints, make_dataset
+from sweep import DEFAULT_EXPORT_PATH, build_model, make_grid, parse_widths, run_sweep
+
+
+def train_single(X, y, keypoints=None):
+    # Split dataset
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    if keypoints is not None:
+        # Fresh rotations, scalings, shifts, mirrors and jitter of the raw landmarks every epoch
+        train_ds = make_augmented_dataset(keypoints, y, train_idx, batch_size=8)
+    else:
+        train_ds = make_dataset(X, y, train_idx, batch_size=8, shuffle=True)
+    test_ds = make_dataset(X, y, test_idx, batch_size=8)
+
+    # Build Neural Network
+    model = build_model(widths=(16, 16), learning_rate=0.001)
+
+    # Train Model
+    print("Training model...")
+    model.fit(train_ds, epochs=100, validation_data=test_ds)
+
+    # Save model
+    model.save("posture_model.h5")
+    print("Model saved as 'posture_model.h5'.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the posture score model.")
+    parser.add_argument("--data", default="src/posture_data.csv", help="training CSV or Parquet file")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where extracted features are cached")
+    parser.add_argument("--no-cache", action="store_true", help="re-extract features even if cached")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows read per chunk")
+    parser.add_argument("--augment", action="store_true", help="train on landmarks augmented on the fly")
+
+    sweep = parser.add_argument_group("sweep", "k-fold hyperparameter search (--sweep)")
+    sweep.add_argument("--sweep", action="store_true", help="cross-validate a grid and export the best model")
+    sweep.add_argument("--widths", type=parse_widths, nargs="+", default=[(8,), (16, 16), (32, 16), (32, 32)],
+                       help="hidden layer widths per config, e.g. 16,16 32,16")
+    sweep.add_argument("--learning-rates", type=float, nargs="+", default=[0.0003, 0.001, 0.003])
+    sweep.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32])
+    sweep.add_argument("--epochs", type=int, nargs="+", default=[100])
+    sweep.add_argument("--folds", type=int, default=5)
+    sweep.add_argument("--workers", type=int, default=os.cpu_count())
+    sweep.add_argument("--seed", type=int, default=42)
+    sweep.add_argument("--results", default="sweep_results.json", help="per-trial metrics output")
+    sweep.add_argument("--export", default=DEFAULT_EXPORT_PATH, help="where the best model is saved")
+    sweep.add_argument("--no-convert", action="store_true", help="skip the convert_model.py export")
+    args = parser.parse_args()
+
+    # Features are extracted in chunks once, then memory-mapped from the cache
+    X, y = load_training_features(args.data, args.cache_dir, args.chunksize, use_cache=not args.no_cache)
+
+    if not args.sweep:
+        keypoints = load_training_keypoints(args.data, args.cache_dir, args.chunksize)[0] if args.augment else None
+        train_single(X, y, keypoints)
+        return
+
+    grid = make_grid(args.widths, args.learning_rates, args.batch_sizes, args.epochs)
+    run_sweep(X, y, grid, folds=args.folds, workers=args.workers, seed=args.seed,
+              results_path=args.results, export_path=args.export, convert=not args.no_convert)
+
+
+if __name__ == "__main__":
+    main()
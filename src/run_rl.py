@@ -1,53 +1,68 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
 import cv2
 import numpy as np
-import tensorflow as tf
 import mediapipe as mp
+# src/model's modules import each other by flat name (from features import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "model"))
+from features import detect_issues, extract_features, issue_names
+from adaptive_pose import AdaptivePose
+from inference import load_posture_model
+from metrics import MetricsRegistry
+from pipeline import LatestQueue, StageStats
+from recording import LandmarkRecorder, LandmarkRecording, LandmarkReplay
 
-# Initialize MediaPipe Pose
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
-# Load TensorFlow model
-model = tf.keras.models.load_model("src/model/posture_model.h5")  # Change if needed
+STAGE_METRIC = "frame_stage_seconds"
 
-# Function to calculate 2D distance
-def distance2D(x1, y1, x2, y2):
-    return np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+# Times one stage of analyze_frame when a metrics registry is given
+def stage(timings, name):
+    return timings.time(STAGE_METRIC, stage=name) if timings is not None else nullcontext()
 
-# Function to calculate angle between three points
-def angleABC(Ax, Ay, Bx, By, Cx, Cy):
-    ABx, ABy = Ax - Bx, Ay - By
-    CBx, CBy = Cx - Bx, Cy - By
+# Draw the smoothed latency of every timed stage in the bottom-right corner
+def draw_timings(image, timings):
+    series = sorted(timings.series(STAGE_METRIC).items())
+    h, w = image.shape[:2]
+    for i, (labels, histogram) in enumerate(series):
+        name = dict(labels)["stage"]
+        cv2.putText(image, f"{name}: {histogram.recent * 1000:.1f} ms", (w - 180, h - 20 - (len(series) - 1 - i) * 22),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 0), 1)
 
-    dot = ABx * CBx + ABy * CBy
-    magAB = np.sqrt(ABx ** 2 + ABy ** 2)
-    magCB = np.sqrt(CBx ** 2 + CBy ** 2)
-    if magAB == 0 or magCB == 0:
-        return 180.0
-
-    cosTheta = dot / (magAB * magCB)
-    cosTheta = np.clip(cosTheta, -1, 1)
-    return np.degrees(np.arccos(cosTheta))
-
-# Open webcam
-cap = cv2.VideoCapture(0)
-
-while cap.isOpened():
+# Replayed sessions come with their landmarks; camera and video frames get them from pose detection
+def read_frame(cap):
+    if isinstance(cap, LandmarkReplay):
+        return cap.read()
     ret, frame = cap.read()
-    if not ret:
-        break
+    return ret, frame, None
 
-    # Convert to RGB for MediaPipe
-    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    image.flags.writeable = False
-    results = pose.process(image)
+# Analyze one BGR frame: pose detection, features, model score and overlays
+def analyze_frame(frame, pose, model, debug=False, timings=None, results=None, recorder=None):
+    if results is None:
+        # Convert to RGB for MediaPipe
+        with stage(timings, "convert"):
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+        with stage(timings, "pose"):
+            results = pose.process(image)
 
-    # Convert back to BGR for OpenCV
-    image.flags.writeable = True
-    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        # Convert back to BGR for OpenCV
+        with stage(timings, "convert"):
+            image.flags.writeable = True
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    else:
+        image = frame
 
     h, w, _ = frame.shape  # Get frame dimensions
 
+    if recorder is not None:
+        with stage(timings, "record"):
+            recorder.record(results.pose_landmarks, w, h)
+
     if results.pose_landmarks:
         landmarks = results.pose_landmarks.landmark
 
@@ -61,40 +76,28 @@ while cap.isOpened():
         left_ear = get_landmark("LEFT_EAR")
         right_ear = get_landmark("RIGHT_EAR")
 
-        # Normalize coordinates (VERY IMPORTANT for consistency with training)
-        nose_x, nose_y = nose.x, nose.y
-        lsho_x, lsho_y = left_shoulder.x, left_shoulder.y
-        rsho_x, rsho_y = right_shoulder.x, right_shoulder.y
-        lear_x, lear_y = left_ear.x, left_ear.y
-        rear_x, rear_y = right_ear.x, right_ear.y
+        # Normalized keypoints (VERY IMPORTANT for consistency with training)
+        keypoints = np.array([nose.x, nose.y,
+                              left_shoulder.x, left_shoulder.y,
+                              right_shoulder.x, right_shoulder.y,
+                              left_ear.x, left_ear.y,
+                              right_ear.x, right_ear.y])
 
         # Compute features
-        msho_x, msho_y = (lsho_x + rsho_x) / 2, (lsho_y + rsho_y) / 2
-        dist_nose_shoulders = distance2D(nose_x, nose_y, msho_x, msho_y)
-        shoulder_width = distance2D(lsho_x, lsho_y, rsho_x, rsho_y)
-        ratio_noseShoulders = dist_nose_shoulders / shoulder_width if shoulder_width > 0 else 0
-        neck_tilt_angle = angleABC(lear_x, lear_y, nose_x, nose_y, rear_x, rear_y)
-        dist_leftEar_nose = distance2D(lear_x, lear_y, nose_x, nose_y)
-        dist_rightEar_nose = distance2D(rear_x, rear_y, nose_x, nose_y)
-        angle_leftShoulder = angleABC(lear_x, lear_y, lsho_x, lsho_y, nose_x, nose_y)
-        angle_rightShoulder = angleABC(rear_x, rear_y, rsho_x, rsho_y, nose_x, nose_y)
-        shoulder_width = distance2D(lsho_x, lsho_y, rsho_x, rsho_y)
-        head_height = distance2D(nose_x, nose_y, msho_x, msho_y)
-        ear_height_diff = abs(lear_y - rear_y) * h
-        shoulder_height_diff = abs(lsho_y - rsho_y) * h
+        with stage(timings, "features"):
+            features, _ = extract_features(keypoints)
+        (dist_nose_shoulders, ratio_noseShoulders, neck_tilt_angle,
+         _, _, angle_leftShoulder, angle_rightShoulder) = features[0]
 
+        # Predict posture
+        with stage(timings, "model"):
+            pred = model.predict(features, verbose=0)[0][0]
 
         # Debugging Prints
-        print(f"Dist Nose-Shoulders: {dist_nose_shoulders:.2f}, Ratio: {ratio_noseShoulders:.2f}")
-        print(f"Neck Tilt: {neck_tilt_angle:.2f}, Shoulder Angles: {angle_leftShoulder:.2f}, {angle_rightShoulder:.2f}")
-
-        # Prepare input for model
-        features = np.array([[dist_nose_shoulders, ratio_noseShoulders, neck_tilt_angle,
-                              dist_leftEar_nose, dist_rightEar_nose, angle_leftShoulder, angle_rightShoulder]])
-
-        # Predict posture
-        pred = model.predict(features)[0][0]
-        print("Raw Prediction:", pred)  # Debugging: Check if prediction is always 1.0
+        if debug:
+            print(f"Dist Nose-Shoulders: {dist_nose_shoulders:.2f}, Ratio: {ratio_noseShoulders:.2f}")
+            print(f"Neck Tilt: {neck_tilt_angle:.2f}, Shoulder Angles: {angle_leftShoulder:.2f}, {angle_rightShoulder:.2f}")
+            print("Raw Prediction:", pred)  # Debugging: Check if prediction is always 1.0
 
         # Convert prediction to posture score
         posture_score = int(pred * 100)
@@ -103,36 +106,193 @@ while cap.isOpened():
         # Display label on frame
         cv2.putText(image, f"Posture: {label} ({posture_score}%)", (20, 50),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0) if label == "Good Posture" else (0, 0, 255), 2)
-        
-        head_too_low_thresh = shoulder_width * 0.6
-        head_too_far_thresh = shoulder_width * 1.2
-        ear_level_thresh = 15  # Pixels threshold for level check
-        shoulder_level_thresh = 20  # Pixels threshold for level check
-
-        # Detect posture issues
-        issues = []
-        if ear_height_diff > ear_level_thresh:
-            issues.append("Head Tilt Detected")
-        if shoulder_height_diff > shoulder_level_thresh:
-            issues.append("Shoulders Uneven")
-        if head_height < head_too_low_thresh:
-            issues.append("Head Too Low")
-        if head_height > head_too_far_thresh:
-            issues.append("Head Too Far Forward")
+
+        # Detect posture issues (level thresholds are in pixels)
+        with stage(timings, "issues"):
+            issues = issue_names(detect_issues(keypoints, y_scale=h)[0])
 
         # Display alerts
         for i, issue in enumerate(issues):
             cv2.putText(image, issue, (20, 100 + i * 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
-
         # Draw landmarks
-        mp.solutions.drawing_utils.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        with stage(timings, "draw"):
+            mp.solutions.drawing_utils.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
 
-    # Show result
+    if timings is not None:
+        draw_timings(image, timings)
+    return image
+
+# Show a frame; returns False when the user pressed "q"
+def show_frame(image, headless):
+    if headless:
+        return True
     cv2.imshow("Posture Analysis", image)
+    return not (cv2.waitKey(1) & 0xFF == ord("q"))
+
+# One loop doing capture, inference and display in turn
+def run_sequential(cap, pose, model, args):
+    frame_stats = StageStats("frame")
+    while cap.isOpened():
+        start = time.perf_counter()
+        ret, frame, results = read_frame(cap)
+        if not ret:
+            break
+
+        image = analyze_frame(frame, pose, model, args.debug, args.timings, results, args.recorder)
+        if not show_frame(image, args.headless):
+            break
+        frame_stats.record(time.perf_counter() - start)
+    return [frame_stats]
+
+# Capture, inference and display in separate stages joined by drop-oldest queues
+def run_pipelined(cap, pose, model, args):
+    stats = {name: StageStats(name) for name in ["capture", "inference", "display", "end_to_end"]}
+    frames, results = LatestQueue(args.queue_size), LatestQueue(args.queue_size)
+    stop = threading.Event()
+
+    # Live sources drop stale frames. Video files are either paced at their own
+    # frame rate (--realtime, dropping like a camera) or read with backpressure
+    # so every frame is processed at maximum speed. Replays pace themselves
+    replay = isinstance(cap, LandmarkReplay)
+    live = args.source.isdigit() and not replay
+    drop_stale = live or args.realtime
+    frame_interval = 0.0
+    if args.realtime and not live and not replay:
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30)
+
+    # Each stage always ends its output with None, or with the exception that stopped it,
+    # so a failure travels down the pipeline instead of leaving the next stage waiting
+    def capture():
+        end = None
+        try:
+            next_frame = time.perf_counter()
+            while not stop.is_set() and cap.isOpened():
+                start = time.perf_counter()
+                ret, frame, pose_results = read_frame(cap)
+                if not ret:
+                    break
+                stats["capture"].record(time.perf_counter() - start)
+                frames.put((frame, pose_results, start), drop=drop_stale)
+                if frame_interval:
+                    next_frame += frame_interval
+                    time.sleep(max(0.0, next_frame - time.perf_counter()))
+        except Exception as e:
+            end = e
+        finally:
+            frames.put(end, drop=drop_stale)
+
+    def inference():
+        end = None
+        try:
+            while True:
+                item = frames.get()
+                if item is None or isinstance(item, Exception):
+                    end = item
+                    break
+                frame, pose_results, captured = item
+                start = time.perf_counter()
+                image = analyze_frame(frame, pose, model, args.debug, args.timings, pose_results, args.recorder)
+                stats["inference"].record(time.perf_counter() - start)
+                results.put((image, captured), drop=drop_stale)
+        except Exception as e:
+            end = e
+        finally:
+            results.put(end, drop=drop_stale)
+
+    threads = [threading.Thread(target=capture, daemon=True), threading.Thread(target=inference, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    # Display stays on the main thread, which OpenCV GUI calls require
+    error = None
+    while True:
+        item = results.get()
+        if item is None or isinstance(item, Exception):
+            error = item
+            break
+        image, captured = item
+        start = time.perf_counter()
+        cv2.putText(image, f"Inference: {stats['inference'].fps():.1f} fps", (20, image.shape[0] - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        keep_running = show_frame(image, args.headless)
+        now = time.perf_counter()
+        stats["display"].record(now - start)
+        stats["end_to_end"].record(now - captured)
+        if not keep_running:
+            break
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=1)
+    print(f"Dropped stale frames: {frames.dropped} before inference, {results.dropped} before display")
+    if error is not None:
+        raise error
+    return list(stats.values())
+
+# Parsed command line plus the objects the frame loops read from it (also used by bench_suite.py)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Real-time posture scoring from a webcam or video file")
+    parser.add_argument("--source", default="0", help="camera index or path to a video file")
+    parser.add_argument("--pipelined", action="store_true", help="run capture, inference and display in separate threads")
+    parser.add_argument("--queue-size", type=int, default=1, help="frames buffered between pipeline stages")
+    parser.add_argument("--realtime", action="store_true", help="pace videos and replays at their own frame rate")
+    parser.add_argument("--headless", action="store_true", help="do not open a window (for benchmarks)")
+    parser.add_argument("--debug", action="store_true", help="print features and raw predictions per frame")
+    parser.add_argument("--overlay-timings", action="store_true", help="draw per-stage latency on the frame")
+    parser.add_argument("--adaptive", action="store_true", help="skip pose detection while the user is still")
+    parser.add_argument("--pose-scale", type=float, default=1.0, help="downscale factor for pose detection")
+    parser.add_argument("--motion-threshold", type=float, default=3.0, help="mean gray-level change that counts as motion")
+    parser.add_argument("--max-skip", type=int, default=8, help="most frames to hold landmarks for while still")
+    parser.add_argument("--record", help="append the analyzed frames' landmarks to this recording file")
+    parser.add_argument("--replay", help="score a session from a recording file instead of a camera or video")
+    parser.add_argument("--replay-session", default="-1", help="session id or index in the recording (default: last)")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="playback speed with --realtime")
+    args = parser.parse_args(argv)
+    args.timings = MetricsRegistry() if args.overlay_timings else None
+    args.recorder = LandmarkRecorder(args.record) if args.record else None
+    return args
+
+def main():
+    args = parse_args()
+
+    # Initialize MediaPipe Pose (replays carry their landmarks and skip it)
+    pose = None
+    if not args.replay:
+        pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if pose is not None and (args.adaptive or args.pose_scale != 1.0):
+        max_skip = args.max_skip if args.adaptive else 0
+        pose = AdaptivePose(pose, scale=args.pose_scale, motion_threshold=args.motion_threshold, max_skip=max_skip)
+
+    # Load posture model (POSTURE_MODEL_BACKEND as in app.py; numpy, npz and onnx skip the TensorFlow import)
+    model = load_posture_model(os.environ.get("POSTURE_MODEL_PATH"),  # Change if needed
+                               os.environ.get("POSTURE_MODEL_BACKEND", "keras"))
+
+    # Open webcam, video file or recorded session
+    if args.replay:
+        session = args.replay_session
+        session = int(session) if session.lstrip("-").isdigit() else session
+        cap = LandmarkReplay(LandmarkRecording(args.replay).session(session), realtime=args.realtime,
+                             speed=args.replay_speed)
+    else:
+        cap = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+
+    run = run_pipelined if args.pipelined else run_sequential
+    try:
+        stage_stats = run(cap, pose, model, args)
+    finally:
+        # Release the camera and keep the recording even when a stage failed
+        cap.release()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        if args.recorder is not None:
+            args.recorder.close()
+            print(f"Recorded {args.recorder.count} frames to {args.record} (session {args.recorder.session_id})")
 
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
+    for stats in stage_stats:
+        print(stats.summary())
+    if isinstance(pose, AdaptivePose):
+        print(f"Pose detection ran on {pose.inference_rate():.0%} of frames")
 
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()